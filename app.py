@@ -10,11 +10,15 @@ from routes.auth_routes import auth_bp
 from routes.dashboard_routes import dashboard_bp
 from routes.dashboard_view_routes import dashboard_view_bp
 from services.db_service import init_db
+from utils.http_utils import init_http_layer
 from datetime import timedelta
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# JSON encoding, response compression and timing headers
+init_http_layer(app)
+
 # Session configuration for user authentication
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
 app.config['SESSION_TYPE'] = 'filesystem'
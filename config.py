@@ -23,6 +23,77 @@ class Config:
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max file size (increased from 16MB)
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'csv', 'xlsx', 'json'}
     
+    # Chart Payload Config - max points emitted per line series / scatter chart
+    CHART_POINT_BUDGET = int(os.environ.get('CHART_POINT_BUDGET') or 500)
+    SCATTER_POINT_BUDGET = int(os.environ.get('SCATTER_POINT_BUDGET') or 400)
+    
+    # Progressive Analytics Config - datasets above the threshold get a sampled preview first
+    PROGRESSIVE_THRESHOLD_ROWS = int(os.environ.get('PROGRESSIVE_THRESHOLD_ROWS') or 200000)
+    PROGRESSIVE_SAMPLE_ROWS = int(os.environ.get('PROGRESSIVE_SAMPLE_ROWS') or 50000)
+    
+    # View Tracking Config - dashboard views are buffered and written in batches
+    VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL') or 30)
+    VIEW_FLUSH_MAX_PENDING = int(os.environ.get('VIEW_FLUSH_MAX_PENDING') or 500)
+    
+    # Dashboard Gallery Config - cards per page
+    GALLERY_PAGE_SIZE = int(os.environ.get('GALLERY_PAGE_SIZE') or 24)
+    
+    # Response Compression Config - gzip/brotli for responses above the threshold
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES') or 1024)
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL') or 6)
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY') or 5)
+    
+    # Table Schema Config - column type selection and optional compressed row format
+    SCHEMA_ENUM_MAX_VALUES = int(os.environ.get('SCHEMA_ENUM_MAX_VALUES') or 32)
+    SCHEMA_MAX_DECIMAL_SCALE = int(os.environ.get('SCHEMA_MAX_DECIMAL_SCALE') or 6)
+    TABLE_ROW_COMPRESSION = (os.environ.get('TABLE_ROW_COMPRESSION') or 'false').lower() == 'true'
+    TABLE_KEY_BLOCK_SIZE = int(os.environ.get('TABLE_KEY_BLOCK_SIZE') or 8)
+    
+    # Data Grid Config - rows per keyset page
+    GRID_PAGE_SIZE = int(os.environ.get('GRID_PAGE_SIZE') or 200)
+    GRID_MAX_PAGE_SIZE = int(os.environ.get('GRID_MAX_PAGE_SIZE') or 5000)
+    
+    # Index Planner Config - secondary indexes built after ingest
+    INDEX_BUILD_ASYNC = (os.environ.get('INDEX_BUILD_ASYNC') or 'true').lower() == 'true'
+    INDEX_MIN_ROWS = int(os.environ.get('INDEX_MIN_ROWS') or 1000)
+    INDEX_MAX_CARDINALITY = int(os.environ.get('INDEX_MAX_CARDINALITY') or 5000)
+    INDEX_MAX_PER_TABLE = int(os.environ.get('INDEX_MAX_PER_TABLE') or 6)
+    
+    # Storage Tiering Config - datasets unread for TIER_COLD_AFTER_DAYS move to columnar files
+    TIER_COLD_AFTER_DAYS = int(os.environ.get('TIER_COLD_AFTER_DAYS') or 90)
+    TIER_BATCH_LIMIT = int(os.environ.get('TIER_BATCH_LIMIT') or 50)
+    TIER_ACCESS_RESOLUTION_MINUTES = int(os.environ.get('TIER_ACCESS_RESOLUTION_MINUTES') or 60)
+    COLUMNAR_FORMAT = os.environ.get('COLUMNAR_FORMAT') or 'auto'  # auto | parquet | npz
+    
+    # Dataset Backend Config - where dataset rows live: mysql tables or in-process columnar files
+    DATASET_BACKEND = (os.environ.get('DATASET_BACKEND') or 'mysql').lower()  # mysql | columnar
+    COLUMNAR_DATA_DIR = os.environ.get('COLUMNAR_DATA_DIR') or os.path.join(BASE_DIR, 'datasets', 'columnar')
+    COLUMNAR_CACHE_TABLES = int(os.environ.get('COLUMNAR_CACHE_TABLES') or 8)
+    
+    # Dashboard Filter Config - filtered chart/KPI results kept per worker
+    DASHBOARD_FILTER_CACHE_SIZE = int(os.environ.get('DASHBOARD_FILTER_CACHE_SIZE') or 256)
+    
+    # Crossfilter Config - bitmap-indexed dimensions and datasets kept in memory per worker
+    CROSSFILTER_MAX_CARDINALITY = int(os.environ.get('CROSSFILTER_MAX_CARDINALITY') or 100)
+    CROSSFILTER_CACHE_DATASETS = int(os.environ.get('CROSSFILTER_CACHE_DATASETS') or 4)
+    
+    # Pivot Config - largest pivot (rows x columns x measures) and results kept per worker
+    PIVOT_MAX_CELLS = int(os.environ.get('PIVOT_MAX_CELLS') or 20000)
+    PIVOT_CACHE_SIZE = int(os.environ.get('PIVOT_CACHE_SIZE') or 128)
+    
+    # Query Planner Config - natural-language questions answered offline
+    QUERY_PLAN_CACHE_SIZE = int(os.environ.get('QUERY_PLAN_CACHE_SIZE') or 512)
+    QUERY_MAX_GROUPS = int(os.environ.get('QUERY_MAX_GROUPS') or 50)
+    
+    # Locking Config - seconds to wait for a per-dataset MySQL GET_LOCK (appends, stats, rehydration)
+    NAMED_LOCK_TIMEOUT = int(os.environ.get('NAMED_LOCK_TIMEOUT') or 60)
+    
+    # HTTP Cache Config - ETag version markers shared by all workers
+    CACHE_VERSION_DIR = os.environ.get('CACHE_VERSION_DIR') or os.path.join(BASE_DIR, 'uploads', 'cache_versions')
+    CACHE_ETAG_SALT = os.environ.get('CACHE_ETAG_SALT') or ''
+    DATASET_CACHE_CONTROL = os.environ.get('DATASET_CACHE_CONTROL') or 'private, max-age=0, must-revalidate'
+    DASHBOARD_CACHE_CONTROL = os.environ.get('DASHBOARD_CACHE_CONTROL') or 'private, no-cache'
+    
     # Session Config
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     
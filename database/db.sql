@@ -23,13 +23,18 @@ CREATE TABLE IF NOT EXISTS datasets (
     table_name VARCHAR(255),
     user_id INT,
     status ENUM('pending', 'processing', 'completed', 'failed') DEFAULT 'pending',
+    last_accessed_at TIMESTAMP NULL DEFAULT NULL,
+    storage_tier ENUM('hot', 'cold') NOT NULL DEFAULT 'hot',
+    cold_path VARCHAR(500) NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     INDEX idx_user_id (user_id),
     INDEX idx_status (status),
     INDEX idx_created_at (created_at),
-    INDEX idx_table_name (table_name)
+    INDEX idx_table_name (table_name),
+    INDEX idx_user_created (user_id, created_at, id),
+    INDEX idx_tier_accessed (storage_tier, last_accessed_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Prompts/Queries table
@@ -56,9 +61,11 @@ CREATE TABLE IF NOT EXISTS file_metadata (
     id INT AUTO_INCREMENT PRIMARY KEY,
     dataset_id INT NOT NULL,
     metadata_key VARCHAR(255) NOT NULL,
-    metadata_value TEXT,
+    metadata_value LONGTEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (dataset_id) REFERENCES datasets(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_dataset_metadata_key (dataset_id, metadata_key),
     INDEX idx_dataset_id (dataset_id),
     INDEX idx_metadata_key (metadata_key)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,8 @@
+-- Migration: Index the dashboard gallery listing
+-- Gallery pages filter by owner (or project) and page on (created_at, id)
+
+USE ai_dashboard;
+
+ALTER TABLE dashboards
+ADD INDEX idx_user_created (user_id, created_at, id),
+ADD INDEX idx_project_created (project_id, created_at, id);
@@ -0,0 +1,7 @@
+-- Migration: Track how often each dashboard is opened
+-- Views are buffered in-process and flushed in batches together with last_viewed_at
+
+USE ai_dashboard;
+
+ALTER TABLE dashboards
+ADD COLUMN IF NOT EXISTS view_count INT NOT NULL DEFAULT 0;
@@ -0,0 +1,12 @@
+-- Migration: Support single-query, keyset-paginated dataset listings
+-- Listings read the denormalized rows/columns counts (added by
+-- create_dashboards_table.sql) and page on (created_at, id) per user
+
+USE ai_dashboard;
+
+ALTER TABLE datasets
+ADD COLUMN IF NOT EXISTS `rows` INT NULL,
+ADD COLUMN IF NOT EXISTS `columns` INT NULL;
+
+ALTER TABLE datasets
+ADD INDEX idx_user_created (user_id, created_at, id);
@@ -0,0 +1,13 @@
+-- Migration: Cold storage tiering for dataset tables
+-- Datasets not read for TIER_COLD_AFTER_DAYS are moved to columnar files
+-- (see run_tiering.py) and restored into MySQL on their next access
+
+USE ai_dashboard;
+
+ALTER TABLE datasets
+ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMP NULL DEFAULT NULL,
+ADD COLUMN IF NOT EXISTS storage_tier ENUM('hot', 'cold') NOT NULL DEFAULT 'hot',
+ADD COLUMN IF NOT EXISTS cold_path VARCHAR(500) NULL;
+
+ALTER TABLE datasets
+ADD INDEX idx_tier_accessed (storage_tier, last_accessed_at);
@@ -0,0 +1,14 @@
+-- Migration: Make file_metadata usable as per-dataset key/value storage
+-- Stats states and column profiles are JSON documents that can exceed TEXT,
+-- and each (dataset, key) pair is written with an upsert
+
+USE ai_dashboard;
+
+ALTER TABLE file_metadata
+MODIFY COLUMN metadata_value LONGTEXT;
+
+ALTER TABLE file_metadata
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+ALTER TABLE file_metadata
+ADD UNIQUE KEY uq_dataset_metadata_key (dataset_id, metadata_key);
@@ -5,9 +5,10 @@ from flask import Blueprint, render_template, request, jsonify, redirect, url_fo
 from utils.auth_utils import login_required, get_current_user_id
 from services.project_service import (
     create_project, get_user_projects, get_project_by_id, 
-    update_project, delete_project, get_recent_activity
+    update_project, delete_project, get_recent_activity,
+    get_user_dataset_count, get_project_summary
 )
-from services.db_service import get_all_datasets, execute_query
+from services.db_service import execute_query
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -25,8 +26,7 @@ def user_dashboard():
     recent_activity = get_recent_activity(user_id, limit=5)
     
     # Get total datasets count
-    all_datasets = get_all_datasets(user_id=user_id)
-    total_datasets = len(all_datasets) if all_datasets else 0
+    total_datasets = get_user_dataset_count(user_id)
     
     return render_template('user_dashboard.html',
                          username=username,
@@ -141,6 +141,15 @@ def get_projects_api():
         'projects': projects
     }), 200
 
+@dashboard_bp.route('/api/projects/summary')
+@login_required
+def get_project_summary_api():
+    """Projects with dataset/dashboard counts, last activity and totals"""
+    user_id = get_current_user_id()
+    summary = get_project_summary(user_id, request.args.get('status'))
+    
+    return jsonify({'success': True, **summary}), 200
+
 @dashboard_bp.route('/datasets')
 @login_required  
 def datasets_page():
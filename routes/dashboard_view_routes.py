@@ -4,11 +4,16 @@ Dashboard Routes - View and manage saved AUTO MODE dashboards
 from flask import Blueprint, render_template, session, redirect, url_for, jsonify, request
 from services.dashboard_service import (
     get_dashboard_by_id,
-    get_user_dashboards,
-    get_project_dashboards,
+    get_dashboard_gallery,
+    get_dashboard_content,
     delete_dashboard
 )
+from services.dashboard_filter_service import filter_dashboard
+from services.crossfilter_service import crossfilter_dashboard
+from services.view_tracking_service import record_dashboard_view
+from config import Config
 from utils.auth_utils import login_required, get_current_user_id
+from utils.cache_utils import conditional_get
 
 dashboard_view_bp = Blueprint('dashboards', __name__, url_prefix='/dashboards')
 
@@ -16,24 +21,52 @@ dashboard_view_bp = Blueprint('dashboards', __name__, url_prefix='/dashboards')
 @dashboard_view_bp.route('/')
 @login_required
 def dashboard_gallery():
-    """View all saved dashboards for the current user"""
+    """View saved dashboards for the current user (one page of cards)"""
     user_id = get_current_user_id()
     
-    # Get filter from query params
+    # Get filter and page cursor from query params
     project_id = request.args.get('project_id', type=int)
+    cursor = request.args.get('cursor')
     
-    if project_id:
-        dashboards = get_project_dashboards(project_id)
-    else:
-        dashboards = get_user_dashboards(user_id)
+    try:
+        if project_id:
+            dashboards, next_cursor = get_dashboard_gallery(project_id=project_id, limit=Config.GALLERY_PAGE_SIZE, cursor=cursor)
+        else:
+            dashboards, next_cursor = get_dashboard_gallery(user_id=user_id, limit=Config.GALLERY_PAGE_SIZE, cursor=cursor)
+    except ValueError:
+        return redirect(url_for('dashboards.dashboard_gallery', project_id=project_id))
     
     return render_template('dashboard_gallery.html',
                          dashboards=dashboards,
+                         next_cursor=next_cursor,
+                         project_id=project_id,
                          username=session.get('username', 'User'))
 
 
+@dashboard_view_bp.route('/api/list')
+@login_required
+def dashboard_gallery_api():
+    """JSON gallery page: ?limit=&cursor=&project_id="""
+    user_id = get_current_user_id()
+    limit = request.args.get('limit', default=Config.GALLERY_PAGE_SIZE, type=int)
+    
+    try:
+        dashboards, next_cursor = get_dashboard_gallery(
+            user_id=user_id,
+            project_id=request.args.get('project_id', type=int),
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    return jsonify({'success': True, 'dashboards': dashboards, 'next_cursor': next_cursor}), 200
+
+
 @dashboard_view_bp.route('/<int:dashboard_id>')
 @login_required
+@conditional_get('dashboard', 'dashboard_id', Config.DASHBOARD_CACHE_CONTROL, per_user=True,
+                 on_not_modified=record_dashboard_view)
 def view_dashboard(dashboard_id):
     """View a specific saved dashboard with all its analytics"""
     user_id = get_current_user_id()
@@ -52,6 +85,65 @@ def view_dashboard(dashboard_id):
                          username=session.get('username', 'User'))
 
 
+@dashboard_view_bp.route('/<int:dashboard_id>/filter', methods=['POST'])
+@login_required
+def filter_dashboard_route(dashboard_id):
+    """
+    Recompute a dashboard's charts and KPIs for a set of filters
+    
+    Body: {"filters": {column: value | [values] | {op: value}}}
+    e.g. {"filters": {"department": ["Sales", "HR"], "hire_date": {"gte": "2023-01-01"}}}
+    Charts come back in the chart codec format used by the saved dashboard.
+    """
+    user_id = get_current_user_id()
+    
+    dashboard = get_dashboard_content(dashboard_id)
+    if not dashboard or dashboard['user_id'] != user_id:
+        return jsonify({'success': False, 'error': 'Dashboard not found'}), 404
+    
+    filters = (request.get_json(silent=True) or {}).get('filters') or {}
+    if not isinstance(filters, dict):
+        return jsonify({'success': False, 'error': 'filters must be an object'}), 400
+    
+    try:
+        result = filter_dashboard(dashboard, filters)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({'success': True, **result}), 200
+
+
+@dashboard_view_bp.route('/<int:dashboard_id>/crossfilter', methods=['POST'])
+@login_required
+def crossfilter_dashboard_route(dashboard_id):
+    """
+    Re-aggregate every chart for a cross-filter selection (e.g. a clicked bar)
+    
+    Body: {"selection": {column: value | [values]}} - the date column takes YYYY-MM months
+    An empty selection returns the unfiltered charts.
+    """
+    user_id = get_current_user_id()
+    
+    dashboard = get_dashboard_content(dashboard_id)
+    if not dashboard or dashboard['user_id'] != user_id:
+        return jsonify({'success': False, 'error': 'Dashboard not found'}), 404
+    
+    selection = (request.get_json(silent=True) or {}).get('selection') or {}
+    if not isinstance(selection, dict):
+        return jsonify({'success': False, 'error': 'selection must be an object'}), 400
+    
+    try:
+        result = crossfilter_dashboard(dashboard, selection)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({'success': True, **result}), 200
+
+
 @dashboard_view_bp.route('/<int:dashboard_id>/delete', methods=['POST'])
 @login_required
 def delete_dashboard_route(dashboard_id):
@@ -1,28 +1,46 @@
+import json
 from flask import Blueprint, render_template, request, jsonify
-from services.db_service import get_all_datasets, get_dataset_by_id, execute_query
+from services.db_service import list_datasets_page, get_dataset_by_id, execute_query
 from services.file_service import get_file_preview, delete_file
-from services.data_cleaning_service import get_dataset_preview, get_dataset_statistics
+from services.data_cleaning_service import get_dataset_statistics, backfill_dataset_dimensions
+from services.rollup_service import get_rollup_spec, query_rollup, charts_from_rollup, drop_rollup
+from services.profile_service import get_dataset_profile, profile_to_schema
+from services.grid_service import get_grid_columns
+from services.dataset_backend import get_dataset_backend
+from services.pivot_service import pivot_dataset
+from services.index_service import get_dataset_indexes, schedule_index_build
+from services.tiering_service import ensure_dataset_hot, get_dataset_rows_preview, discard_cold_file, mark_dataset_accessed
+from config import Config
 from utils.auth_utils import login_required, get_current_user_id
+from utils.cache_utils import conditional_get, bump_dataset_version
 
 dataset_bp = Blueprint('dataset', __name__)
 
+def get_owned_dataset(dataset_id):
+    """Dataset row if it belongs to the logged-in user, else None"""
+    rows = execute_query(
+        "SELECT * FROM datasets WHERE id = %s AND user_id = %s",
+        (dataset_id, get_current_user_id()),
+        fetch=True
+    )
+    return rows[0] if rows else None
+
 @dataset_bp.route('/')
 def list_datasets():
-    """List all datasets"""
-    datasets = get_all_datasets()
-    
-    # Add statistics for each dataset
-    if datasets:
-        for dataset in datasets:
-            if dataset.get('table_name'):
-                stats = get_dataset_statistics(dataset['table_name'])
-                if stats:
-                    dataset['row_count'] = stats.get('total_rows', 0)
-                    dataset['column_count'] = stats.get('column_count', 0)
-    
-    return jsonify({'success': True, 'datasets': datasets or []}), 200
+    """List all datasets (optional keyset pagination via ?limit=&cursor=)"""
+    limit = request.args.get('limit', type=int)
+    try:
+        datasets, next_cursor = list_datasets_page(limit=limit, cursor=request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    backfill_dataset_dimensions(datasets)
+    
+    return jsonify({'success': True, 'datasets': datasets, 'next_cursor': next_cursor}), 200
 
 @dataset_bp.route('/<int:dataset_id>')
+@conditional_get('dataset', 'dataset_id', Config.DATASET_CACHE_CONTROL,
+                 on_not_modified=mark_dataset_accessed)
 def get_dataset(dataset_id):
     """Get a specific dataset with preview from MySQL table"""
     dataset = get_dataset_by_id(dataset_id)
@@ -30,11 +48,11 @@ def get_dataset(dataset_id):
     if dataset:
         # Get data from the cleaned MySQL table
         if dataset.get('table_name'):
-            preview_data = get_dataset_preview(dataset['table_name'], limit=10)
+            preview_data = get_dataset_rows_preview(dataset, limit=10)
             dataset['preview'] = preview_data
             
             # Get statistics
-            stats = get_dataset_statistics(dataset['table_name'])
+            stats = get_dataset_statistics(dataset['table_name'], dataset['id'])
             if stats:
                 dataset['statistics'] = stats
         else:
@@ -46,36 +64,217 @@ def get_dataset(dataset_id):
         return jsonify({'success': False, 'error': 'Dataset not found'}), 404
 
 @dataset_bp.route('/<int:dataset_id>/preview')
+@conditional_get('dataset', 'dataset_id', Config.DATASET_CACHE_CONTROL,
+                 on_not_modified=mark_dataset_accessed)
 def preview_dataset(dataset_id):
     """Get dataset preview from MySQL table"""
     dataset = get_dataset_by_id(dataset_id)
     
     if dataset and dataset.get('table_name'):
-        preview_data = get_dataset_preview(dataset['table_name'], limit=20)
+        preview_data = get_dataset_rows_preview(dataset, limit=20)
         return jsonify({'success': True, 'preview': preview_data}), 200
     else:
         return jsonify({'success': False, 'error': 'Dataset not found or not processed'}), 404
 
+@dataset_bp.route('/<int:dataset_id>/schema')
+@login_required
+@conditional_get('dataset', 'dataset_id', Config.DATASET_CACHE_CONTROL, per_user=True)
+def get_dataset_schema_route(dataset_id):
+    """Get the column schema and profile of a dataset (served from metadata)"""
+    if not get_owned_dataset(dataset_id):
+        return jsonify({'success': False, 'error': 'Dataset not found'}), 404
+    
+    profile = get_dataset_profile(dataset_id)
+    if not profile:
+        return jsonify({'success': False, 'error': 'Dataset not found or not profiled'}), 404
+    
+    return jsonify({'success': True, 'schema': profile_to_schema(profile)}), 200
+
+@dataset_bp.route('/<int:dataset_id>/grid')
+@login_required
+@conditional_get('dataset', 'dataset_id', Config.DATASET_CACHE_CONTROL, per_user=True,
+                 on_not_modified=mark_dataset_accessed)
+def dataset_grid(dataset_id):
+    """
+    Page through a dataset table for the data grid
+    
+    Query: ?limit=&cursor=&sort=<column>&order=asc|desc&columns=a,b
+           &filters=<json {column: value | [values] | {op: value}}>
+    Response values are column-oriented: one list per entry in `columns`.
+    """
+    dataset = ensure_dataset_hot(get_owned_dataset(dataset_id))
+    if not dataset or not dataset.get('table_name'):
+        return jsonify({'success': False, 'error': 'Dataset not found or not processed'}), 404
+    
+    profile = get_dataset_profile(dataset_id)
+    columns = get_grid_columns(dataset['table_name'], profile)
+    
+    try:
+        filters = json.loads(request.args['filters']) if request.args.get('filters') else None
+        if filters is not None and not isinstance(filters, dict):
+            raise ValueError("filters must be a JSON object")
+        select = [col for col in request.args.get('columns', '').split(',') if col] or None
+        page = get_dataset_backend().page(
+            dataset['table_name'], columns,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            sort=request.args.get('sort') or 'id',
+            order=request.args.get('order') or 'asc',
+            filters=filters,
+            select=select
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    page['total_rows'] = profile['row_count'] if profile else dataset.get('rows')
+    return jsonify({'success': True, **page}), 200
+
+@dataset_bp.route('/<int:dataset_id>/aggregate', methods=['POST'])
+@login_required
+def aggregate_dataset(dataset_id):
+    """
+    Grouped aggregation over the dataset rows, run by the configured backend
+    
+    Body: {"group_by": [column, ...], "measures": {column: ["sum"|"mean"|"min"|"max"|"count", ...]},
+           "filters": {column: value | [values] | {op: value}}}
+    """
+    dataset = ensure_dataset_hot(get_owned_dataset(dataset_id))
+    if not dataset or not dataset.get('table_name'):
+        return jsonify({'success': False, 'error': 'Dataset not found or not processed'}), 404
+    
+    columns = get_grid_columns(dataset['table_name'], get_dataset_profile(dataset_id))
+    data = request.get_json(silent=True) or {}
+    try:
+        result = get_dataset_backend().aggregate(
+            dataset['table_name'], columns,
+            group_by=data.get('group_by'),
+            measures=data.get('measures'),
+            filters=data.get('filters')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    rows = result.astype(object).where(result.notna(), None).to_dict(orient='records')
+    return jsonify({'success': True, 'columns': list(result.columns), 'rows': rows}), 200
+
+@dataset_bp.route('/<int:dataset_id>/pivot', methods=['POST'])
+@login_required
+def pivot_dataset_route(dataset_id):
+    """
+    Pivot table over the dataset rows
+    
+    Body: {"rows": ["department"], "columns": ["gender", "hire_date:year"],
+           "values": {"salary": ["mean"]}, "filters": {column: value | [values] | {op: value}}}
+    Dimensions may bucket a date column with :year, :quarter, :month or :day.
+    """
+    if not get_owned_dataset(dataset_id):
+        return jsonify({'success': False, 'error': 'Dataset not found'}), 404
+    
+    try:
+        result = pivot_dataset(dataset_id, request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    
+    return jsonify({'success': True, **result}), 200
+
+@dataset_bp.route('/<int:dataset_id>/indexes')
+@login_required
+def dataset_indexes(dataset_id):
+    """Secondary indexes planned for a dataset, with build time and size"""
+    if not get_owned_dataset(dataset_id):
+        return jsonify({'success': False, 'error': 'Dataset not found'}), 404
+    
+    indexes = get_dataset_indexes(dataset_id)
+    if not indexes:
+        return jsonify({'success': False, 'error': 'No index plan for this dataset'}), 404
+    
+    return jsonify({'success': True, 'indexes': indexes}), 200
+
+@dataset_bp.route('/<int:dataset_id>/indexes', methods=['POST'])
+@login_required
+def rebuild_dataset_indexes(dataset_id):
+    """Re-plan and build indexes from the current profile (in the background)"""
+    if get_dataset_backend().name != 'mysql':
+        return jsonify({'success': False, 'error': 'Indexes are only built for datasets stored in MySQL'}), 400
+    
+    dataset = get_owned_dataset(dataset_id)
+    profile = get_dataset_profile(dataset_id)
+    if not dataset or not dataset.get('table_name') or not profile:
+        return jsonify({'success': False, 'error': 'Dataset not found or not profiled'}), 404
+    if dataset.get('storage_tier') == 'cold':
+        return jsonify({'success': False, 'error': 'Dataset is in cold storage - its indexes are restored with it'}), 409
+    
+    schedule_index_build(dataset_id, dataset['table_name'], profile)
+    return jsonify({'success': True, 'status': 'scheduled'}), 202
+
+@dataset_bp.route('/<int:dataset_id>/rollup', methods=['POST'])
+@login_required
+def query_dataset_rollup(dataset_id):
+    """
+    Aggregate a dataset from its rollup cube
+    
+    Body: {"group_by": [dimension, ...], "filters": {dimension: value or [values]}}
+    """
+    if not get_owned_dataset(dataset_id):
+        return jsonify({'success': False, 'error': 'Dataset not found'}), 404
+    
+    spec = get_rollup_spec(dataset_id)
+    if not spec:
+        return jsonify({'success': False, 'error': 'Rollup not available for this dataset'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        result = query_rollup(spec, data.get('group_by') or [], data.get('filters'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    rows = result.astype(object).where(result.notna(), None).to_dict(orient='records')
+    return jsonify({
+        'success': True,
+        'dimensions': spec['dimensions'],
+        'measures': spec['measures'],
+        'rows': rows
+    }), 200
+
+@dataset_bp.route('/<int:dataset_id>/rollup/charts', methods=['POST'])
+@login_required
+def rollup_charts(dataset_id):
+    """Build the aggregate dashboard charts from the rollup cube (optional filters in body)"""
+    if not get_owned_dataset(dataset_id):
+        return jsonify({'success': False, 'error': 'Dataset not found'}), 404
+    
+    spec = get_rollup_spec(dataset_id)
+    if not spec:
+        return jsonify({'success': False, 'error': 'Rollup not available for this dataset'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        charts = charts_from_rollup(spec, data.get('filters'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, 'charts': charts}), 200
+
 @dataset_bp.route('/<int:dataset_id>/view')
 @login_required
+@conditional_get('dataset', 'dataset_id', Config.DATASET_CACHE_CONTROL, per_user=True,
+                 on_not_modified=mark_dataset_accessed)
 def view_dataset(dataset_id):
     """Get dataset data for viewing (user-specific)"""
-    user_id = get_current_user_id()
-    
     # Get dataset and verify ownership
-    dataset = execute_query(
-        "SELECT * FROM datasets WHERE id = %s AND user_id = %s",
-        (dataset_id, user_id),
-        fetch=True
-    )
+    dataset = get_owned_dataset(dataset_id)
     
     if not dataset:
         return jsonify({'success': False, 'error': 'Dataset not found'}), 404
     
-    dataset = dataset[0]
-    
     if dataset.get('table_name'):
-        preview_data = get_dataset_preview(dataset['table_name'], limit=100)
+        preview_data = get_dataset_rows_preview(dataset, limit=100)
         return jsonify({'success': True, 'data': preview_data}), 200
     else:
         return jsonify({'success': False, 'error': 'Dataset not processed'}), 404
@@ -89,17 +288,20 @@ def delete_dataset(dataset_id):
         if not dataset:
             return jsonify({'success': False, 'error': 'Dataset not found'}), 404
         
-        # Drop the MySQL table if it exists
+        # Drop the dataset table if it exists
         if dataset.get('table_name'):
             try:
-                drop_sql = f"DROP TABLE IF EXISTS {dataset['table_name']}"
-                execute_query(drop_sql, fetch=False)
+                get_dataset_backend().drop(dataset['table_name'])
+                drop_rollup(dataset['table_name'])
             except Exception as e:
                 print(f"Error dropping table: {e}")
         
+        discard_cold_file(dataset)
+        
         # Delete the dataset record from database
         delete_sql = "DELETE FROM datasets WHERE id = %s"
         execute_query(delete_sql, params=(dataset_id,), fetch=False)
+        bump_dataset_version(dataset_id)
         
         # Optionally delete the uploaded file
         import os
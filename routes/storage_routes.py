@@ -3,10 +3,12 @@ Storage Routes - Central hub for all dataset management
 Displays all stored datasets and handles storage operations
 """
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
-from services.db_service import get_all_datasets, create_dataset, execute_query
-from services.data_cleaning_service import process_and_store_dataset, read_file
+from services.db_service import get_all_datasets, list_datasets_page, create_dataset, execute_query, get_dataset_by_id
+from services.data_cleaning_service import process_and_store_dataset, read_file, backfill_dataset_dimensions
 from utils.auth_utils import login_required, get_current_user_id
+from utils.cache_utils import bump_dataset_version
 from services.file_service import save_uploaded_file
+from services.append_service import append_to_dataset
 import pandas as pd
 
 storage_bp = Blueprint('storage', __name__)
@@ -76,6 +78,7 @@ def upload_to_storage():
             params=(dataset_id,),
             fetch=False
         )
+        bump_dataset_version(dataset_id)
         
         return jsonify({
             'success': True,
@@ -93,18 +96,53 @@ def upload_to_storage():
 @storage_bp.route('/api/list')
 @login_required
 def list_storage_datasets():
-    """API endpoint to get all datasets (user-specific)"""
+    """API endpoint to get all datasets (user-specific, optional ?limit=&cursor= paging)"""
     user_id = get_current_user_id()
-    datasets = get_all_datasets(user_id=user_id)
+    limit = request.args.get('limit', type=int)
+    try:
+        datasets, next_cursor = list_datasets_page(user_id=user_id, limit=limit, cursor=request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    backfill_dataset_dimensions(datasets)
+    
+    return jsonify({'success': True, 'datasets': datasets, 'next_cursor': next_cursor}), 200
+
+@storage_bp.route('/api/datasets/<int:dataset_id>/append', methods=['POST'])
+@login_required
+def append_dataset_rows(dataset_id):
+    """
+    Add the rows of a new file to an existing dataset (user-specific)
     
-    # Add statistics for each dataset
-    if datasets:
-        for dataset in datasets:
-            if dataset.get('table_name'):
-                from services.data_cleaning_service import get_dataset_statistics
-                stats = get_dataset_statistics(dataset['table_name'])
-                if stats:
-                    dataset['row_count'] = stats.get('total_rows', 0)
-                    dataset['column_count'] = stats.get('column_count', 0)
+    Form: file, mode=append|upsert, key=<comma-separated natural key columns>
+    """
+    if 'file' not in request.files:
+        return jsonify({'success': False, 'error': 'No file provided'}), 400
+    
+    dataset = get_dataset_by_id(dataset_id)
+    if not dataset or dataset.get('user_id') != get_current_user_id():
+        return jsonify({'success': False, 'error': 'Dataset not found'}), 404
+    
+    try:
+        file_info, error = save_uploaded_file(request.files['file'])
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
+        key_columns = [col.strip() for col in request.form.get('key', '').split(',') if col.strip()]
+        success, message, result = append_to_dataset(
+            dataset_id,
+            file_info['filepath'],
+            mode=request.form.get('mode', 'append'),
+            key_columns=key_columns
+        )
+        
+        if not success:
+            return jsonify({'success': False, 'error': message}), 400
+        
+        return jsonify({'success': True, 'message': message, 'result': result}), 200
     
-    return jsonify({'success': True, 'datasets': datasets or []}), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Append failed: {str(e)}'
+        }), 500
@@ -2,12 +2,13 @@
 Enhanced Upload Routes - Unified Dashboard Interface
 Handles upload, preview, cleaning, column selection, downloads, and analytics in one flow
 """
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, send_file, flash
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, send_file, flash, Response, stream_with_context, current_app
 from services.file_service import save_uploaded_file, clean_dataframe
 from services.db_service import create_dataset, execute_query
 from services.data_cleaning_service import process_and_store_dataset, read_file
 from services.export_service import export_to_csv, export_to_excel, get_download_filename
 from services.auto_analytics_service import generate_summary_stats, create_auto_charts, generate_insights_text
+from services.progressive_analytics_service import progressive_analytics
 from services.ai_prompts_service import (
     get_dataset_schema, 
     get_auto_mode_prompt, 
@@ -15,6 +16,8 @@ from services.ai_prompts_service import (
     export_powerbi_template_json
 )
 from services.powerbi_generator_service import create_powerbi_template_pbix
+from services.query_planner_service import answer_question
+from utils.cache_utils import bump_dataset_version
 import pandas as pd
 import json
 
@@ -357,27 +360,56 @@ def analyze_auto():
             'error': f'Auto analytics failed: {str(e)}'
         }), 500
 
+@upload_bp.route('/api/analyze-auto/stream', methods=['POST'])
+def analyze_auto_stream():
+    """Generate auto analytics progressively (newline-delimited JSON stream)
+    
+    Large datasets first stream KPIs/charts from a stratified sample with
+    confidence intervals, then the exact results once the full scan completes.
+    """
+    if 'upload_data' not in session or 'final_filepath' not in session['upload_data']:
+        return jsonify({'success': False, 'error': 'No data in session'}), 400
+    
+    final_filepath = session['upload_data']['final_filepath']
+    
+    def generate():
+        try:
+            df_final = pd.read_pickle(final_filepath)
+            for payload in progressive_analytics(df_final):
+                yield current_app.json.dumps(payload) + '\n'
+        except Exception as e:
+            yield current_app.json.dumps({
+                'success': False,
+                'final': True,
+                'error': f'Auto analytics failed: {str(e)}'
+            }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # ============================================================================
 # AJAX API: Prompt Mode Analytics
 # ============================================================================
 
 @upload_bp.route('/api/analyze-prompt', methods=['POST'])
 def analyze_prompt():
-    """Process natural language query (placeholder for LLM integration)"""
+    """Answer a natural language query with the offline query planner"""
     if 'upload_data' not in session or 'final_filepath' not in session['upload_data']:
         return jsonify({'success': False, 'error': 'No data in session'}), 400
     
     try:
         data = request.get_json()
         query = data.get('query', '')
+        if not query.strip():
+            return jsonify({'success': False, 'error': 'Query is required'}), 400
         
-        # TODO: Integrate with LLM service (Gemini/OpenAI)
-        # For now, return a placeholder response
+        df = pd.read_pickle(session['upload_data']['final_filepath'])
+        result = answer_question(query, df)
         
         return jsonify({
             'success': True,
-            'message': 'Prompt mode is in development. LLM integration coming soon!',
-            'query': query
+            'message': result['answer'],
+            'query': query,
+            **result
         }), 200
     
     except Exception as e:
@@ -437,6 +469,7 @@ def save_to_database():
             params=(len(df_final), len(df_final.columns), dataset_id),
             fetch=False
         )
+        bump_dataset_version(dataset_id)
         
         # Get dashboard data from request (if provided)
         dashboard_data = request.get_json() if request.is_json else {}
@@ -11,6 +11,7 @@ from services.file_service import clean_dataframe, save_uploaded_file
 from services.data_cleaning_service import read_file
 from services.export_service import export_to_csv, export_to_excel, get_download_filename, save_to_local_folder
 from services.auto_analytics_service import generate_summary_stats, create_auto_charts, generate_insights_text
+from services.query_planner_service import answer_question
 
 workflow_bp = Blueprint('workflow', __name__)
 
@@ -263,20 +264,23 @@ def prompt_mode():
 
 @workflow_bp.route('/api/query', methods=['POST'])
 def process_query():
-    """Process natural language query (placeholder for LLM integration)"""
+    """Answer a natural language query with the offline query planner"""
     if 'workflow_data' not in session or 'final_data' not in session['workflow_data']:
         return jsonify({'success': False, 'error': 'No data in session'}), 400
     
     try:
         query = request.json.get('query', '')
+        if not query.strip():
+            return jsonify({'success': False, 'error': 'Query is required'}), 400
         
-        # TODO: Integrate with LLM service (Gemini/OpenAI)
-        # For now, return a placeholder response
+        df_final = pd.read_json(session['workflow_data']['final_data'], orient='split')
+        result = answer_question(query, df_final)
         
         return jsonify({
             'success': True,
-            'message': 'Prompt mode is in development. LLM integration coming soon!',
-            'query': query
+            'message': result['answer'],
+            'query': query,
+            **result
         })
     
     except Exception as e:
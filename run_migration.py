@@ -1,12 +1,14 @@
 """
 Run database migrations to create dashboards table
+Usage: python run_migration.py [migrations/<file>.sql]
 """
 import mysql.connector
 import os
+import sys
 from config import Config
 
-# Read the migration SQL file
-migration_file = 'migrations/create_dashboards_table.sql'
+# Read the migration SQL file (defaults to the dashboards migration)
+migration_file = sys.argv[1] if len(sys.argv) > 1 else 'migrations/create_dashboards_table.sql'
 
 with open(migration_file, 'r') as f:
     sql_content = f.read()
@@ -33,7 +35,7 @@ try:
                 cursor.execute(statement)
                 print(f"✅ Executed: {statement[:50]}...")
             except mysql.connector.Error as err:
-                if 'Duplicate column name' in str(err) or 'already exists' in str(err):
+                if 'Duplicate column name' in str(err) or 'Duplicate key name' in str(err) or 'already exists' in str(err):
                     print(f"⚠️  Skipped (already exists): {statement[:50]}...")
                 else:
                     print(f"❌ Error: {err}")
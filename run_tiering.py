@@ -0,0 +1,31 @@
+"""
+Move datasets that have not been opened recently out of MySQL into columnar files
+Usage: python run_tiering.py [--days N] [--limit N] [--dry-run]
+
+Intended for a nightly cron job. Tiered datasets are restored automatically
+the next time they are queried.
+"""
+import argparse
+from config import Config
+from services.tiering_service import find_cold_datasets, run_tiering
+
+parser = argparse.ArgumentParser(description='Tier cold datasets out of MySQL')
+parser.add_argument('--days', type=int, default=Config.TIER_COLD_AFTER_DAYS,
+                    help='days without access before a dataset is tiered')
+parser.add_argument('--limit', type=int, default=Config.TIER_BATCH_LIMIT,
+                    help='maximum datasets to tier in this run')
+parser.add_argument('--dry-run', action='store_true', help='only list the datasets that would move')
+args = parser.parse_args()
+
+if args.dry_run:
+    candidates = find_cold_datasets(args.days, args.limit)
+    print(f"📦 {len(candidates)} datasets not accessed for {args.days} days:")
+    for dataset in candidates:
+        print(f"   - #{dataset['id']} {dataset['name']} ({dataset['table_name']})")
+else:
+    results = run_tiering(args.days, args.limit)
+    for result in results:
+        icon = '✅' if result['success'] else '❌'
+        print(f"{icon} Dataset #{result['dataset_id']}: {result['message']}")
+    moved = sum(1 for result in results if result['success'])
+    print(f"\n✅ Tiered {moved} of {len(results)} datasets")
@@ -6,6 +6,7 @@ Designed to prevent hallucinations and ensure Power BI compatibility
 import json
 from typing import Dict, List, Any
 import pandas as pd
+from utils.sketch_utils import estimate_distinct, heavy_hitters
 
 
 def get_master_system_prompt() -> str:
@@ -50,7 +51,7 @@ def get_dataset_schema(df: pd.DataFrame) -> Dict[str, Any]:
         col_info = {
             "name": col,
             "type": str(df[col].dtype),
-            "unique_values": int(df[col].nunique()),
+            "unique_values": estimate_distinct(df[col]),
             "null_count": int(df[col].isnull().sum()),
             "sample_values": df[col].dropna().head(3).tolist() if len(df[col].dropna()) > 0 else []
         }
@@ -60,6 +61,8 @@ def get_dataset_schema(df: pd.DataFrame) -> Dict[str, Any]:
             col_info["min"] = float(df[col].min()) if pd.notna(df[col].min()) else None
             col_info["max"] = float(df[col].max()) if pd.notna(df[col].max()) else None
             col_info["mean"] = float(df[col].mean()) if pd.notna(df[col].mean()) else None
+        else:
+            col_info["top_values"] = [value for value, _ in heavy_hitters(df[col], n=5)]
         
         schema["columns"].append(col_info)
     
@@ -0,0 +1,363 @@
+"""
+Append Service
+Delta ingest of a new file into an existing dataset table
+
+The new rows are cleaned like a normal upload and checked against the stored
+schema. Columns are widened if needed (larger integers, more decimals, new
+ENUM values, longer text). The rows are then loaded into a delta table
+created LIKE the live table. Rows already present, matched on the natural
+key or on every column, are removed in SQL, and the remainder is inserted
+into the live table in one statement. Counts, statistics, the profile and
+the rollup cube are updated from the new rows only.
+"""
+import re
+import numpy as np
+import pandas as pd
+from config import Config
+from services.db_service import (
+    get_dataset_by_id, execute_query, set_dataset_dimensions, named_lock, scratch_table_name
+)
+from services.data_cleaning_service import read_file, insert_dataframe_to_mysql, load_dataset_frame
+from services.file_service import (
+    clean_dataframe, detect_data_type, integer_type, decimal_type, enum_literal, enum_members,
+    collation_key, INTEGER_TYPES
+)
+from services.metadata_service import set_dataset_metadata
+from services.profile_service import PROFILE_KEY, get_dataset_profile, merge_profile, save_dataset_profile
+from services.rollup_service import append_to_rollup, materialize_rollup
+from services.incremental_stats_service import (
+    apply_batch_to_stats, load_stats_state, initialize_stats_state,
+    stats_from_state, charts_from_state, refresh_dataset_dashboards
+)
+from services.tiering_service import ensure_dataset_hot
+from services.dataset_backend import get_dataset_backend
+from utils.cache_utils import bump_dataset_version
+from utils.sketch_utils import HyperLogLog
+
+APPEND_MODES = ('append', 'upsert')
+
+# Marks each delta row with its position in the batch
+BATCH_ROW_COLUMN = '_batch_row'
+
+ENUM_VALUE_RE = re.compile(r"'((?:[^'\\]|''|\\.)*)'")
+
+# Column types MySQL compares with the case/accent-insensitive table collation
+TEXT_SQL_TYPES = ('char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext', 'enum', 'set')
+
+
+def delta_table_name(table_name):
+    return scratch_table_name(table_name, 'dlt')
+
+
+# ============================================================================
+# Schema compatibility
+# ============================================================================
+
+def _enum_values(live_type):
+    return [value.replace("''", "'").replace('\\\\', '\\') for value in ENUM_VALUE_RE.findall(live_type)]
+
+
+def _integer_bounds(live_type):
+    name, unsigned = live_type.split('(')[0].split()[0].upper(), 'unsigned' in live_type
+    for type_name, signed_min, signed_max, unsigned_max in INTEGER_TYPES:
+        if type_name == name:
+            return (0, unsigned_max) if unsigned else (signed_min, signed_max)
+    return None
+
+
+def _text_type(max_length):
+    return f'VARCHAR({max_length})' if max_length <= 255 else 'TEXT'
+
+
+def _plan_column_change(col, live_type, series):
+    """
+    New column type needed to hold the batch values, None if the live type fits
+
+    Raises:
+        ValueError if the batch values cannot be stored in this column
+    """
+    values = series.dropna()
+    if values.empty:
+        return None
+
+    # ENUM values keep their case; everything else is matched lowercase
+    enum_type, live_type = live_type, live_type.lower()
+    batch_type = detect_data_type(series).upper()
+    numeric_batch = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+    bounds = _integer_bounds(live_type)
+    if bounds is not None:
+        if pd.api.types.is_bool_dtype(values):
+            return None
+        if not numeric_batch:
+            raise ValueError(f"Column '{col}' is numeric but the new file has text values")
+        numbers = values.to_numpy(dtype=np.float64)
+        if np.all(numbers == np.round(numbers)):
+            low, high = int(numbers.min()), int(numbers.max())
+            if bounds[0] <= low and high <= bounds[1]:
+                return None
+            return integer_type(min(low, bounds[0]), max(high, bounds[1]))
+        # Fractions arriving in an integer column: widen to a DECIMAL that also holds the old range
+        decimal = decimal_type(numbers)
+        if decimal == 'DOUBLE':
+            return 'DOUBLE'
+        precision, scale = map(int, re.findall(r'\d+', decimal))
+        integer_digits = max(precision - scale, len(str(max(abs(bounds[0]), bounds[1]))))
+        return f'DECIMAL({integer_digits + scale},{scale})' if integer_digits + scale <= 65 else 'DOUBLE'
+
+    if live_type.startswith('decimal'):
+        if not numeric_batch:
+            raise ValueError(f"Column '{col}' is numeric but the new file has text values")
+        precision, scale = map(int, re.findall(r'\d+', live_type))
+        decimal = decimal_type(values.to_numpy(dtype=np.float64))
+        if decimal == 'DOUBLE':
+            return 'DOUBLE'
+        batch_precision, batch_scale = map(int, re.findall(r'\d+', decimal))
+        new_scale = max(scale, batch_scale)
+        new_digits = max(precision - scale, batch_precision - batch_scale)
+        if (new_digits, new_scale) == (precision - scale, scale):
+            return None
+        return f'DECIMAL({new_digits + new_scale},{new_scale})' if new_digits + new_scale <= 65 else 'DOUBLE'
+
+    if live_type in ('double', 'float'):
+        if not numeric_batch:
+            raise ValueError(f"Column '{col}' is numeric but the new file has text values")
+        return None
+
+    if live_type == 'date':
+        if batch_type == 'DATE':
+            return None
+        if batch_type == 'DATETIME':
+            return 'DATETIME'
+        raise ValueError(f"Column '{col}' holds dates but the new file has other values")
+
+    if live_type == 'datetime':
+        if batch_type in ('DATE', 'DATETIME'):
+            return None
+        raise ValueError(f"Column '{col}' holds dates but the new file has other values")
+
+    text = values.astype(str)
+    max_length = int(text.str.len().max())
+
+    if live_type.startswith('enum'):
+        existing = _enum_values(enum_type)
+        new_values = sorted(set(text.unique()) - set(existing), key=collation_key)
+        if not new_values:
+            return None
+        combined = existing + new_values
+        longest = max(len(value) for value in combined)
+        # New values go last so existing rows keep their ENUM codes; that is
+        # only valid while the list stays in collation order (see enum_members)
+        if (len(combined) <= Config.SCHEMA_ENUM_MAX_VALUES and longest <= 255
+                and enum_members(combined) == combined):
+            return f"ENUM({', '.join(enum_literal(value) for value in combined)})"
+        return _text_type(longest)
+
+    if live_type.startswith('varchar'):
+        limit = int(re.findall(r'\d+', live_type)[0])
+        return None if max_length <= limit else _text_type(max_length)
+
+    # TEXT and anything else that stores strings as-is
+    return None
+
+
+def live_column_types(table_name):
+    described = execute_query(f"DESCRIBE `{table_name}`", fetch=True) or []
+    return {row['Field']: str(row['Type']) for row in described}
+
+
+def plan_schema_changes(table_name, df_batch):
+    """{column: new type} for live columns that must be widened to take df_batch"""
+    live_types = live_column_types(table_name)
+
+    changes = {}
+    for col in df_batch.columns:
+        new_type = _plan_column_change(col, live_types.get(col, 'text'), df_batch[col])
+        if new_type:
+            changes[col] = new_type
+    return changes
+
+
+def apply_schema_changes(table_name, changes):
+    if not changes:
+        return True
+    modifications = ', '.join(f"MODIFY COLUMN `{col}` {new_type}" for col, new_type in changes.items())
+    return execute_query(f"ALTER TABLE `{table_name}` {modifications}") is not None
+
+
+# ============================================================================
+# Delta ingest
+# ============================================================================
+
+def _rebuild_derived_data(dataset_id, table_name, columns):
+    """Recompute stats, profile and rollup from the stored table (after in-place updates)"""
+    df = load_dataset_frame(table_name, columns)
+    if df is None:
+        return None
+    state = initialize_stats_state(dataset_id, df)
+    refresh_dataset_dashboards(dataset_id, stats_from_state(state), charts_from_state(state), state)
+    save_dataset_profile(dataset_id, df, table_name)
+    materialize_rollup(df, table_name, dataset_id)
+    return len(df)
+
+
+def append_to_dataset(dataset_id, filepath, mode='append', key_columns=None):
+    """
+    Add the rows of a new file to an existing dataset
+
+    Args:
+        dataset_id: dataset to extend
+        filepath: uploaded file with the same columns as the dataset
+        mode: 'append' skips rows that already exist, 'upsert' overwrites
+            rows whose key_columns match and inserts the rest
+        key_columns: natural key columns; rows are matched on every column
+            when omitted (append mode only)
+
+    Returns:
+        (success: bool, message: str, result: dict)
+    """
+    if mode not in APPEND_MODES:
+        return False, f"Unknown mode '{mode}' (use append or upsert)", None
+    key_columns = list(key_columns or [])
+    if mode == 'upsert' and not key_columns:
+        return False, "Upsert needs key columns to match existing rows", None
+
+    if get_dataset_backend().name != 'mysql':
+        return False, "Appending is only supported for datasets stored in MySQL", None
+
+    # One append per dataset at a time, across workers: schema changes, the
+    # duplicate check and the profile/row counts all read what the last append wrote
+    try:
+        with named_lock(f'append:{dataset_id}'):
+            return _append_file(dataset_id, filepath, mode, key_columns)
+    except RuntimeError as e:
+        return False, str(e), None
+
+
+def _append_file(dataset_id, filepath, mode, key_columns):
+    """append_to_dataset body, run under the dataset's append lock"""
+    dataset = ensure_dataset_hot(get_dataset_by_id(dataset_id))
+    if not dataset or not dataset.get('table_name'):
+        return False, "Dataset not found or not processed", None
+    profile = get_dataset_profile(dataset_id)
+    if not profile:
+        return False, "Dataset has no stored profile - upload it again before appending", None
+
+    table_name = dataset['table_name']
+    columns = [col['name'] for col in profile['columns']]
+
+    df, error = read_file(filepath)
+    if error:
+        return False, error, None
+    df_batch = clean_dataframe(df)
+
+    missing = [col for col in columns if col not in df_batch.columns]
+    unexpected = [col for col in df_batch.columns if col not in columns]
+    if missing or unexpected:
+        details = []
+        if missing:
+            details.append(f"missing columns: {', '.join(missing)}")
+        if unexpected:
+            details.append(f"unexpected columns: {', '.join(unexpected)}")
+        return False, "File does not match the dataset schema (" + '; '.join(details) + ")", None
+    unknown_keys = [col for col in key_columns if col not in columns]
+    if unknown_keys:
+        return False, f"Unknown key columns: {', '.join(unknown_keys)}", None
+
+    df_batch = df_batch[columns].drop_duplicates(subset=key_columns or None, keep='last').reset_index(drop=True)
+
+    try:
+        changes = plan_schema_changes(table_name, df_batch)
+    except ValueError as e:
+        return False, str(e), None
+    if not apply_schema_changes(table_name, changes):
+        return False, "Failed to widen the dataset table for the new rows", None
+
+    # Load the batch next to the live table so duplicates are found in SQL with the stored types
+    delta_table = delta_table_name(table_name)
+    execute_query(f"CREATE TABLE `{delta_table}` LIKE `{table_name}`")
+    execute_query(f"ALTER TABLE `{delta_table}` ADD COLUMN `{BATCH_ROW_COLUMN}` INT UNSIGNED NOT NULL")
+
+    try:
+        frame = df_batch.copy()
+        frame[BATCH_ROW_COLUMN] = np.arange(len(frame))
+        loaded = insert_dataframe_to_mysql(frame, delta_table, bulk_load=True)
+        if loaded != len(frame):
+            return False, f"Failed to load new rows ({loaded} of {len(frame)} loaded)", None
+
+        # Text is matched byte for byte: the table collation would treat 'Sales'/'sales' as one row
+        text_columns = {
+            col for col, sql_type in live_column_types(table_name).items()
+            if sql_type.split('(')[0].lower() in TEXT_SQL_TYPES
+        }
+        match_columns = key_columns or columns
+        join = ' AND '.join(
+            f"CAST(l.`{col}` AS BINARY) <=> CAST(d.`{col}` AS BINARY)" if col in text_columns
+            else f"l.`{col}` <=> d.`{col}`"
+            for col in match_columns
+        )
+        column_list = ', '.join(f"`{col}`" for col in columns)
+
+        matched = execute_query(
+            f"SELECT COUNT(DISTINCT d.`{BATCH_ROW_COLUMN}`) AS total FROM `{delta_table}` d JOIN `{table_name}` l ON {join}",
+            fetch=True
+        )
+        matched = matched[0]['total'] if matched else 0
+
+        updated = 0
+        if mode == 'upsert' and matched:
+            assignments = ', '.join(f"l.`{col}` = d.`{col}`" for col in columns if col not in key_columns)
+            if assignments:
+                execute_query(f"UPDATE `{table_name}` l JOIN `{delta_table}` d ON {join} SET {assignments}")
+                updated = matched
+
+        execute_query(f"DELETE d FROM `{delta_table}` d JOIN `{table_name}` l ON {join}")
+        new_rows = execute_query(
+            f"SELECT `{BATCH_ROW_COLUMN}` FROM `{delta_table}` ORDER BY `{BATCH_ROW_COLUMN}`",
+            fetch=True
+        ) or []
+        new_positions = [row[BATCH_ROW_COLUMN] for row in new_rows]
+
+        if new_positions:
+            inserted = execute_query(
+                f"INSERT INTO `{table_name}` ({column_list}) "
+                f"SELECT {column_list} FROM `{delta_table}` ORDER BY `{BATCH_ROW_COLUMN}`"
+            )
+            if inserted is None:
+                return False, "Failed to insert the new rows", None
+    finally:
+        execute_query(f"DROP TABLE IF EXISTS `{delta_table}`")
+
+    df_new = df_batch.iloc[new_positions]
+    total_rows = profile['row_count'] + len(df_new)
+
+    stats_updated = False
+    if not updated and len(df_new):
+        stats_updated, _, _ = apply_batch_to_stats(dataset_id, df_new)
+
+    if updated or (len(df_new) and not stats_updated):
+        # Overwritten rows cannot be subtracted from the stored sketches
+        total_rows = _rebuild_derived_data(dataset_id, table_name, columns) or total_rows
+    elif len(df_new):
+        state = load_stats_state(dataset_id)
+        distinct = {}
+        if state:
+            distinct = {
+                col: HyperLogLog.from_dict(col_state['distinct']).estimate()
+                for col, col_state in state['columns'].items() if col_state.get('distinct')
+            }
+        set_dataset_metadata(dataset_id, PROFILE_KEY, merge_profile(profile, df_new, distinct))
+        append_to_rollup(dataset_id, df_new)
+
+    set_dataset_dimensions(dataset_id, total_rows, len(columns))
+    bump_dataset_version(dataset_id)
+
+    result = {
+        'rows_received': int(len(df_batch)),
+        'rows_inserted': int(len(df_new)),
+        'rows_updated': int(updated),
+        'rows_skipped': int(len(df_batch) - len(df_new) - updated),
+        'total_rows': int(total_rows),
+        'schema_changes': changes
+    }
+    return True, f"Added {result['rows_inserted']} rows ({result['rows_updated']} updated, {result['rows_skipped']} already present)", result
@@ -5,6 +5,15 @@ Generates automatic KPIs, statistics, and visualizations
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any
+from config import Config
+from utils.stats_utils import grouped_box_stats
+from utils.downsample_utils import lttb_indices, grid_density_sample
+from utils.sketch_utils import nunique_below, estimate_distinct
+
+# Keywords used to recognise the department, salary and date columns
+DEPARTMENT_KEYWORDS = ['department', 'dept', 'division', 'team']
+SALARY_KEYWORDS = ['salary', 'wage', 'pay', 'income', 'compensation']
+DATE_KEYWORDS = ['date', 'join', 'hire', 'start', 'created', 'time']
 
 def detect_column_types(df):
     """
@@ -23,8 +32,8 @@ def detect_column_types(df):
         elif pd.api.types.is_numeric_dtype(df[col]):
             numeric_cols.append(col)
         else:
-            # Categorical if less than 20 unique values
-            if df[col].nunique() < 20:
+            # Categorical if less than 20 unique values (stops counting at 20)
+            if nunique_below(df[col], 20):
                 categorical_cols.append(col)
     
     return {
@@ -54,9 +63,9 @@ def generate_summary_stats(df):
     col_types = detect_column_types(df)
     
     # Find common column names
-    department_col = find_column_by_keywords(df, ['department', 'dept', 'division', 'team'])
-    salary_col = find_column_by_keywords(df, ['salary', 'wage', 'pay', 'income', 'compensation'])
-    date_col = find_column_by_keywords(df, ['date', 'join', 'hire', 'start', 'created', 'time'])
+    department_col = find_column_by_keywords(df, DEPARTMENT_KEYWORDS)
+    salary_col = find_column_by_keywords(df, SALARY_KEYWORDS)
+    date_col = find_column_by_keywords(df, DATE_KEYWORDS)
     
     # Basic stats
     stats = {
@@ -129,7 +138,7 @@ def generate_summary_stats(df):
     stats['missing_percentage'] = round((stats['missing_values'] / (len(df) * len(df.columns)) * 100), 2) if len(df) > 0 else 0
     
     # Additional KPIs
-    stats['total_unique_values'] = int(df.nunique().sum())
+    stats['total_unique_values'] = int(sum(estimate_distinct(df[col]) for col in df.columns))
     stats['data_completeness'] = round(100 - stats['missing_percentage'], 2)
     
     # Calculate median salary if available
@@ -183,7 +192,7 @@ def generate_summary_stats(df):
     for col in col_types['categorical']:
         value_counts = df[col].value_counts().to_dict()
         categorical_stats[col] = {
-            'unique_values': df[col].nunique(),
+            'unique_values': len(value_counts),
             'top_values': dict(list(value_counts.items())[:5])
         }
     
@@ -191,66 +200,361 @@ def generate_summary_stats(df):
     
     return stats
 
-def create_auto_charts(df):
+def downsample_series(series, budget):
     """
-    Create automatic chart configurations based on data
-    Generates specific charts: Employee Count by Dept, Avg Salary by Dept, Employees Over Time, Box Plot, Pie Chart
+    Reduce an ordered Series (e.g. monthly trend) to at most `budget` points
+    using Largest-Triangle-Three-Buckets so peaks and dips are preserved
     
     Returns:
-        list of chart configurations for Chart.js
+        (labels: list of str, values: np.ndarray)
     """
-    col_types = detect_column_types(df)
-    charts = []
+    if len(series) > budget:
+        series = series.iloc[lttb_indices(np.arange(len(series)), series.to_numpy(dtype=float), budget)]
+    return [str(x) for x in series.index.tolist()], series.values
+
+def scale_values(values, scale, decimals=None):
+    """
+    Extrapolate sample counts/sums to the full population
+    
+    Counts (decimals=None) are rounded to whole numbers; sums keep `decimals` places.
+    """
+    values = np.asarray(values, dtype=float) * scale
+    if decimals is None:
+        return np.rint(values).astype(np.int64).tolist()
+    return np.round(values, decimals).tolist()
+
+def resolve_chart_columns(df, col_types=None):
+    """
+    Pick the category, measure and date columns the auto charts slice by
+    
+    Returns:
+        (dept_col, sal_col, dt_col) - any may be None
+    """
+    col_types = col_types or detect_column_types(df)
     
     # Find common column names
-    department_col = find_column_by_keywords(df, ['department', 'dept', 'division', 'team'])
-    salary_col = find_column_by_keywords(df, ['salary', 'wage', 'pay', 'income', 'compensation'])
-    date_col = find_column_by_keywords(df, ['date', 'join', 'hire', 'start', 'created', 'time'])
+    department_col = find_column_by_keywords(df, DEPARTMENT_KEYWORDS)
+    salary_col = find_column_by_keywords(df, SALARY_KEYWORDS)
+    date_col = find_column_by_keywords(df, DATE_KEYWORDS)
     
     # Use detected columns or fallback to first available
     dept_col = department_col if department_col else (col_types['categorical'][0] if col_types['categorical'] else None)
     sal_col = salary_col if salary_col else (col_types['numeric'][0] if col_types['numeric'] else None)
     dt_col = date_col if date_col else (col_types['date'][0] if col_types['date'] else None)
     
-    # Chart 1: Employee Count by Department (Bar Chart) - MUST HAVE
-    if dept_col:
-        value_counts = df[dept_col].value_counts().head(15)
-        chart_title = f'Employee Count by {dept_col.replace("_", " ").title()}'
-        
-        charts.append({
-            'type': 'bar',
-            'title': chart_title,
-            'data': {
-                'labels': [str(x) for x in value_counts.index.tolist()],
-                'datasets': [{
-                    'label': 'Count',
-                    'data': value_counts.values.tolist(),
-                    'backgroundColor': 'rgba(99, 102, 241, 0.6)',
+    return dept_col, sal_col, dt_col
+
+# ============================================================================
+# Chart builders - each takes pre-aggregated data and returns a Chart.js config
+# ============================================================================
+
+def build_count_chart(value_counts, dept_col, scale=1.0):
+    """Chart 1: Employee Count by Department (top 15 by count)"""
+    value_counts = value_counts.head(15)
+    return {
+        'type': 'bar',
+        'title': f'Employee Count by {dept_col.replace("_", " ").title()}',
+        'data': {
+            'labels': [str(x) for x in value_counts.index.tolist()],
+            'datasets': [{
+                'label': 'Count',
+                'data': scale_values(value_counts.values, scale),
+                'backgroundColor': 'rgba(99, 102, 241, 0.6)',
+                'borderColor': 'rgba(99, 102, 241, 1)',
+                'borderWidth': 2
+            }]
+        }
+    }
+
+def build_average_chart(group_means, dept_col, sal_col):
+    """Chart 2: Average Salary by Department (first 15 groups in key order)"""
+    grouped = group_means.head(15)
+    return {
+        'type': 'bar',
+        'title': f'Average {sal_col.replace("_", " ").title()} by {dept_col.replace("_", " ").title()}',
+        'data': {
+            'labels': [str(x) for x in grouped.index.tolist()],
+            'datasets': [{
+                'label': f'Average {sal_col.replace("_", " ").title()}',
+                'data': np.round(grouped.to_numpy(dtype=float), 2).tolist(),
+                'backgroundColor': 'rgba(16, 185, 129, 0.6)',
+                'borderColor': 'rgba(16, 185, 129, 1)',
+                'borderWidth': 2
+            }]
+        }
+    }
+
+def build_trend_chart(monthly_counts, point_budget, scale=1.0):
+    """Chart 3: Employees Over Time (monthly counts, downsampled)"""
+    trend_labels, trend_values = downsample_series(monthly_counts, point_budget)
+    return {
+        'type': 'line',
+        'title': f'Employees Over Time',
+        'data': {
+            'labels': trend_labels,
+            'datasets': [{
+                'label': 'Employee Count',
+                'data': scale_values(trend_values, scale),
+                'borderColor': 'rgba(239, 68, 68, 1)',
+                'backgroundColor': 'rgba(239, 68, 68, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.4,
+                'fill': True
+            }]
+        }
+    }
+
+def build_box_chart(box_stats, dept_col, sal_col):
+    """Chart 4: Salary Distribution by Department from grouped_box_stats output"""
+    dept_names = box_stats.index.tolist()
+    if not dept_names:
+        return None
+    
+    return {
+        'type': 'bar',
+        'title': f'{sal_col.replace("_", " ").title()} Distribution by {dept_col.replace("_", " ").title()} (Box Plot Style)',
+        'data': {
+            'labels': [str(x) for x in dept_names],
+            'datasets': [
+                {
+                    'label': 'Min',
+                    'data': box_stats['min'].tolist(),
+                    'backgroundColor': 'rgba(156, 163, 175, 0.6)',
+                    'borderColor': 'rgba(156, 163, 175, 1)',
+                    'borderWidth': 1
+                },
+                {
+                    'label': 'Q1',
+                    'data': box_stats['q1'].tolist(),
+                    'backgroundColor': 'rgba(251, 146, 60, 0.6)',
+                    'borderColor': 'rgba(251, 146, 60, 1)',
+                    'borderWidth': 2
+                },
+                {
+                    'label': 'Median',
+                    'data': box_stats['median'].tolist(),
+                    'backgroundColor': 'rgba(239, 68, 68, 0.8)',
+                    'borderColor': 'rgba(239, 68, 68, 1)',
+                    'borderWidth': 2
+                },
+                {
+                    'label': 'Q3',
+                    'data': box_stats['q3'].tolist(),
+                    'backgroundColor': 'rgba(251, 146, 60, 0.6)',
+                    'borderColor': 'rgba(251, 146, 60, 1)',
+                    'borderWidth': 2
+                },
+                {
+                    'label': 'Max',
+                    'data': box_stats['max'].tolist(),
+                    'backgroundColor': 'rgba(156, 163, 175, 0.6)',
+                    'borderColor': 'rgba(156, 163, 175, 1)',
+                    'borderWidth': 1
+                }
+            ]
+        }
+    }
+
+def build_share_chart(value_counts, dept_col, scale=1.0):
+    """Chart 5: Department Share doughnut - only when there are <= 6 departments"""
+    if len(value_counts) > 6:
+        return None
+    
+    colors = [
+        'rgba(99, 102, 241, 0.8)',
+        'rgba(16, 185, 129, 0.8)',
+        'rgba(239, 68, 68, 0.8)',
+        'rgba(251, 146, 60, 0.8)',
+        'rgba(167, 139, 250, 0.8)',
+        'rgba(59, 130, 246, 0.8)'
+    ]
+    
+    return {
+        'type': 'doughnut',
+        'title': f'{dept_col.replace("_", " ").title()} Share (%)',
+        'data': {
+            'labels': [str(x) for x in value_counts.index.tolist()],
+            'datasets': [{
+                'label': 'Count',
+                'data': scale_values(value_counts.values, scale),
+                'backgroundColor': colors[:len(value_counts)],
+                'borderWidth': 3,
+                'borderColor': '#ffffff'
+            }]
+        }
+    }
+
+def build_top_chart(value_counts, dept_col, scale=1.0):
+    """Chart 6: Horizontal Bar - Top 10 Departments by Count"""
+    top_depts = value_counts.head(10).sort_values()
+    return {
+        'type': 'bar',
+        'title': f'Top 10 {dept_col.replace("_", " ").title()} by Count',
+        'data': {
+            'labels': [str(x) for x in top_depts.index.tolist()],
+            'datasets': [{
+                'label': 'Count',
+                'data': scale_values(top_depts.values, scale),
+                'backgroundColor': 'rgba(139, 92, 246, 0.6)',
+                'borderColor': 'rgba(139, 92, 246, 1)',
+                'borderWidth': 2
+            }]
+        },
+        'options': {
+            'indexAxis': 'y'  # Horizontal bar chart
+        }
+    }
+
+def build_cumulative_chart(monthly_sums, sal_col, point_budget, scale=1.0):
+    """Chart 8: Area Chart - Cumulative Trend of the measure by month"""
+    cumulative_labels, cumulative_values = downsample_series(monthly_sums.cumsum(), point_budget)
+    return {
+        'type': 'line',
+        'title': f'Cumulative {sal_col.replace("_", " ").title()} Over Time',
+        'data': {
+            'labels': cumulative_labels,
+            'datasets': [{
+                'label': 'Cumulative Total',
+                'data': scale_values(cumulative_values, scale, decimals=2),
+                'borderColor': 'rgba(16, 185, 129, 1)',
+                'backgroundColor': 'rgba(16, 185, 129, 0.2)',
+                'borderWidth': 2,
+                'tension': 0.4,
+                'fill': True
+            }]
+        }
+    }
+
+def build_stacked_chart(group_sums, dept_col, num_col1, num_col2, scale=1.0):
+    """Chart 9: Stacked Bar - two numeric totals by category (first 10 groups)"""
+    grouped = group_sums.head(10)
+    return {
+        'type': 'bar',
+        'title': f'{num_col1.replace("_", " ").title()} & {num_col2.replace("_", " ").title()} by {dept_col.replace("_", " ").title()}',
+        'data': {
+            'labels': [str(x) for x in grouped.index.tolist()],
+            'datasets': [
+                {
+                    'label': num_col1.replace("_", " ").title(),
+                    'data': scale_values(grouped[num_col1].values, scale, decimals=2),
+                    'backgroundColor': 'rgba(99, 102, 241, 0.7)',
                     'borderColor': 'rgba(99, 102, 241, 1)',
                     'borderWidth': 2
-                }]
+                },
+                {
+                    'label': num_col2.replace("_", " ").title(),
+                    'data': scale_values(grouped[num_col2].values, scale, decimals=2),
+                    'backgroundColor': 'rgba(251, 146, 60, 0.7)',
+                    'borderColor': 'rgba(251, 146, 60, 1)',
+                    'borderWidth': 2
+                }
+            ]
+        },
+        'options': {
+            'scales': {
+                'x': {'stacked': True},
+                'y': {'stacked': True}
             }
+        }
+    }
+
+def build_radar_chart(group_means, dept_col):
+    """Chart 10: Radar - numeric means for the top departments (rows) per column"""
+    colors = [
+        {'bg': 'rgba(99, 102, 241, 0.2)', 'border': 'rgba(99, 102, 241, 1)'},
+        {'bg': 'rgba(16, 185, 129, 0.2)', 'border': 'rgba(16, 185, 129, 1)'},
+        {'bg': 'rgba(239, 68, 68, 0.2)', 'border': 'rgba(239, 68, 68, 1)'}
+    ]
+    
+    radar_datasets = []
+    for idx, (dept, values) in enumerate(group_means.iterrows()):
+        radar_datasets.append({
+            'label': str(dept),
+            'data': values.fillna(0).astype(float).tolist(),
+            'backgroundColor': colors[idx % len(colors)]['bg'],
+            'borderColor': colors[idx % len(colors)]['border'],
+            'borderWidth': 2
         })
     
+    return {
+        'type': 'radar',
+        'title': f'Comparison: Top 3 {dept_col.replace("_", " ").title()}',
+        'data': {
+            'labels': [col.replace("_", " ").title() for col in group_means.columns],
+            'datasets': radar_datasets
+        }
+    }
+
+def build_scatter_chart(x_values, y_values, num_col1, num_col2, scatter_budget):
+    """Chart 7: Scatter - one density-grid centroid per occupied cell (None if no points)"""
+    # Bin the full column pair on a density grid - one centroid per occupied cell
+    xs, ys, _ = grid_density_sample(
+        np.asarray(x_values, dtype=float),
+        np.asarray(y_values, dtype=float),
+        scatter_budget
+    )
+    if len(xs) == 0:
+        return None
+    
+    scatter_data = [{'x': x, 'y': y} for x, y in zip(xs.tolist(), ys.tolist())]
+    return {
+        'type': 'scatter',
+        'title': f'{num_col1.replace("_", " ").title()} vs {num_col2.replace("_", " ").title()}',
+        'data': {
+            'datasets': [{
+                'label': 'Data Points',
+                'data': scatter_data,
+                'backgroundColor': 'rgba(59, 130, 246, 0.5)',
+                'borderColor': 'rgba(59, 130, 246, 1)',
+                'pointRadius': 4,
+                'pointHoverRadius': 6
+            }]
+        }
+    }
+
+def create_auto_charts(df, point_budget=None, scatter_budget=None, scale=1.0):
+    """
+    Create automatic chart configurations based on data
+    Generates specific charts: Employee Count by Dept, Avg Salary by Dept, Employees Over Time, Box Plot, Pie Chart
+    
+    Args:
+        df: DataFrame to chart
+        point_budget: max points per line series (defaults to Config.CHART_POINT_BUDGET)
+        scatter_budget: max points in the scatter chart (defaults to Config.SCATTER_POINT_BUDGET)
+        scale: extrapolation factor applied to counts and sums when df is a sample,
+            or a Series of per-row weights (e.g. N_h / n_h per stratum) aligned with df
+    
+    Returns:
+        list of chart configurations for Chart.js
+    """
+    point_budget = point_budget or Config.CHART_POINT_BUDGET
+    scatter_budget = scatter_budget or Config.SCATTER_POINT_BUDGET
+    col_types = detect_column_types(df)
+    charts = []
+    
+    # Per-row weights are applied while aggregating, so the builders get totals
+    weights = scale if isinstance(scale, pd.Series) else None
+    if weights is not None:
+        scale = 1.0
+    
+    def weigh(values):
+        return values if weights is None else values.mul(weights.loc[values.index], axis=0)
+    
+    dept_col, sal_col, dt_col = resolve_chart_columns(df, col_types)
+    value_counts = None
+    if dept_col:
+        if weights is None:
+            value_counts = df[dept_col].value_counts()
+        else:
+            value_counts = weights.groupby(df[dept_col]).sum().sort_values(ascending=False, kind='stable')
+    
+    # Chart 1: Employee Count by Department (Bar Chart) - MUST HAVE
+    if dept_col:
+        charts.append(build_count_chart(value_counts, dept_col, scale))
+    
     # Chart 2: Average Salary by Department (Bar Chart) - MUST HAVE
     if dept_col and sal_col:
-        grouped = df.groupby(dept_col)[sal_col].mean().head(15)
-        chart_title = f'Average {sal_col.replace("_", " ").title()} by {dept_col.replace("_", " ").title()}'
-        
-        charts.append({
-            'type': 'bar',
-            'title': chart_title,
-            'data': {
-                'labels': [str(x) for x in grouped.index.tolist()],
-                'datasets': [{
-                    'label': f'Average {sal_col.replace("_", " ").title()}',
-                    'data': [round(float(x), 2) for x in grouped.values.tolist()],
-                    'backgroundColor': 'rgba(16, 185, 129, 0.6)',
-                    'borderColor': 'rgba(16, 185, 129, 1)',
-                    'borderWidth': 2
-                }]
-            }
-        })
+        charts.append(build_average_chart(df.groupby(dept_col)[sal_col].mean(), dept_col, sal_col))
     
     # Chart 3: Employees Over Time (Line Chart) - MUST HAVE
     if dt_col and dept_col:
@@ -264,24 +568,11 @@ def create_auto_charts(df):
             if len(df_sorted) > 0:
                 # Group by month
                 df_sorted['period'] = df_sorted[dt_col].dt.to_period('M')
-                trend_data = df_sorted.groupby('period').size()
-                
-                charts.append({
-                    'type': 'line',
-                    'title': f'Employees Over Time',
-                    'data': {
-                        'labels': [str(x) for x in trend_data.index.tolist()],
-                        'datasets': [{
-                            'label': 'Employee Count',
-                            'data': trend_data.values.tolist(),
-                            'borderColor': 'rgba(239, 68, 68, 1)',
-                            'backgroundColor': 'rgba(239, 68, 68, 0.1)',
-                            'borderWidth': 2,
-                            'tension': 0.4,
-                            'fill': True
-                        }]
-                    }
-                })
+                if weights is None:
+                    trend_data = df_sorted.groupby('period').size()
+                else:
+                    trend_data = weights.loc[df_sorted.index].groupby(df_sorted['period']).sum()
+                charts.append(build_trend_chart(trend_data, point_budget, scale))
         except Exception as e:
             # If date parsing fails, skip this chart
             pass
@@ -289,78 +580,12 @@ def create_auto_charts(df):
     # Chart 4: Box Plot - Salary Distribution (MEDIUM LEVEL)
     if sal_col and dept_col:
         try:
-            # Create box plot data by grouping salary by department
             # Chart.js doesn't have native box plots, so we'll create a grouped bar showing quartiles
-            def calculate_stats(x):
-                try:
-                    return {
-                        'min': float(x.min()) if pd.notna(x.min()) else 0,
-                        'q1': float(x.quantile(0.25)) if pd.notna(x.quantile(0.25)) else 0,
-                        'median': float(x.median()) if pd.notna(x.median()) else 0,
-                        'q3': float(x.quantile(0.75)) if pd.notna(x.quantile(0.75)) else 0,
-                        'max': float(x.max()) if pd.notna(x.max()) else 0,
-                        'mean': float(x.mean()) if pd.notna(x.mean()) else 0
-                    }
-                except Exception:
-                    return {
-                        'min': 0, 'q1': 0, 'median': 0, 'q3': 0, 'max': 0, 'mean': 0
-                    }
-            
-            grouped_salary = df.groupby(dept_col)[sal_col].apply(calculate_stats).to_dict()
-            
-            # Create box plot visualization using grouped bars
-            dept_names = list(grouped_salary.keys())[:10]  # Limit to 10 departments
-            if dept_names:
-                min_vals = [grouped_salary[d].get('min', 0) for d in dept_names]
-                q1_vals = [grouped_salary[d].get('q1', 0) for d in dept_names]
-                median_vals = [grouped_salary[d].get('median', 0) for d in dept_names]
-                q3_vals = [grouped_salary[d].get('q3', 0) for d in dept_names]
-                max_vals = [grouped_salary[d].get('max', 0) for d in dept_names]
-                
-                charts.append({
-                    'type': 'bar',
-                    'title': f'{sal_col.replace("_", " ").title()} Distribution by {dept_col.replace("_", " ").title()} (Box Plot Style)',
-                    'data': {
-                        'labels': [str(x) for x in dept_names],
-                        'datasets': [
-                            {
-                                'label': 'Min',
-                                'data': min_vals,
-                                'backgroundColor': 'rgba(156, 163, 175, 0.6)',
-                                'borderColor': 'rgba(156, 163, 175, 1)',
-                                'borderWidth': 1
-                            },
-                            {
-                                'label': 'Q1',
-                                'data': q1_vals,
-                                'backgroundColor': 'rgba(251, 146, 60, 0.6)',
-                                'borderColor': 'rgba(251, 146, 60, 1)',
-                                'borderWidth': 2
-                            },
-                            {
-                                'label': 'Median',
-                                'data': median_vals,
-                                'backgroundColor': 'rgba(239, 68, 68, 0.8)',
-                                'borderColor': 'rgba(239, 68, 68, 1)',
-                                'borderWidth': 2
-                            },
-                            {
-                                'label': 'Q3',
-                                'data': q3_vals,
-                                'backgroundColor': 'rgba(251, 146, 60, 0.6)',
-                                'borderColor': 'rgba(251, 146, 60, 1)',
-                                'borderWidth': 2
-                            },
-                            {
-                                'label': 'Max',
-                                'data': max_vals,
-                                'backgroundColor': 'rgba(156, 163, 175, 0.6)',
-                                'borderColor': 'rgba(156, 163, 175, 1)',
-                                'borderWidth': 1
-                            }
-                        ]
-                    }
-                })
+            # Single sort by (department, salary) - only the 10 displayed departments are kept
+            box_stats = grouped_box_stats(df[dept_col], df[sal_col], max_groups=10)
+            box_chart = build_box_chart(box_stats, dept_col, sal_col)
+            if box_chart:
+                charts.append(box_chart)
         except Exception as e:
             # Skip box plot if there's an error
             pass
@@ -368,53 +593,14 @@ def create_auto_charts(df):
     # Chart 5: Pie / Donut Chart - Department Share (MEDIUM LEVEL)
     # Only show if departments <= 6
     if dept_col:
-        value_counts = df[dept_col].value_counts()
-        if len(value_counts) <= 6:
-            colors = [
-                'rgba(99, 102, 241, 0.8)',
-                'rgba(16, 185, 129, 0.8)',
-                'rgba(239, 68, 68, 0.8)',
-                'rgba(251, 146, 60, 0.8)',
-                'rgba(167, 139, 250, 0.8)',
-                'rgba(59, 130, 246, 0.8)'
-            ]
-            
-            charts.append({
-                'type': 'doughnut',
-                'title': f'{dept_col.replace("_", " ").title()} Share (%)',
-                'data': {
-                    'labels': [str(x) for x in value_counts.index.tolist()],
-                    'datasets': [{
-                        'label': 'Count',
-                        'data': value_counts.values.tolist(),
-                        'backgroundColor': colors[:len(value_counts)],
-                        'borderWidth': 3,
-                        'borderColor': '#ffffff'
-                    }]
-                }
-            })
+        share_chart = build_share_chart(value_counts, dept_col, scale)
+        if share_chart:
+            charts.append(share_chart)
     
     # Chart 6: Horizontal Bar - Top Departments by Count
     if dept_col:
         try:
-            top_depts = df[dept_col].value_counts().head(10).sort_values()
-            charts.append({
-                'type': 'bar',
-                'title': f'Top 10 {dept_col.replace("_", " ").title()} by Count',
-                'data': {
-                    'labels': [str(x) for x in top_depts.index.tolist()],
-                    'datasets': [{
-                        'label': 'Count',
-                        'data': top_depts.values.tolist(),
-                        'backgroundColor': 'rgba(139, 92, 246, 0.6)',
-                        'borderColor': 'rgba(139, 92, 246, 1)',
-                        'borderWidth': 2
-                    }]
-                },
-                'options': {
-                    'indexAxis': 'y'  # Horizontal bar chart
-                }
-            })
+            charts.append(build_top_chart(value_counts, dept_col, scale))
         except Exception:
             pass
     
@@ -424,34 +610,13 @@ def create_auto_charts(df):
             num_col1 = col_types['numeric'][0]
             num_col2 = col_types['numeric'][1]
             
-            # Sample data if too many points
-            sample_size = min(100, len(df))
-            df_sample = df.sample(n=sample_size, random_state=42) if len(df) > sample_size else df
-            
-            # Filter out NaN values
-            df_clean = df_sample[[num_col1, num_col2]].dropna()
-            
-            if len(df_clean) > 0:
-                scatter_data = [
-                    {'x': float(df_clean.iloc[i][num_col1]), 'y': float(df_clean.iloc[i][num_col2])}
-                    for i in range(min(100, len(df_clean)))
-                ]
-                
-                if scatter_data:
-                    charts.append({
-                        'type': 'scatter',
-                        'title': f'{num_col1.replace("_", " ").title()} vs {num_col2.replace("_", " ").title()}',
-                        'data': {
-                            'datasets': [{
-                                'label': 'Data Points',
-                                'data': scatter_data,
-                                'backgroundColor': 'rgba(59, 130, 246, 0.5)',
-                                'borderColor': 'rgba(59, 130, 246, 1)',
-                                'pointRadius': 4,
-                                'pointHoverRadius': 6
-                            }]
-                        }
-                    })
+            scatter_chart = build_scatter_chart(
+                pd.to_numeric(df[num_col1], errors='coerce').to_numpy(dtype=float, na_value=np.nan),
+                pd.to_numeric(df[num_col2], errors='coerce').to_numpy(dtype=float, na_value=np.nan),
+                num_col1, num_col2, scatter_budget
+            )
+            if scatter_chart:
+                charts.append(scatter_chart)
         except Exception:
             pass
     
@@ -464,24 +629,8 @@ def create_auto_charts(df):
             df_sorted = df.sort_values(dt_col).dropna(subset=[dt_col, sal_col])
             if len(df_sorted) > 0:
                 df_sorted['period'] = df_sorted[dt_col].dt.to_period('M')
-                cumulative_data = df_sorted.groupby('period')[sal_col].sum().cumsum()
-                
-                charts.append({
-                    'type': 'line',
-                    'title': f'Cumulative {sal_col.replace("_", " ").title()} Over Time',
-                    'data': {
-                        'labels': [str(x) for x in cumulative_data.index.tolist()],
-                        'datasets': [{
-                            'label': 'Cumulative Total',
-                            'data': [round(float(x), 2) for x in cumulative_data.values.tolist()],
-                            'borderColor': 'rgba(16, 185, 129, 1)',
-                            'backgroundColor': 'rgba(16, 185, 129, 0.2)',
-                            'borderWidth': 2,
-                            'tension': 0.4,
-                            'fill': True
-                        }]
-                    }
-                })
+                monthly_sums = weigh(df_sorted[sal_col]).groupby(df_sorted['period']).sum()
+                charts.append(build_cumulative_chart(monthly_sums, sal_col, point_budget, scale))
         except Exception:
             pass
     
@@ -491,37 +640,8 @@ def create_auto_charts(df):
             num_col1 = col_types['numeric'][0]
             num_col2 = col_types['numeric'][1]
             
-            grouped = df.groupby(dept_col)[[num_col1, num_col2]].sum().head(10)
-            
-            charts.append({
-                'type': 'bar',
-                'title': f'{num_col1.replace("_", " ").title()} & {num_col2.replace("_", " ").title()} by {dept_col.replace("_", " ").title()}',
-                'data': {
-                    'labels': [str(x) for x in grouped.index.tolist()],
-                    'datasets': [
-                        {
-                            'label': num_col1.replace("_", " ").title(),
-                            'data': [round(float(x), 2) for x in grouped[num_col1].tolist()],
-                            'backgroundColor': 'rgba(99, 102, 241, 0.7)',
-                            'borderColor': 'rgba(99, 102, 241, 1)',
-                            'borderWidth': 2
-                        },
-                        {
-                            'label': num_col2.replace("_", " ").title(),
-                            'data': [round(float(x), 2) for x in grouped[num_col2].tolist()],
-                            'backgroundColor': 'rgba(251, 146, 60, 0.7)',
-                            'borderColor': 'rgba(251, 146, 60, 1)',
-                            'borderWidth': 2
-                        }
-                    ]
-                },
-                'options': {
-                    'scales': {
-                        'x': {'stacked': True},
-                        'y': {'stacked': True}
-                    }
-                }
-            })
+            grouped = weigh(df[[num_col1, num_col2]]).groupby(df[dept_col]).sum()
+            charts.append(build_stacked_chart(grouped, dept_col, num_col1, num_col2, scale))
         except Exception:
             pass
     
@@ -529,36 +649,11 @@ def create_auto_charts(df):
     if len(col_types['numeric']) >= 3 and dept_col:
         try:
             # Get top 3 departments
-            top_depts = df[dept_col].value_counts().head(3).index.tolist()
+            top_depts = value_counts.head(3).index
             num_cols = col_types['numeric'][:3]
             
-            radar_datasets = []
-            colors = [
-                {'bg': 'rgba(99, 102, 241, 0.2)', 'border': 'rgba(99, 102, 241, 1)'},
-                {'bg': 'rgba(16, 185, 129, 0.2)', 'border': 'rgba(16, 185, 129, 1)'},
-                {'bg': 'rgba(239, 68, 68, 0.2)', 'border': 'rgba(239, 68, 68, 1)'}
-            ]
-            
-            for idx, dept in enumerate(top_depts):
-                dept_data = df[df[dept_col] == dept]
-                values = [float(dept_data[col].mean()) if len(dept_data) > 0 else 0 for col in num_cols]
-                
-                radar_datasets.append({
-                    'label': str(dept),
-                    'data': values,
-                    'backgroundColor': colors[idx % len(colors)]['bg'],
-                    'borderColor': colors[idx % len(colors)]['border'],
-                    'borderWidth': 2
-                })
-            
-            charts.append({
-                'type': 'radar',
-                'title': f'Comparison: Top 3 {dept_col.replace("_", " ").title()}',
-                'data': {
-                    'labels': [col.replace("_", " ").title() for col in num_cols],
-                    'datasets': radar_datasets
-                }
-            })
+            group_means = df[df[dept_col].isin(top_depts)].groupby(dept_col)[num_cols].mean().reindex(top_depts)
+            charts.append(build_radar_chart(group_means, dept_col))
         except Exception:
             pass
     
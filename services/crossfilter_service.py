@@ -0,0 +1,256 @@
+"""
+Crossfilter Service
+Re-aggregates every chart of a dashboard for a cross-filter selection
+
+The first interaction with a dataset builds an in-memory index: one packed
+bitmap per value of each categorical dimension and per month of the chart
+date column, plus the numeric columns as float arrays. Dimensions above
+CROSSFILTER_MAX_CARDINALITY are left out, except the chart category column,
+which keeps only its codes and is selected with a scan of them. A selection is then
+a few bitmap ORs/ANDs, and the charts are rebuilt with bincount over the
+dimension codes. As in crossfilter UIs, each chart ignores the selection on
+its own dimension so the clicked bar stays in context.
+"""
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from config import Config
+from services.db_service import get_dataset_by_id
+from services.profile_service import get_dataset_profile
+from services.grid_service import get_grid_columns
+from services.dataset_backend import get_dataset_backend
+from services.tiering_service import ensure_dataset_hot
+from services.dashboard_filter_service import merge_filtered_charts
+from services.auto_analytics_service import (
+    detect_column_types,
+    resolve_chart_columns,
+    build_count_chart,
+    build_average_chart,
+    build_trend_chart,
+    build_box_chart,
+    build_share_chart,
+    build_top_chart,
+    build_scatter_chart,
+    build_cumulative_chart,
+    build_stacked_chart,
+    build_radar_chart
+)
+from utils.bitmap_utils import BitmapIndex, intersect, bitmap_count, bitmap_to_mask
+from utils.stats_utils import grouped_box_stats
+from utils.chart_codec import decode_charts, encode_charts
+from utils.cache_utils import get_version
+
+# dataset_id -> (dataset version, index), least recently used first
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+def build_crossfilter_index(df):
+    """
+    Bitmap index over the chart dimensions of a dataset
+
+    Returns:
+        dict with size, dimensions {column: BitmapIndex}, measures
+        {column: float array}, chart_columns and numeric column order
+    """
+    col_types = detect_column_types(df)
+    dept_col, sal_col, dt_col = resolve_chart_columns(df, col_types)
+
+    dimensions = {}
+    for col in ([dept_col] if dept_col else []) + col_types['categorical']:
+        if col in dimensions or col == dt_col:
+            continue
+        if col == dept_col:
+            dimensions[col] = BitmapIndex(df[col], max_bitmaps=Config.CROSSFILTER_MAX_CARDINALITY)
+        elif df[col].nunique() <= Config.CROSSFILTER_MAX_CARDINALITY:
+            dimensions[col] = BitmapIndex(df[col])
+
+    # The date column is indexed by month (YYYY-MM), the trend charts' bucket
+    if dt_col:
+        months = pd.to_datetime(df[dt_col], errors='coerce').dt.strftime('%Y-%m')
+        if months.notna().any():
+            dimensions[dt_col] = BitmapIndex(months)
+        else:
+            dt_col = None
+
+    measures = {
+        col: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        for col in col_types['numeric']
+    }
+    return {
+        'size': len(df),
+        'dimensions': dimensions,
+        'measures': measures,
+        'chart_columns': {'department': dept_col, 'salary': sal_col, 'date': dt_col},
+        'numeric_columns': col_types['numeric']
+    }
+
+
+def get_crossfilter_index(dataset_id):
+    """Index for a dataset, built on first use and rebuilt when the dataset version changes"""
+    version = get_version('dataset', dataset_id)
+    with _indexes_lock:
+        cached = _indexes.get(dataset_id)
+        if cached and cached[0] == version:
+            _indexes.move_to_end(dataset_id)
+            return cached[1]
+
+    with _build_lock:
+        with _indexes_lock:
+            cached = _indexes.get(dataset_id)
+            if cached and cached[0] == version:
+                return cached[1]
+
+        dataset = ensure_dataset_hot(get_dataset_by_id(dataset_id))
+        if not dataset or not dataset.get('table_name'):
+            raise RuntimeError("Dataset not found or not processed")
+        columns = get_grid_columns(dataset['table_name'], get_dataset_profile(dataset_id))
+        df = get_dataset_backend().load(dataset['table_name'], columns)
+        if df is None:
+            raise RuntimeError("Failed to read the dataset rows")
+        index = build_crossfilter_index(df)
+
+        with _indexes_lock:
+            _indexes[dataset_id] = (version, index)
+            _indexes.move_to_end(dataset_id)
+            while len(_indexes) > Config.CROSSFILTER_CACHE_DATASETS:
+                _indexes.popitem(last=False)
+        return index
+
+
+def _selection_bitmaps(index, selection):
+    """{column: bitmap of selected rows}; raises ValueError on non-dimension columns"""
+    bitmaps = {}
+    for col, values in (selection or {}).items():
+        if col not in index['dimensions']:
+            raise ValueError(f"Cannot cross-filter on '{col}'")
+        if values is None or values == []:
+            continue
+        bitmaps[col] = index['dimensions'][col].select(values)
+    return bitmaps
+
+
+def _rows(index, bitmaps, exclude=None):
+    """Row mask for the selection, ignoring the selection on `exclude`"""
+    selected = [bitmap for col, bitmap in bitmaps.items() if col != exclude]
+    return bitmap_to_mask(intersect(selected, index['size']), index['size'])
+
+
+def _group_counts(dimension, mask):
+    counts = np.bincount(dimension.codes[mask & (dimension.codes >= 0)], minlength=len(dimension.labels))
+    return pd.Series(counts, index=dimension.labels)
+
+
+def _group_sums(dimension, mask, values):
+    """(sums, non-null counts) of values per dimension label"""
+    keep = mask & (dimension.codes >= 0) & ~np.isnan(values)
+    codes = dimension.codes[keep]
+    sums = np.bincount(codes, weights=values[keep], minlength=len(dimension.labels))
+    counts = np.bincount(codes, minlength=len(dimension.labels))
+    return pd.Series(sums, index=dimension.labels), pd.Series(counts, index=dimension.labels)
+
+
+def crossfilter_charts(index, selection, point_budget=None, scatter_budget=None):
+    """
+    Auto charts for the rows matching a selection
+
+    Args:
+        index: from get_crossfilter_index
+        selection: {dimension column: value | [values]}; the date column takes YYYY-MM months
+
+    Returns:
+        (charts: list, matched_rows: int)
+    """
+    point_budget = point_budget or Config.CHART_POINT_BUDGET
+    scatter_budget = scatter_budget or Config.SCATTER_POINT_BUDGET
+    bitmaps = _selection_bitmaps(index, selection)
+    dept_col = index['chart_columns']['department']
+    sal_col = index['chart_columns']['salary']
+    dt_col = index['chart_columns']['date']
+    numeric = index['numeric_columns']
+    measures = index['measures']
+    charts = []
+
+    if dt_col:
+        month = index['dimensions'][dt_col]
+        month_rows = _rows(index, bitmaps, exclude=dt_col)
+
+    if dept_col:
+        dept = index['dimensions'][dept_col]
+        dept_rows = _rows(index, bitmaps, exclude=dept_col)
+        counts = _group_counts(dept, dept_rows)
+        value_counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+        charts.append(build_count_chart(value_counts, dept_col))
+
+        if sal_col:
+            sums, non_null = _group_sums(dept, dept_rows, measures[sal_col])
+            charts.append(build_average_chart((sums / non_null)[non_null > 0], dept_col, sal_col))
+
+    if dt_col and dept_col:
+        monthly = _group_counts(month, month_rows)
+        charts.append(build_trend_chart(monthly[monthly > 0], point_budget))
+
+    if sal_col and dept_col:
+        keep = dept_rows & (dept.codes >= 0)
+        labels = np.asarray(dept.labels, dtype=object)[dept.codes[keep]]
+        box_chart = build_box_chart(grouped_box_stats(labels, measures[sal_col][keep], max_groups=10), dept_col, sal_col)
+        if box_chart:
+            charts.append(box_chart)
+
+    if dept_col:
+        share_chart = build_share_chart(value_counts, dept_col)
+        if share_chart:
+            charts.append(share_chart)
+        charts.append(build_top_chart(value_counts, dept_col))
+
+    all_rows = _rows(index, bitmaps)
+    if len(numeric) >= 2:
+        scatter_chart = build_scatter_chart(
+            measures[numeric[0]][all_rows], measures[numeric[1]][all_rows], numeric[0], numeric[1], scatter_budget
+        )
+        if scatter_chart:
+            charts.append(scatter_chart)
+
+    if dt_col and sal_col:
+        monthly_sums, monthly_non_null = _group_sums(month, month_rows, measures[sal_col])
+        charts.append(build_cumulative_chart(monthly_sums[monthly_non_null > 0], sal_col, point_budget))
+
+    if dept_col and len(numeric) >= 2:
+        present = counts > 0
+        sums = pd.DataFrame({col: _group_sums(dept, dept_rows, measures[col])[0] for col in numeric[:2]})
+        charts.append(build_stacked_chart(sums[present], dept_col, numeric[0], numeric[1]))
+
+    if dept_col and len(numeric) >= 3:
+        top = value_counts.head(3).index
+        means = {}
+        for col in numeric[:3]:
+            sums, non_null = _group_sums(dept, dept_rows, measures[col])
+            means[col] = (sums / non_null.where(non_null > 0)).reindex(top)
+        charts.append(build_radar_chart(pd.DataFrame(means), dept_col))
+
+    return charts, bitmap_count(intersect(bitmaps.values(), index['size']))
+
+
+def crossfilter_dashboard(dashboard, selection):
+    """
+    Saved dashboard charts re-aggregated for a cross-filter selection
+
+    Returns:
+        dict with charts (chart codec envelope), matched_rows, total_rows,
+        dimensions (selectable columns) and elapsed_ms - raises ValueError
+        on invalid selections
+    """
+    started = time.perf_counter()
+    index = get_crossfilter_index(dashboard['dataset_id'])
+    charts, matched_rows = crossfilter_charts(index, selection)
+    saved_charts = decode_charts(dashboard.get('charts_data') or [])
+    return {
+        'charts': encode_charts(merge_filtered_charts(saved_charts, charts)),
+        'matched_rows': matched_rows,
+        'total_rows': index['size'],
+        'dimensions': list(index['dimensions']),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
@@ -0,0 +1,192 @@
+"""
+Dashboard Filter Service
+Recomputes a saved dashboard's charts and KPIs for a set of column filters
+
+Equality filters on rollup dimensions are answered from the rollup cube when
+every saved chart can be rebuilt from it. Any other filter is pushed down to
+the dataset backend - a WHERE clause served by the planned secondary indexes
+in MySQL, or a vectorized mask on the columnar store - and only the matching
+rows are charted. Results are cached per (dashboard, filter set) and keyed
+on the dashboard and dataset versions, so edits and appends invalidate them.
+"""
+import json
+import threading
+from collections import OrderedDict
+import pandas as pd
+from config import Config
+from services.db_service import get_dataset_by_id
+from services.profile_service import get_dataset_profile
+from services.rollup_service import get_rollup_spec, query_rollup, charts_from_rollup, MONTH_DIMENSION
+from services.auto_analytics_service import create_auto_charts, generate_summary_stats
+from services.grid_service import get_grid_columns
+from services.dataset_backend import get_dataset_backend
+from services.tiering_service import ensure_dataset_hot
+from utils.chart_codec import decode_charts, encode_charts
+from utils.cache_utils import get_version
+
+# (dashboard_id, dashboard version, dataset version, filters) -> result, least recently used first
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def normalize_filters(filters):
+    """Canonical JSON for a filter set (key order and value types do not matter)"""
+    return json.dumps(filters or {}, sort_keys=True, default=str, separators=(',', ':'))
+
+
+def _cache_key(dashboard, filters):
+    return (
+        dashboard['id'],
+        get_version('dashboard', dashboard['id']),
+        get_version('dataset', dashboard['dataset_id']),
+        normalize_filters(filters)
+    )
+
+
+def _rollup_filters(spec, filters):
+    """filters as query_rollup filters, or None when the cube cannot answer them"""
+    if not spec:
+        return None
+    converted = {}
+    for col, condition in filters.items():
+        if col not in spec['dimensions'] or col == MONTH_DIMENSION:
+            return None
+        if isinstance(condition, dict):
+            if len(condition) != 1 or next(iter(condition)) not in ('eq', 'in'):
+                return None
+            condition = next(iter(condition.values()))
+        converted[col] = condition
+    return converted
+
+
+def merge_filtered_charts(saved_charts, charts):
+    """
+    Swap recomputed charts into the saved list by title
+
+    Saved charts that no longer apply to the filtered rows are dropped;
+    charts that were never on the dashboard are not added.
+    """
+    recomputed = {chart['title']: chart for chart in charts}
+    return [recomputed[chart['title']] for chart in saved_charts if chart.get('title') in recomputed]
+
+
+def _rollup_kpis(spec, filters, saved_stats):
+    """(stats, recomputed keys) - KPIs the cube can answer, the rest as saved"""
+    stats = dict(saved_stats or {})
+    totals = query_rollup(spec, [], filters)
+    row_count = int(totals['row_count'].iloc[0]) if len(totals) else 0
+    recomputed = {'total_records': row_count, 'total_rows': row_count}
+
+    dept_col = spec['chart_columns']['department']
+    if dept_col and dept_col in spec['dimensions']:
+        by_dept = query_rollup(spec, [dept_col], filters)
+        recomputed['total_departments'] = int(((by_dept['row_count'] > 0) & by_dept[dept_col].notna()).sum())
+
+    sal_col = spec['chart_columns']['salary']
+    if sal_col and sal_col in spec['measures'] and len(totals):
+        names = spec['measure_columns'][sal_col]
+        for key, value in (('average_salary', totals[f"{sal_col}_mean"].iloc[0]),
+                           ('max_salary', totals[names['max']].iloc[0]),
+                           ('min_salary', totals[names['min']].iloc[0])):
+            recomputed[key] = round(float(value), 2) if pd.notna(value) else 0
+        if recomputed['max_salary'] > 0 and recomputed['min_salary'] > 0:
+            recomputed['salary_range'] = round(recomputed['max_salary'] - recomputed['min_salary'], 2)
+        else:
+            recomputed['salary_range'] = 0
+
+    stats.update(recomputed)
+    return stats, sorted(recomputed)
+
+
+def _filter_from_rollup(dashboard, spec, filters, saved_charts):
+    """Charts/KPIs from the cube, or None if a saved chart needs row-level data"""
+    charts = charts_from_rollup(spec, filters)
+    rebuilt = {chart['title'] for chart in charts}
+    dept_col = spec['chart_columns']['department']
+    share_title = f'{dept_col.replace("_", " ").title()} Share (%)' if dept_col else None
+    if any(chart.get('title') not in rebuilt and chart.get('title') != share_title for chart in saved_charts):
+        return None
+
+    stats, recomputed = _rollup_kpis(spec, filters, dashboard.get('stats_data'))
+    return {
+        'source': 'rollup',
+        'matched_rows': stats['total_records'],
+        'charts': merge_filtered_charts(saved_charts, charts),
+        'stats': stats,
+        'recomputed_kpis': recomputed
+    }
+
+
+def _filter_from_rows(dashboard, filters, saved_charts):
+    """Charts/KPIs from the matching rows, filtered by the dataset backend"""
+    dataset = ensure_dataset_hot(get_dataset_by_id(dashboard['dataset_id']))
+    if not dataset or not dataset.get('table_name'):
+        raise RuntimeError("Dataset not found or not processed")
+
+    columns = get_grid_columns(dataset['table_name'], get_dataset_profile(dataset['id']))
+    df = get_dataset_backend().load(dataset['table_name'], columns, filters)
+    if df is None:
+        raise RuntimeError("Failed to read the filtered rows")
+
+    stats = dict(dashboard.get('stats_data') or {})
+    if df.empty:
+        stats.update({'total_records': 0, 'total_rows': 0})
+        return {'source': 'table', 'matched_rows': 0, 'charts': [], 'stats': stats,
+                'recomputed_kpis': ['total_records', 'total_rows']}
+
+    recomputed = generate_summary_stats(df)
+    stats.update(recomputed)
+    return {
+        'source': 'table',
+        'matched_rows': len(df),
+        'charts': merge_filtered_charts(saved_charts, create_auto_charts(df)),
+        'stats': stats,
+        'recomputed_kpis': sorted(recomputed)
+    }
+
+
+def filter_dashboard(dashboard, filters):
+    """
+    Charts and KPIs of a saved dashboard restricted to rows matching filters
+
+    Args:
+        dashboard: dict from get_dashboard_content
+        filters: {column: value | [values] | {op: value}} - see grid_service.build_predicates
+
+    Returns:
+        dict with source ('saved', 'rollup' or 'table'), matched_rows, charts
+        (chart codec envelope), stats, recomputed_kpis and cached - raises
+        ValueError on invalid filters
+    """
+    key = _cache_key(dashboard, filters)
+    with _results_lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return dict(_results[key], cached=True)
+
+    saved_charts = decode_charts(dashboard.get('charts_data') or [])
+
+    if not filters:
+        result = {
+            'source': 'saved',
+            'matched_rows': (dashboard.get('stats_data') or {}).get('total_records'),
+            'charts': saved_charts,
+            'stats': dashboard.get('stats_data') or {},
+            'recomputed_kpis': []
+        }
+    else:
+        spec = get_rollup_spec(dashboard['dataset_id'])
+        rollup_filters = _rollup_filters(spec, filters)
+        result = None
+        if rollup_filters is not None:
+            result = _filter_from_rollup(dashboard, spec, rollup_filters, saved_charts)
+        if result is None:
+            result = _filter_from_rows(dashboard, filters, saved_charts)
+
+    result['charts'] = encode_charts(result['charts'])
+    with _results_lock:
+        _results[key] = result
+        _results.move_to_end(key)
+        while len(_results) > Config.DASHBOARD_FILTER_CACHE_SIZE:
+            _results.popitem(last=False)
+    return dict(result, cached=False)
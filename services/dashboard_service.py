@@ -3,7 +3,10 @@ Dashboard Service - Handles saving and retrieving AUTO MODE dashboards
 """
 import json
 from datetime import datetime
-from services.db_service import execute_query
+from services.db_service import execute_query, keyset_condition, make_keyset_cursor
+from services.view_tracking_service import record_dashboard_view, get_pending_views
+from utils.chart_codec import encode_charts
+from utils.cache_utils import bump_dashboard_version, bump_dataset_version
 
 
 def create_dashboard(name, dataset_id, user_id, project_id, stats_data, charts_data, insights_data, mode='auto'):
@@ -16,7 +19,7 @@ def create_dashboard(name, dataset_id, user_id, project_id, stats_data, charts_d
         user_id: Owner user ID
         project_id: Associated project ID
         stats_data: Dictionary of KPI stats
-        charts_data: List of chart configurations
+        charts_data: List of chart configurations (stored in the compact chart codec format)
         insights_data: List of insights
         mode: 'auto' or 'prompt'
     
@@ -26,7 +29,7 @@ def create_dashboard(name, dataset_id, user_id, project_id, stats_data, charts_d
     try:
         # Convert data to JSON strings
         stats_json = json.dumps(stats_data) if stats_data else None
-        charts_json = json.dumps(charts_data) if charts_data else None
+        charts_json = json.dumps(encode_charts(charts_data)) if charts_data else None
         insights_json = json.dumps(insights_data) if insights_data else None
         
         # Count charts and KPIs
@@ -62,6 +65,7 @@ def create_dashboard(name, dataset_id, user_id, project_id, stats_data, charts_d
                 WHERE id = %s
             """
             execute_query(update_query, (dashboard_id, dataset_id))
+            bump_dataset_version(dataset_id)
         
         return dashboard_id
         
@@ -97,77 +101,113 @@ def get_dashboard_by_id(dashboard_id):
         if dashboard.get('insights_data'):
             dashboard['insights_data'] = json.loads(dashboard['insights_data'])
         
-        # Update last viewed timestamp
-        update_query = "UPDATE dashboards SET last_viewed_at = NOW() WHERE id = %s"
-        execute_query(update_query, (dashboard_id,))
+        # Buffer the view; last_viewed_at/view_count are written in batches
+        pending = get_pending_views(dashboard_id)
+        if pending:
+            dashboard['view_count'] = (dashboard.get('view_count') or 0) + pending['views']
+        record_dashboard_view(dashboard_id)
         
         return dashboard
     
     return None
 
 
-def get_user_dashboards(user_id, project_id=None):
-    """Get all dashboards for a user, optionally filtered by project"""
-    if project_id:
-        query = """
-            SELECT 
-                d.*,
-                ds.name as dataset_name,
-                p.name as project_name
-            FROM dashboards d
-            LEFT JOIN datasets ds ON d.dataset_id = ds.id
-            LEFT JOIN projects p ON d.project_id = p.id
-            WHERE d.user_id = %s AND d.project_id = %s
-            ORDER BY d.created_at DESC
-        """
-        params = (user_id, project_id)
-    else:
-        query = """
-            SELECT 
-                d.*,
-                ds.name as dataset_name,
-                p.name as project_name
-            FROM dashboards d
-            LEFT JOIN datasets ds ON d.dataset_id = ds.id
-            LEFT JOIN projects p ON d.project_id = p.id
-            WHERE d.user_id = %s
-            ORDER BY d.created_at DESC
-        """
-        params = (user_id,)
-    
-    results = execute_query(query, params, fetch=True)
-    
-    if results:
-        dashboards = []
-        for row in results:
-            dashboard = dict(row)
-            # Don't parse JSON for list view (performance)
-            dashboards.append(dashboard)
-        return dashboards
+def get_dashboard_content(dashboard_id):
+    """
+    Owner, dataset and parsed stats/charts of a dashboard for API use
+
+    Unlike get_dashboard_by_id this does not join names or record a view.
+    """
+    result = execute_query(
+        "SELECT id, user_id, dataset_id, stats_data, charts_data FROM dashboards WHERE id = %s",
+        (dashboard_id,),
+        fetch=True
+    )
+    if not result:
+        return None
     
-    return []
+    dashboard = dict(result[0])
+    for key in ('stats_data', 'charts_data'):
+        if dashboard.get(key):
+            dashboard[key] = json.loads(dashboard[key])
+    return dashboard
 
 
-def get_project_dashboards(project_id):
-    """Get all dashboards for a specific project"""
-    query = """
-        SELECT 
-            d.*,
+# Card fields for gallery listings - the stats/charts/insights JSON blobs
+# are only loaded by get_dashboard_by_id
+GALLERY_COLUMNS = """
+    d.id, d.name, d.description, d.dataset_id, d.user_id, d.project_id, d.mode,
+    d.preview_image, d.total_charts, d.total_kpis, d.dataset_rows, d.dataset_columns,
+    d.status, d.created_at, d.updated_at, d.last_viewed_at
+"""
+
+
+def get_dashboard_gallery(user_id=None, project_id=None, limit=None, cursor=None):
+    """
+    List dashboard cards (no JSON blobs), newest first, keyset-paginated
+    
+    Args:
+        user_id: only this user's dashboards
+        project_id: only this project's dashboards
+        limit: page size (None returns every dashboard)
+        cursor: next_cursor from the previous page
+    
+    Returns:
+        (dashboards: list, next_cursor: str or None)
+    """
+    conditions = []
+    params = []
+    
+    if user_id:
+        conditions.append("d.user_id = %s")
+        params.append(user_id)
+    if project_id:
+        conditions.append("d.project_id = %s")
+        params.append(project_id)
+    if cursor:
+        condition, cursor_params = keyset_condition(cursor, alias='d')
+        conditions.append(condition)
+        params.extend(cursor_params)
+    
+    query = f"""
+        SELECT {GALLERY_COLUMNS},
             ds.name as dataset_name,
+            p.name as project_name,
             u.username
         FROM dashboards d
         LEFT JOIN datasets ds ON d.dataset_id = ds.id
+        LEFT JOIN projects p ON d.project_id = p.id
         LEFT JOIN users u ON d.user_id = u.id
-        WHERE d.project_id = %s
-        ORDER BY d.created_at DESC
     """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY d.created_at DESC, d.id DESC"
     
-    results = execute_query(query, (project_id,), fetch=True)
+    if limit:
+        limit = max(int(limit), 1)
+        query += " LIMIT %s"
+        params.append(limit + 1)
     
-    if results:
-        return [dict(row) for row in results]
+    dashboards = [dict(row) for row in (execute_query(query, tuple(params), fetch=True) or [])]
     
-    return []
+    next_cursor = None
+    if limit and len(dashboards) > limit:
+        dashboards = dashboards[:limit]
+        next_cursor = make_keyset_cursor(dashboards[-1])
+    
+    return dashboards, next_cursor
+
+
+def get_user_dashboards(user_id, project_id=None):
+    """Get all dashboards for a user, optionally filtered by project (card fields only)"""
+    dashboards, _ = get_dashboard_gallery(user_id=user_id, project_id=project_id)
+    return dashboards
+
+
+def get_project_dashboards(project_id):
+    """Get all dashboards for a specific project (card fields only)"""
+    dashboards, _ = get_dashboard_gallery(project_id=project_id)
+    return dashboards
 
 
 def delete_dashboard(dashboard_id, user_id):
@@ -182,7 +222,8 @@ def delete_dashboard(dashboard_id, user_id):
     # Delete dashboard
     delete_query = "DELETE FROM dashboards WHERE id = %s"
     execute_query(delete_query, (dashboard_id,))
-    
+    bump_dashboard_version(dashboard_id)
+
     return True
 
 
@@ -208,4 +249,5 @@ def update_dashboard_files(dashboard_id, preview_image=None, powerbi_file=None,
     query = f"UPDATE dashboards SET {', '.join(updates)} WHERE id = %s"
     
     execute_query(query, tuple(params))
+    bump_dashboard_version(dashboard_id)
     return True
@@ -4,13 +4,21 @@ Handles data cleaning, validation, and storage to MySQL
 """
 import pandas as pd
 import numpy as np
-from datetime import datetime
-from services.db_service import get_db_connection, execute_query
+from datetime import date, datetime
+from decimal import Decimal
+from services.db_service import (
+    get_db_connection, execute_query, set_dataset_dimensions
+)
 from services.file_service import (
     clean_dataframe, 
-    generate_table_name, 
-    create_table_schema
+    generate_table_name
 )
+from services.incremental_stats_service import initialize_stats_state
+from services.grid_service import build_predicates
+from services.rollup_service import materialize_rollup
+from services.profile_service import save_dataset_profile, get_dataset_profile, profile_to_statistics
+from services.index_service import schedule_index_build
+from utils.cache_utils import bump_dataset_version
 
 def process_and_store_dataset(filepath, dataset_name, dataset_id):
     """
@@ -33,25 +41,37 @@ def process_and_store_dataset(filepath, dataset_name, dataset_id):
         # 2. Clean the dataframe
         df_clean = clean_dataframe(df)
         
-        # 3. Generate table name
-        table_name = generate_table_name(dataset_name)
+        # 3. Generate table name (unique per dataset)
+        table_name = generate_table_name(dataset_name, dataset_id)
+        
+        # 4-6. Store the rows in the configured backend - MySQL loads a staging
+        # table and swaps it in atomically; the columnar backend writes a file
+        from services.dataset_backend import get_dataset_backend
+        backend = get_dataset_backend()
+        try:
+            rows_inserted = backend.store(table_name, df_clean)
+        except RuntimeError as e:
+            return False, str(e), None
+        
+        # 7. Update datasets table with table name and row/column counts for listings
+        update_sql = "UPDATE datasets SET table_name = %s, `rows` = %s, `columns` = %s WHERE id = %s"
+        execute_query(update_sql, params=(table_name, len(df_clean), len(df_clean.columns), dataset_id), fetch=False)
         
-        # 4. Create table schema
-        create_sql = create_table_schema(df_clean, table_name)
+        # 8. Persist mergeable stats state so appended rows can update KPIs incrementally
+        initialize_stats_state(dataset_id, df_clean)
         
-        # 5. Create the table in MySQL
-        success = execute_query(create_sql, fetch=False)
-        if success is None:
-            return False, "Failed to create table in database", None
+        # 9. Materialize the rollup cube used to answer chart/filter aggregations
+        materialize_rollup(df_clean, table_name, dataset_id)
         
-        # 6. Insert data into table
-        rows_inserted = insert_dataframe_to_mysql(df_clean, table_name)
+        # 10. Store the column profile and exact row count for the stats endpoints
+        profile = save_dataset_profile(dataset_id, df_clean, table_name)
+        bump_dataset_version(dataset_id)
         
-        # 7. Update datasets table with table name
-        update_sql = "UPDATE datasets SET table_name = %s WHERE id = %s"
-        execute_query(update_sql, params=(table_name, dataset_id), fetch=False)
+        # 11. Build secondary indexes chosen from the profile (background thread)
+        if backend.name == 'mysql':
+            schedule_index_build(dataset_id, table_name, profile)
         
-        # 8. Generate statistics
+        # 12. Generate statistics
         stats = {
             'rows': len(df_clean),
             'columns': len(df_clean.columns),
@@ -94,8 +114,13 @@ def read_file(filepath):
     except Exception as e:
         return None, f"Error reading file: {str(e)}"
 
-def insert_dataframe_to_mysql(df, table_name):
-    """Insert DataFrame rows into MySQL table - BI optimized"""
+def insert_dataframe_to_mysql(df, table_name, bulk_load=False):
+    """
+    Insert DataFrame rows into MySQL table - BI optimized
+    
+    bulk_load skips unique/foreign key checks for the session; only use it
+    for a freshly created staging table nobody else reads.
+    """
     try:
         connection = get_db_connection()
         if not connection:
@@ -103,6 +128,9 @@ def insert_dataframe_to_mysql(df, table_name):
         
         cursor = connection.cursor()
         
+        if bulk_load:
+            cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        
         # Prepare column names
         columns = ', '.join(df.columns)
         placeholders = ', '.join(['%s'] * len(df.columns))
@@ -153,6 +181,35 @@ def insert_dataframe_to_mysql(df, table_name):
         print(f"Error inserting data: {str(e)}")
         return 0
 
+def load_dataset_frame(table_name, columns, filters=None):
+    """
+    Read a stored dataset table back into a DataFrame shaped like clean_dataframe output
+
+    DECIMAL values become floats and DATE/DATETIME values ISO strings.
+    filters (see grid_service.build_predicates) on the loaded columns are
+    applied in MySQL so only matching rows are read.
+    """
+    select = ', '.join(f"`{col}`" for col in columns)
+    clauses, params = build_predicates(filters, columns)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = execute_query(f"SELECT {select} FROM `{table_name}`{where} ORDER BY id", tuple(params), fetch=True)
+    if rows is None:
+        return None
+    
+    df = pd.DataFrame(rows, columns=columns)
+    for col in df.columns:
+        sample = df[col].dropna()
+        if sample.empty:
+            continue
+        first = sample.iloc[0]
+        if isinstance(first, Decimal):
+            df[col] = df[col].astype(float)
+        elif isinstance(first, (date, datetime)):
+            df[col] = df[col].map(lambda value: value.isoformat() if value is not None else None)
+        elif pd.api.types.is_float_dtype(df[col]) and (sample == sample.round()).all():
+            df[col] = df[col].astype('Int64')
+    return df
+
 def get_dataset_preview(table_name, limit=10):
     """Get preview of dataset from MySQL"""
     try:
@@ -160,14 +217,29 @@ def get_dataset_preview(table_name, limit=10):
         result = execute_query(query, fetch=True)
         print(f"Preview query: {query}")
         print(f"Preview result count: {len(result) if result else 0}")
+        # DATE/DATETIME columns come back as date objects; keep the ISO strings clients expect
+        for row in result or []:
+            for key, value in row.items():
+                if isinstance(value, (date, datetime)) and key != 'uploaded_at':
+                    row[key] = value.isoformat()
         return result if result else []
     except Exception as e:
         print(f"Error getting preview from {table_name}: {str(e)}")
         return []
 
-def get_dataset_statistics(table_name):
-    """Get statistics about the dataset"""
+def get_dataset_statistics(table_name, dataset_id=None):
+    """
+    Get statistics about the dataset
+    
+    Served from the ingest-time profile when dataset_id is given and one
+    exists; otherwise counts and describes the table.
+    """
     try:
+        if dataset_id is not None:
+            profile = get_dataset_profile(dataset_id)
+            if profile:
+                return profile_to_statistics(profile)
+        
         # Get row count
         count_query = f"SELECT COUNT(*) as total FROM {table_name}"
         count_result = execute_query(count_query, fetch=True)
@@ -185,3 +257,21 @@ def get_dataset_statistics(table_name):
     except Exception as e:
         print(f"Error getting statistics: {str(e)}")
         return None
+
+def backfill_dataset_dimensions(datasets):
+    """
+    Fill row_count/column_count for datasets ingested before the counts were
+    denormalized, persisting them so later listings skip the data table
+    """
+    for dataset in datasets:
+        if dataset.get('row_count') is None and dataset.get('table_name'):
+            stats = get_dataset_statistics(dataset['table_name'], dataset['id'])
+            if stats:
+                dataset['row_count'] = stats.get('total_rows', 0)
+                dataset['column_count'] = stats.get('column_count', 0)
+                set_dataset_dimensions(dataset['id'], dataset['row_count'], dataset['column_count'])
+        if dataset.get('row_count') is None:
+            # Unprocessed datasets have no counts to show
+            dataset.pop('row_count', None)
+            dataset.pop('column_count', None)
+    return datasets
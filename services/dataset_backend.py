@@ -0,0 +1,276 @@
+"""
+Dataset Backend
+Where dataset row tables are stored and how they are queried
+
+MySQLBackend keeps every dataset in its own InnoDB table (the default).
+ColumnarBackend stores each dataset as a compressed columnar file and runs
+previews, filters, grid pages and aggregations in-process on numpy arrays,
+so dataset rows need no database server. Dataset records, metadata and
+rollups stay in MySQL either way. Chosen per deployment with
+Config.DATASET_BACKEND.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+import pandas as pd
+from config import Config
+from services.db_service import execute_query, staging_table_name, swap_in_table, table_exists
+from services.file_service import create_table_schema
+from services.data_cleaning_service import insert_dataframe_to_mysql, get_dataset_preview, load_dataset_frame
+from services.grid_service import build_predicates, filter_mask, get_grid_page, get_frame_page, frame_value, is_numeric_column
+from utils.columnar_utils import write_columnar, read_columnar
+
+# Aggregations accepted in measures: {column: [agg, ...]}
+AGGREGATES = {'sum': 'SUM', 'mean': 'AVG', 'min': 'MIN', 'max': 'MAX', 'count': 'COUNT'}
+
+BACKENDS = ('mysql', 'columnar')
+
+# information_schema DATA_TYPE values sum/mean/min/max accept
+NUMERIC_SQL_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint', 'decimal', 'float', 'double')
+
+
+def _aggregate_columns(columns, group_by, measures, numeric_columns):
+    """Validate an aggregation request; returns [(column, agg, output name), ...]"""
+    unknown = [col for col in list(group_by) + list(measures) if col not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    outputs = []
+    for col, aggs in measures.items():
+        for agg in ([aggs] if isinstance(aggs, str) else aggs):
+            if agg not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate '{agg}'")
+            if agg != 'count' and col not in numeric_columns:
+                raise ValueError(f"'{col}' is not numeric - only count is available")
+            outputs.append((col, agg, f"{col}_{agg}"))
+    return outputs
+
+
+class DatasetBackend(ABC):
+    """Storage and query operations on dataset row tables"""
+
+    name = None
+
+    @abstractmethod
+    def store(self, table_name, df):
+        """Replace table_name with df atomically; returns rows stored"""
+
+    @abstractmethod
+    def drop(self, table_name):
+        """Remove table_name (no-op if it does not exist)"""
+
+    @abstractmethod
+    def exists(self, table_name):
+        """True if table_name is stored"""
+
+    @abstractmethod
+    def preview(self, table_name, limit=10):
+        """First rows as a list of dicts (includes id and uploaded_at)"""
+
+    @abstractmethod
+    def load(self, table_name, columns, filters=None):
+        """Data columns as a DataFrame shaped like clean_dataframe output, optionally filtered"""
+
+    @abstractmethod
+    def page(self, table_name, columns, **options):
+        """One data grid page - see grid_service.get_grid_page"""
+
+    @abstractmethod
+    def aggregate(self, table_name, columns, group_by=None, measures=None, filters=None):
+        """
+        Grouped aggregation with optional filters
+
+        Args:
+            columns: valid data columns
+            group_by: columns to group on (none for a single total row)
+            measures: {column: [sum|mean|min|max|count, ...]}
+            filters: see grid_service.build_predicates
+
+        Returns:
+            DataFrame with the group_by columns, row_count and one
+            <column>_<agg> column per measure - raises ValueError on bad input
+        """
+
+
+class MySQLBackend(DatasetBackend):
+    """One InnoDB table per dataset, loaded through a staging table"""
+
+    name = 'mysql'
+
+    def store(self, table_name, df):
+        staging_table = staging_table_name(table_name)
+        if execute_query(create_table_schema(df, staging_table)) is None:
+            raise RuntimeError("Failed to create table in database")
+
+        rows_inserted = insert_dataframe_to_mysql(df, staging_table, bulk_load=True)
+        if rows_inserted != len(df) or not swap_in_table(staging_table, table_name):
+            execute_query(f"DROP TABLE IF EXISTS `{staging_table}`")
+            raise RuntimeError(f"Failed to load dataset table ({rows_inserted} of {len(df)} rows inserted)")
+        return rows_inserted
+
+    def drop(self, table_name):
+        execute_query(f"DROP TABLE IF EXISTS `{table_name}`")
+
+    def exists(self, table_name):
+        return table_exists(table_name)
+
+    def preview(self, table_name, limit=10):
+        return get_dataset_preview(table_name, limit=limit)
+
+    def load(self, table_name, columns, filters=None):
+        return load_dataset_frame(table_name, columns, filters)
+
+    def page(self, table_name, columns, **options):
+        return get_grid_page(table_name, columns, **options)
+
+    def _numeric_columns(self, table_name):
+        rows = execute_query(
+            """
+            SELECT COLUMN_NAME AS name FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND DATA_TYPE IN ({})
+            """.format(', '.join(['%s'] * len(NUMERIC_SQL_TYPES))),
+            (table_name,) + NUMERIC_SQL_TYPES,
+            fetch=True
+        ) or []
+        return {row['name'] for row in rows}
+
+    def aggregate(self, table_name, columns, group_by=None, measures=None, filters=None):
+        group_by = list(group_by or [])
+        measures = measures or {}
+        numeric = self._numeric_columns(table_name) if measures else set()
+        outputs = _aggregate_columns(columns, group_by, measures, numeric)
+
+        selects = [f"`{col}`" for col in group_by] + ["COUNT(*) AS row_count"]
+        selects += [f"{AGGREGATES[agg]}(`{col}`) AS `{name}`" for col, agg, name in outputs]
+        query = f"SELECT {', '.join(selects)} FROM `{table_name}`"
+
+        clauses, params = build_predicates(filters, columns)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        if group_by:
+            keys = ', '.join(f"`{col}`" for col in group_by)
+            query += f" GROUP BY {keys} ORDER BY {keys}"
+
+        rows = execute_query(query, tuple(params), fetch=True)
+        if rows is None:
+            raise RuntimeError("Aggregation query failed")
+        result = pd.DataFrame(rows, columns=group_by + ['row_count'] + [name for _, _, name in outputs])
+        for _, _, name in outputs:
+            result[name] = pd.to_numeric(result[name], errors='coerce')
+        return result
+
+
+class ColumnarBackend(DatasetBackend):
+    """One columnar file per dataset under Config.COLUMNAR_DATA_DIR, queried in memory"""
+
+    name = 'columnar'
+
+    def __init__(self, data_dir=None, cache_tables=None):
+        self.data_dir = data_dir or Config.COLUMNAR_DATA_DIR
+        self.cache_tables = cache_tables or Config.COLUMNAR_CACHE_TABLES
+        # path -> (mtime_ns, DataFrame), least recently used first
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, table_name):
+        for ext in ('parquet', 'npz'):
+            path = os.path.join(self.data_dir, f"{table_name}.{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _frame(self, table_name):
+        """Whole table (id, uploaded_at and data columns), cached while the file is unchanged"""
+        path = self._path(table_name)
+        if path is None:
+            raise RuntimeError(f"Table {table_name} does not exist")
+
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._frames.get(path)
+            if cached and cached[0] == mtime:
+                self._frames.move_to_end(path)
+                return cached[1]
+
+        df = read_columnar(path)
+        with self._lock:
+            self._frames[path] = (mtime, df)
+            self._frames.move_to_end(path)
+            while len(self._frames) > self.cache_tables:
+                self._frames.popitem(last=False)
+        return df
+
+    def store(self, table_name, df):
+        table = df.reset_index(drop=True)
+        table.insert(0, 'id', pd.RangeIndex(1, len(table) + 1))
+        table['uploaded_at'] = pd.Timestamp(datetime.now().replace(microsecond=0))
+
+        stored = write_columnar(table, os.path.join(self.data_dir, table_name))
+        # A previous version may have been written in the other format
+        for ext in ('parquet', 'npz'):
+            path = os.path.join(self.data_dir, f"{table_name}.{ext}")
+            if path != stored and os.path.exists(path):
+                os.remove(path)
+        return len(table)
+
+    def drop(self, table_name):
+        path = self._path(table_name)
+        if path:
+            os.remove(path)
+            with self._lock:
+                self._frames.pop(path, None)
+
+    def exists(self, table_name):
+        return self._path(table_name) is not None
+
+    def preview(self, table_name, limit=10):
+        if not self.exists(table_name):
+            return []
+        head = self._frame(table_name).head(limit)
+        return [{col: frame_value(value) for col, value in row.items()} for row in head.to_dict(orient='records')]
+
+    def load(self, table_name, columns, filters=None):
+        df = self._frame(table_name)
+        return df.loc[filter_mask(df, filters, columns), list(columns)].reset_index(drop=True)
+
+    def page(self, table_name, columns, **options):
+        return get_frame_page(self._frame(table_name), columns, **options)
+
+    def aggregate(self, table_name, columns, group_by=None, measures=None, filters=None):
+        group_by = list(group_by or [])
+        df = self._frame(table_name)
+        numeric = {col for col in columns if is_numeric_column(df[col])}
+        outputs = _aggregate_columns(columns, group_by, measures or {}, numeric)
+
+        df = df[filter_mask(df, filters, columns)]
+
+        named = {name: (col, agg) for col, agg, name in outputs}
+        if group_by:
+            grouped = df.groupby(group_by, dropna=False, sort=True)
+            result = grouped.size().rename('row_count').to_frame()
+            if named:
+                result = result.join(grouped.agg(**named))
+            # NULL groups first, as MySQL orders them
+            return result.reset_index().sort_values(group_by, na_position='first', kind='mergesort', ignore_index=True)
+
+        totals = {'row_count': len(df)}
+        for name, (col, agg) in named.items():
+            totals[name] = getattr(df[col], agg)() if len(df) or agg == 'count' else None
+        return pd.DataFrame([totals])
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_dataset_backend():
+    """The backend selected by Config.DATASET_BACKEND (one instance per process)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if Config.DATASET_BACKEND not in BACKENDS:
+                raise RuntimeError(f"Unknown DATASET_BACKEND '{Config.DATASET_BACKEND}'")
+            _backend = ColumnarBackend() if Config.DATASET_BACKEND == 'columnar' else MySQLBackend()
+        return _backend
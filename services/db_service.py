@@ -1,6 +1,9 @@
+import uuid
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
 from config import Config
+from utils.cache_utils import bump_dataset_version
 
 def get_db_connection():
     """Create and return a database connection"""
@@ -49,6 +52,34 @@ def execute_query(query, params=None, fetch=False):
         print(f"Database error: {e}")
         return None
 
+@contextmanager
+def named_lock(name, timeout=None):
+    """
+    Hold a MySQL GET_LOCK for the duration of a with-block
+    
+    The lock lives on its own connection, so it serializes every worker
+    process using the database, not just threads in this one.
+    Raises RuntimeError if it is not acquired within timeout seconds.
+    """
+    timeout = Config.NAMED_LOCK_TIMEOUT if timeout is None else timeout
+    connection = get_db_connection()
+    if not connection:
+        raise RuntimeError("Database connection failed")
+    
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError(f"Timed out waiting for lock '{name}'")
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+        connection.close()
+
 def get_all_datasets(user_id=None):
     """Get all datasets, optionally filtered by user"""
     query = "SELECT * FROM datasets"
@@ -61,6 +92,120 @@ def get_all_datasets(user_id=None):
     query += " ORDER BY created_at DESC"
     return execute_query(query, params, fetch=True)
 
+def make_keyset_cursor(row):
+    """Opaque cursor pointing just after `row` in (created_at DESC, id DESC) order"""
+    return f"{row['created_at']}|{row['id']}"
+
+def keyset_condition(cursor, alias=''):
+    """
+    WHERE fragment selecting rows after a keyset cursor
+    
+    Returns:
+        (sql: str, params: list) - raises ValueError for a malformed cursor
+    """
+    created_at, last_id = cursor.rsplit('|', 1)
+    prefix = f"{alias}." if alias else ''
+    sql = f"({prefix}created_at < %s OR ({prefix}created_at = %s AND {prefix}id < %s))"
+    return sql, [created_at, created_at, int(last_id)]
+
+def list_datasets_page(user_id=None, limit=None, cursor=None):
+    """
+    List datasets with their row/column counts in one query
+    
+    Counts come from the denormalized datasets.rows/columns written at ingest.
+    Pages are keyset-paginated on (created_at, id), newest first.
+    
+    Args:
+        user_id: only list this user's datasets
+        limit: page size (None returns every dataset)
+        cursor: next_cursor from the previous page
+    
+    Returns:
+        (datasets: list, next_cursor: str or None)
+    """
+    limit = max(int(limit), 1) if limit else None
+    query = "SELECT *, `rows` AS row_count, `columns` AS column_count FROM datasets"
+    conditions = []
+    params = []
+    
+    if user_id:
+        conditions.append("user_id = %s")
+        params.append(user_id)
+    
+    if cursor:
+        condition, cursor_params = keyset_condition(cursor)
+        conditions.append(condition)
+        params.extend(cursor_params)
+    
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    
+    query += " ORDER BY created_at DESC, id DESC"
+    if limit:
+        query += " LIMIT %s"
+        params.append(int(limit) + 1)
+    
+    datasets = execute_query(query, tuple(params), fetch=True) or []
+    
+    next_cursor = None
+    if limit and len(datasets) > limit:
+        datasets = datasets[:limit]
+        next_cursor = make_keyset_cursor(datasets[-1])
+    
+    return datasets, next_cursor
+
+def set_dataset_dimensions(dataset_id, rows, columns):
+    """Store the denormalized row/column counts used by dataset listings"""
+    query = "UPDATE datasets SET `rows` = %s, `columns` = %s WHERE id = %s"
+    result = execute_query(query, (rows, columns, dataset_id))
+    bump_dataset_version(dataset_id)
+    return result
+
+def scratch_table_name(table_name, suffix):
+    """Per-call name for a work table next to table_name, so concurrent loads never share one"""
+    return f"{table_name[:48]}__{suffix}_{uuid.uuid4().hex[:8]}"
+
+def staging_table_name(table_name):
+    """Name of the table a new version of table_name is loaded into before the swap"""
+    return scratch_table_name(table_name, 'stg')
+
+def table_exists(table_name):
+    query = """
+        SELECT COUNT(*) AS total FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """
+    result = execute_query(query, (table_name,), fetch=True)
+    return bool(result and result[0]['total'])
+
+def table_used_by_other_dataset(table_name, dataset_id):
+    """True if a dataset other than dataset_id points at table_name (legacy name-only tables)"""
+    query = "SELECT COUNT(*) AS total FROM datasets WHERE table_name = %s AND id != %s"
+    result = execute_query(query, (table_name, dataset_id), fetch=True)
+    return bool(result and result[0]['total'])
+
+def swap_in_table(staging_table, live_table):
+    """
+    Atomically replace live_table with a fully loaded staging_table
+    
+    RENAME TABLE moves both names in one statement, so readers see either
+    the old table or the new one, never a partially loaded table.
+    
+    Returns:
+        True if the staging table is now live
+    """
+    if not table_exists(live_table):
+        return execute_query(f"RENAME TABLE `{staging_table}` TO `{live_table}`") is not None
+    
+    retired_table = scratch_table_name(live_table, 'old')
+    swapped = execute_query(
+        f"RENAME TABLE `{live_table}` TO `{retired_table}`, `{staging_table}` TO `{live_table}`"
+    )
+    if swapped is None:
+        return False
+    
+    execute_query(f"DROP TABLE IF EXISTS `{retired_table}`")
+    return True
+
 def get_dataset_by_id(dataset_id):
     """Get a specific dataset by ID"""
     query = "SELECT * FROM datasets WHERE id = %s"
@@ -4,6 +4,7 @@ Handles file operations, data cleaning, and type detection
 """
 import os
 import re
+import unicodedata
 import pandas as pd
 import numpy as np
 from werkzeug.utils import secure_filename
@@ -58,50 +59,125 @@ def clean_column_name(col_name):
     
     return col_name[:64]  # MySQL column name limit
 
+# Integer column types, narrowest first: (type, signed min, signed max, unsigned max)
+INTEGER_TYPES = [
+    ('TINYINT', -2 ** 7, 2 ** 7 - 1, 2 ** 8 - 1),
+    ('SMALLINT', -2 ** 15, 2 ** 15 - 1, 2 ** 16 - 1),
+    ('MEDIUMINT', -2 ** 23, 2 ** 23 - 1, 2 ** 24 - 1),
+    ('INT', -2 ** 31, 2 ** 31 - 1, 2 ** 32 - 1),
+    ('BIGINT', -2 ** 63, 2 ** 63 - 1, 2 ** 64 - 1),
+]
+
+# Dates are ISO strings after clean_dataframe (Step 7)
+ISO_DATE_RE = r'^\d{4}-\d{2}-\d{2}$'
+ISO_DATETIME_RE = r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2})?$'
+
+def integer_type(min_val, max_val):
+    """Narrowest MySQL integer type holding [min_val, max_val] (UNSIGNED when non-negative)"""
+    for name, signed_min, signed_max, unsigned_max in INTEGER_TYPES:
+        if min_val >= 0 and max_val <= unsigned_max:
+            return f'{name} UNSIGNED'
+        if min_val >= signed_min and max_val <= signed_max:
+            return name
+    return 'DECIMAL(65,0)'
+
+def decimal_type(values):
+    """Exact DECIMAL(p,s) for float values, or DOUBLE if they need more than SCHEMA_MAX_DECIMAL_SCALE decimals"""
+    values = np.asarray(values, dtype=np.float64)
+    if not np.all(np.isfinite(values)):
+        return 'DOUBLE'
+    
+    for scale in range(Config.SCHEMA_MAX_DECIMAL_SCALE + 1):
+        # Exact: rounding to `scale` decimals must give back the very same doubles
+        if np.array_equal(np.round(values, scale), values):
+            integer_digits = len(str(int(np.abs(values).max())))
+            precision = max(integer_digits + scale, 1)
+            return f'DECIMAL({precision},{scale})' if precision <= 65 else 'DOUBLE'
+    return 'DOUBLE'
+
+# ENUM members are only chosen when their collation keys use these characters,
+# for which utf8mb4_unicode_ci and codepoint order agree (space < digits < letters)
+ENUM_SAFE_KEY_RE = re.compile(r'^[a-z0-9 ]*$')
+
+def collation_key(value):
+    """utf8mb4_unicode_ci comparison key: accents and case folded, trailing spaces ignored"""
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold().rstrip(' ')
+
+def enum_members(values):
+    """
+    ENUM members for text values, listed in collation order, or None
+    
+    MySQL sorts ENUM columns by member position, so the list must follow the
+    column collation for ORDER BY and the grid's keyset comparisons to agree.
+    None when two values are equal under the collation (MySQL rejects the
+    ENUM) or a value's order cannot be predicted safely.
+    """
+    keys = {value: collation_key(value) for value in values}
+    if len(set(keys.values())) != len(keys) or not all(ENUM_SAFE_KEY_RE.match(key) for key in keys.values()):
+        return None
+    return sorted(keys, key=keys.get)
+
+def enum_literal(value):
+    return "'" + value.replace('\\', '\\\\').replace("'", "''") + "'"
+
 def detect_data_type(series):
-    """Detect appropriate MySQL data type for a pandas Series - BI optimized"""
+    """
+    Choose the narrowest exact MySQL type for a pandas Series
+    
+    Integers get signed/unsigned widths from their full range, decimals a
+    precision/scale taken from the data, ISO date strings DATE/DATETIME,
+    repetitive short text ENUM and other text an exact-length VARCHAR.
+    """
     # Remove null values for analysis
     series_clean = series.dropna()
     
     if len(series_clean) == 0:
         return 'TEXT'
     
-    # Check for datetime64 types
+    # Check for datetime64 types (stored as dates by insert_dataframe_to_mysql)
     if pd.api.types.is_datetime64_any_dtype(series):
         return 'DATE'
     
+    if pd.api.types.is_bool_dtype(series_clean):
+        return 'BOOLEAN'
+    
     # Check for Int64 (pandas nullable integer)
     if pd.api.types.is_integer_dtype(series) or str(series.dtype) == 'Int64':
-        max_val = series_clean.max() if len(series_clean) > 0 else 0
-        if max_val < 128:
-            return 'TINYINT'
-        elif max_val < 32768:
-            return 'SMALLINT'
-        elif max_val < 2147483648:
-            return 'INT'
-        else:
-            return 'BIGINT'
+        return integer_type(int(series_clean.min()), int(series_clean.max()))
     
     elif pd.api.types.is_float_dtype(series_clean):
+        values = series_clean.to_numpy(dtype=np.float64)
         # Check if actually integers stored as floats
-        if series_clean.apply(lambda x: x.is_integer() if pd.notna(x) else True).all():
-            return 'INT'
-        return 'DECIMAL(10,2)'
-    
-    elif pd.api.types.is_bool_dtype(series_clean):
-        return 'BOOLEAN'
+        if np.all(np.isfinite(values)) and np.all(values == np.round(values)):
+            return integer_type(int(values.min()), int(values.max()))
+        return decimal_type(values)
     
     else:
-        # String type - determine appropriate VARCHAR length
-        max_length = series_clean.astype(str).str.len().max()
+        text = series_clean.astype(str)
+        
+        if text.str.match(ISO_DATE_RE).all() and pd.to_datetime(text, format='%Y-%m-%d', errors='coerce').notna().all():
+            return 'DATE'
+        if text.str.match(ISO_DATETIME_RE).all() and pd.to_datetime(text, errors='coerce').notna().all():
+            return 'DATETIME'
+        
+        # String type - exact VARCHAR length
+        max_length = text.str.len().max()
         # Ensure max_length is numeric (handle NaN, None cases)
         if pd.isna(max_length) or max_length is None:
             max_length = 50
         else:
-            max_length = int(max_length)
+            max_length = max(int(max_length), 1)
+        
+        # Low-cardinality text: ENUM stores 1-2 bytes per row instead of the string
+        distinct = text.unique()
+        if len(distinct) <= Config.SCHEMA_ENUM_MAX_VALUES and len(distinct) * 4 <= len(text) and max_length <= 255:
+            members = enum_members(distinct)
+            if members:
+                return f"ENUM({', '.join(enum_literal(value) for value in members)})"
         
         if max_length <= 255:
-            return f'VARCHAR({min(255, int(max_length * 1.5))})'
+            return f'VARCHAR({max_length})'
         else:
             return 'TEXT'
 
@@ -423,17 +499,28 @@ def clean_dataframe(df):
     
     return df_clean
 
-def generate_table_name(filename):
-    """Generate a valid MySQL table name from filename"""
+def generate_table_name(filename, dataset_id=None):
+    """
+    Generate a valid MySQL table name from filename
+    
+    The dataset id is part of the name so datasets uploaded under the same
+    name never share (and overwrite) each other's table.
+    """
     # Remove extension and clean
     base_name = os.path.splitext(filename)[0]
     table_name = clean_column_name(base_name)
     
     # Ensure it's not a reserved word by adding prefix
-    table_name = f"dataset_{table_name}"
+    table_name = f"dataset_{dataset_id}_{table_name}" if dataset_id is not None else f"dataset_{table_name}"
     
     return table_name[:64]  # MySQL table name limit
 
+def table_options():
+    """Extra CREATE TABLE options (compressed InnoDB pages when enabled)"""
+    if Config.TABLE_ROW_COMPRESSION:
+        return f" ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE={Config.TABLE_KEY_BLOCK_SIZE}"
+    return ''
+
 def create_table_schema(df, table_name):
     """Generate CREATE TABLE SQL statement from DataFrame"""
     columns = []
@@ -452,9 +539,9 @@ def create_table_schema(df, table_name):
     # Fix: Move join outside f-string to avoid backslash issue
     column_defs = ',\n        '.join(columns)
     sql = f"""
-    CREATE TABLE IF NOT EXISTS {table_name} (
+    CREATE TABLE {table_name} (
         {column_defs}
-    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci{table_options()};
     """
     
     return sql
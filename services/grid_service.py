@@ -0,0 +1,318 @@
+"""
+Grid Service
+Keyset-paginated, column-oriented pages over a stored dataset table
+
+Pages are ordered by (sort column, id) and continue from an opaque cursor
+holding the last row's sort value and id, so every page is an index range
+scan regardless of how deep the user has scrolled.
+"""
+import base64
+import json
+from decimal import Decimal
+from datetime import date, datetime
+import operator
+import numpy as np
+import pandas as pd
+from config import Config
+from services.db_service import execute_query
+
+# Predicate operators accepted in filters: {column: {op: value}}
+FILTER_OPERATORS = {
+    'eq': '=', 'ne': '<>', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>='
+}
+
+# Same operators applied to DataFrame columns (filter_mask)
+FRAME_OPERATORS = {
+    'eq': operator.eq, 'ne': operator.ne, 'lt': operator.lt,
+    'lte': operator.le, 'gt': operator.gt, 'gte': operator.ge
+}
+
+# Table columns added by create_table_schema
+SYSTEM_COLUMNS = ('id', 'uploaded_at')
+
+
+def get_grid_columns(table_name, profile=None):
+    """Data columns of a dataset table, from the profile or DESCRIBE for unprofiled datasets"""
+    if profile:
+        return [col['name'] for col in profile['columns']]
+    described = execute_query(f"DESCRIBE `{table_name}`", fetch=True) or []
+    return [row['Field'] for row in described if row['Field'] not in SYSTEM_COLUMNS]
+
+
+def _sql_value(value):
+    """JSON-safe form of a value read back from MySQL"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+def build_predicates(filters, allowed_columns):
+    """
+    WHERE fragments for grid/dashboard filters
+
+    Args:
+        filters: {column: value | [values] | {op: value, ...}}; ops are
+            FILTER_OPERATORS plus 'in', 'contains' and 'is_null' (bool)
+        allowed_columns: columns that may be filtered
+
+    Returns:
+        (clauses: list, params: list) - raises ValueError on unknown columns/operators
+    """
+    clauses, params = [], []
+    for col, condition in (filters or {}).items():
+        if col not in allowed_columns:
+            raise ValueError(f"Unknown filter column '{col}'")
+
+        if not isinstance(condition, dict):
+            condition = {'in': condition} if isinstance(condition, (list, tuple)) else {'eq': condition}
+
+        for op, value in condition.items():
+            if op in FILTER_OPERATORS:
+                clauses.append(f"`{col}` {FILTER_OPERATORS[op]} %s")
+                params.append(value)
+            elif op == 'in':
+                values = list(value) if isinstance(value, (list, tuple)) else [value]
+                if not values:
+                    clauses.append("FALSE")
+                    continue
+                clauses.append(f"`{col}` IN ({', '.join(['%s'] * len(values))})")
+                params.extend(values)
+            elif op == 'contains':
+                escaped = str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                clauses.append(f"`{col}` LIKE %s")
+                params.append(f"%{escaped}%")
+            elif op == 'is_null':
+                clauses.append(f"`{col}` IS {'' if value else 'NOT '}NULL")
+            else:
+                raise ValueError(f"Unknown filter operator '{op}'")
+
+    return clauses, params
+
+
+def is_numeric_column(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _comparable(series, value):
+    """(column, value) coerced to a common kind, as MySQL does when comparing"""
+    if is_numeric_column(series):
+        return series, pd.to_numeric(value, errors='coerce')
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, pd.Timestamp(value)
+    return series.astype(str), str(value)
+
+
+def filter_mask(df, filters, allowed_columns):
+    """
+    Boolean row mask for build_predicates filters, evaluated on a DataFrame
+
+    NULLs never match a comparison, as in SQL. Raises ValueError on unknown
+    columns/operators like build_predicates.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, condition in (filters or {}).items():
+        if col not in allowed_columns:
+            raise ValueError(f"Unknown filter column '{col}'")
+
+        if not isinstance(condition, dict):
+            condition = {'in': condition} if isinstance(condition, (list, tuple)) else {'eq': condition}
+
+        series = df[col]
+        present = series.notna().to_numpy()
+        for op, value in condition.items():
+            if op in FILTER_OPERATORS:
+                values, target = _comparable(series, value)
+                matched = FRAME_OPERATORS[op](values, target)
+            elif op == 'in':
+                targets = list(value) if isinstance(value, (list, tuple)) else [value]
+                if is_numeric_column(series):
+                    matched = series.isin(pd.to_numeric(pd.Series(targets, dtype=object), errors='coerce'))
+                else:
+                    matched = series.astype(str).isin([str(item) for item in targets])
+            elif op == 'contains':
+                matched = series.astype(str).str.contains(str(value), case=False, regex=False)
+            elif op == 'is_null':
+                mask &= ~present if value else present
+                continue
+            else:
+                raise ValueError(f"Unknown filter operator '{op}'")
+            mask &= pd.Series(matched).fillna(False).to_numpy(dtype=bool) & present
+    return mask
+
+
+def encode_grid_cursor(sort, order, value, row_id):
+    payload = json.dumps([sort, order, _sql_value(value), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_grid_cursor(cursor, sort, order):
+    """(value, id) from a cursor; raises ValueError if malformed or from another ordering"""
+    try:
+        cursor_sort, cursor_order, value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or cursor_order != order:
+        raise ValueError("Cursor does not match the requested sort order")
+    return value, int(row_id)
+
+
+def _keyset_predicate(sort, order, value, row_id):
+    """Rows strictly after (value, id); MySQL sorts NULLs first ascending, last descending"""
+    if sort == 'id':
+        return ("id > %s", [row_id]) if order == 'asc' else ("id < %s", [row_id])
+
+    col = f"`{sort}`"
+    if order == 'asc':
+        if value is None:
+            return f"(({col} IS NULL AND id > %s) OR {col} IS NOT NULL)", [row_id]
+        return f"({col} > %s OR ({col} = %s AND id > %s))", [value, value, row_id]
+
+    if value is None:
+        return f"({col} IS NULL AND id < %s)", [row_id]
+    return f"({col} < %s OR ({col} = %s AND id < %s) OR {col} IS NULL)", [value, value, row_id]
+
+
+def _page_arguments(columns, limit, sort, order, select):
+    """Validated (limit, order, selected columns) shared by the SQL and in-memory pagers"""
+    limit = min(max(int(limit or Config.GRID_PAGE_SIZE), 1), Config.GRID_MAX_PAGE_SIZE)
+    order = (order or 'asc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    if sort not in columns and sort != 'id':
+        raise ValueError(f"Unknown sort column '{sort}'")
+
+    selected = list(select) if select else list(columns)
+    unknown = [col for col in selected if col not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return limit, order, selected
+
+
+def get_grid_page(table_name, columns, limit=None, cursor=None, sort='id', order='asc', filters=None, select=None):
+    """
+    Fetch one page of a dataset table in column-oriented form
+
+    Args:
+        table_name: dataset table
+        columns: valid data columns (get_grid_columns)
+        limit: rows per page (capped at Config.GRID_MAX_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+        sort: column to order by ('id' for upload order)
+        order: 'asc' or 'desc'
+        filters: see build_predicates
+        select: subset of columns to return (default all)
+
+    Returns:
+        dict with columns, values (one list per column, 'id' first),
+        row_count and next_cursor - raises ValueError on invalid arguments
+    """
+    limit, order, selected = _page_arguments(columns, limit, sort, order, select)
+
+    clauses, params = build_predicates(filters, columns)
+    if cursor:
+        value, row_id = decode_grid_cursor(cursor, sort, order)
+        clause, cursor_params = _keyset_predicate(sort, order, value, row_id)
+        clauses.append(clause)
+        params.extend(cursor_params)
+
+    fetched = ['id'] + [col for col in selected if col != 'id']
+    if sort not in fetched:
+        fetched.append(sort)
+
+    direction = order.upper()
+    query = f"SELECT {', '.join(f'`{col}`' for col in fetched)} FROM `{table_name}`"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    if sort == 'id':
+        query += f" ORDER BY id {direction}"
+    else:
+        query += f" ORDER BY `{sort}` {direction}, id {direction}"
+    query += " LIMIT %s"
+    params.append(limit + 1)
+
+    rows = execute_query(query, tuple(params), fetch=True)
+    if rows is None:
+        raise RuntimeError("Grid query failed")
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_grid_cursor(sort, order, last[sort], last['id'])
+
+    output_columns = ['id'] + [col for col in selected if col != 'id']
+    return {
+        'columns': output_columns,
+        'values': [[_sql_value(row[col]) for row in rows] for col in output_columns],
+        'row_count': len(rows),
+        'next_cursor': next_cursor
+    }
+
+
+def frame_value(value):
+    """JSON-safe form of a value read from a DataFrame"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    return _sql_value(value)
+
+
+def _frame_keyset_mask(frame, sort, order, value, row_id):
+    """Rows strictly after (value, id) - same ordering as _keyset_predicate"""
+    ids = frame['id']
+    if sort == 'id':
+        return ids > row_id if order == 'asc' else ids < row_id
+
+    null = frame[sort].isna()
+    if value is None:
+        return (null & (ids > row_id)) | ~null if order == 'asc' else null & (ids < row_id)
+
+    values, target = _comparable(frame[sort], value)
+    if order == 'asc':
+        after = (values > target) | ((values == target) & (ids > row_id))
+        return after.fillna(False).astype(bool) & ~null
+    after = (values < target) | ((values == target) & (ids < row_id))
+    return (after.fillna(False).astype(bool) & ~null) | null
+
+
+def get_frame_page(df, columns, limit=None, cursor=None, sort='id', order='asc', filters=None, select=None):
+    """
+    get_grid_page over an in-memory DataFrame with an 'id' column
+
+    Accepts the same arguments and cursors and returns the same shape, so
+    callers can page a dataset without knowing where it is stored.
+    """
+    limit, order, selected = _page_arguments(columns, limit, sort, order, select)
+
+    frame = df[filter_mask(df, filters, columns)]
+    if cursor:
+        value, row_id = decode_grid_cursor(cursor, sort, order)
+        frame = frame[_frame_keyset_mask(frame, sort, order, value, row_id).to_numpy()]
+
+    ascending = order == 'asc'
+    if sort == 'id':
+        frame = frame.sort_values('id', ascending=ascending)
+    else:
+        frame = frame.sort_values(
+            [sort, 'id'], ascending=ascending, na_position='first' if ascending else 'last', kind='mergesort'
+        )
+    frame = frame.head(limit + 1)
+
+    next_cursor = None
+    if len(frame) > limit:
+        frame = frame.head(limit)
+        last = frame.iloc[-1]
+        next_cursor = encode_grid_cursor(sort, order, frame_value(last[sort]), int(last['id']))
+
+    output_columns = ['id'] + [col for col in selected if col != 'id']
+    return {
+        'columns': output_columns,
+        'values': [[frame_value(value) for value in frame[col].tolist()] for col in output_columns],
+        'row_count': len(frame),
+        'next_cursor': next_cursor
+    }
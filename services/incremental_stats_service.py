@@ -0,0 +1,569 @@
+"""
+Incremental Stats Service
+Mergeable per-dataset statistics so appended rows update KPIs and charts in O(batch)
+"""
+import json
+import numpy as np
+import pandas as pd
+from config import Config
+from services.db_service import execute_query, named_lock
+from services.metadata_service import get_dataset_metadata, set_dataset_metadata
+from services.auto_analytics_service import (
+    detect_column_types,
+    find_column_by_keywords,
+    resolve_chart_columns,
+    generate_insights_text,
+    build_count_chart,
+    build_average_chart,
+    build_trend_chart,
+    build_box_chart,
+    build_share_chart,
+    build_top_chart,
+    build_cumulative_chart,
+    build_stacked_chart,
+    build_radar_chart,
+    DEPARTMENT_KEYWORDS,
+    SALARY_KEYWORDS,
+    DATE_KEYWORDS
+)
+from utils.chart_codec import encode_charts, decode_charts
+from utils.sketch_utils import QuantileSketch, TopKSketch, HyperLogLog, estimate_distinct
+from utils.cache_utils import bump_dataset_version, bump_dashboard_version
+
+STATS_STATE_KEY = 'stats_state'
+STATE_VERSION = 1
+
+# Sketch sizes - column sketches are shared by all KPIs, group sketches feed the box plot
+QUANTILE_K = 200
+GROUP_QUANTILE_K = 64
+TOP_K_CAPACITY = 64
+DISTINCT_PRECISION = 11
+
+# Per-category detail is only kept for this many categories
+MAX_TRACKED_GROUPS = 1000
+
+
+# ============================================================================
+# State construction
+# ============================================================================
+
+def derive_state_layout(df):
+    """
+    Decide column roles once, from the initial dataset
+
+    Batches appended later reuse the same layout so their partial states
+    line up with the stored one.
+    """
+    col_types = detect_column_types(df)
+    dept_col, sal_col, dt_col = resolve_chart_columns(df, col_types)
+
+    return {
+        'columns': list(df.columns),
+        'col_types': col_types,
+        'chart_columns': {'department': dept_col, 'salary': sal_col, 'date': dt_col},
+        'detected_columns': {
+            'department': find_column_by_keywords(df, DEPARTMENT_KEYWORDS),
+            'salary': find_column_by_keywords(df, SALARY_KEYWORDS),
+            'date': find_column_by_keywords(df, DATE_KEYWORDS)
+        },
+        # Numeric columns tracked per category (stacked bar + radar + salary)
+        'group_measures': list(dict.fromkeys(
+            ([sal_col] if sal_col else []) + col_types['numeric'][:3]
+        ))
+    }
+
+
+def _numeric_values(series):
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def _column_state(series, kind):
+    """Partial state for one column"""
+    state = {
+        'kind': kind,
+        'nulls': int(series.isna().sum()),
+        'count': int(series.notna().sum()),
+        'distinct': HyperLogLog(precision=DISTINCT_PRECISION).update(series).to_dict()
+    }
+
+    if kind == 'numeric':
+        values = _numeric_values(series)
+        values = values[np.isfinite(values)]
+        state.update({
+            'count': int(len(values)),
+            'sum': float(values.sum()),
+            'sum_sq': float(np.square(values).sum()),
+            'min': float(values.min()) if len(values) else None,
+            'max': float(values.max()) if len(values) else None,
+            'quantiles': QuantileSketch(k=QUANTILE_K).update(values).to_dict()
+        })
+    elif kind == 'categorical':
+        state['top_k'] = TopKSketch(capacity=TOP_K_CAPACITY).update(series).to_dict()
+
+    return state
+
+
+def _group_states(df, layout):
+    """Per-category counts, measure sums and salary sketches"""
+    dept_col = layout['chart_columns']['department']
+    sal_col = layout['chart_columns']['salary']
+    if not dept_col or dept_col not in df.columns:
+        return {}
+
+    keys = df[dept_col].astype(str).where(df[dept_col].notna())
+    measures = pd.DataFrame({col: _numeric_values(df[col]) for col in layout['group_measures'] if col in df.columns},
+                            index=df.index)
+
+    # Only the heaviest categories get per-group detail
+    counts = keys.value_counts().head(MAX_TRACKED_GROUPS)
+    tracked = keys.isin(counts.index)
+    keys, measures = keys[tracked], measures[tracked]
+    grouped = measures.groupby(keys)
+    sums = grouped.sum()
+    non_null = grouped.count()
+
+    groups = {}
+    for key, count in counts.items():
+        groups[key] = {
+            'count': int(count),
+            'sums': {col: float(sums.at[key, col]) for col in measures.columns},
+            'counts': {col: int(non_null.at[key, col]) for col in measures.columns}
+        }
+
+    if sal_col and sal_col in measures.columns:
+        for key, values in measures[sal_col].groupby(keys):
+            values = values.to_numpy()
+            values = values[np.isfinite(values)]
+            groups[key]['salary_min'] = float(values.min()) if len(values) else None
+            groups[key]['salary_max'] = float(values.max()) if len(values) else None
+            groups[key]['salary_quantiles'] = QuantileSketch(k=GROUP_QUANTILE_K).update(values).to_dict()
+
+    return groups
+
+
+def _month_states(df, layout):
+    """Per-month row counts and salary sums"""
+    dt_col = layout['chart_columns']['date']
+    sal_col = layout['chart_columns']['salary']
+    if not dt_col or dt_col not in df.columns:
+        return {}
+
+    dates = pd.to_datetime(df[dt_col], errors='coerce')
+    has_date = dates.notna()
+    months = dates[has_date].dt.to_period('M').astype(str)
+
+    result = {key: {'count': int(count), 'salary_sum': 0.0} for key, count in months.value_counts().items()}
+    if sal_col and sal_col in df.columns:
+        salaries = pd.Series(_numeric_values(df[sal_col]), index=df.index)[has_date]
+        for key, total in salaries.groupby(months).sum().items():
+            result[key]['salary_sum'] = float(total)
+
+    return result
+
+
+def build_stats_state(df, layout=None):
+    """
+    Summarise a DataFrame into a mergeable, JSON-serializable stats state
+
+    Args:
+        df: full dataset (initial ingest) or an appended batch
+        layout: column roles from the stored state; derived from df if None
+    """
+    layout = layout or derive_state_layout(df)
+    col_types = layout['col_types']
+
+    columns = {}
+    for col in layout['columns']:
+        if col not in df.columns:
+            continue
+        if col in col_types['numeric']:
+            kind = 'numeric'
+        elif col in col_types['categorical']:
+            kind = 'categorical'
+        else:
+            kind = 'text'
+        columns[col] = _column_state(df[col], kind)
+
+    groups = _group_states(df, layout)
+    dept_col = layout['chart_columns']['department']
+    distinct_groups = int(df[dept_col].nunique()) if dept_col and dept_col in df.columns else 0
+
+    return {
+        'version': STATE_VERSION,
+        'layout': layout,
+        'row_count': int(len(df)),
+        'memory_bytes': int(df.memory_usage(deep=True).sum()),
+        'duplicate_rows': int(df.duplicated().sum()),
+        'total_unique_values': int(sum(estimate_distinct(df[col]) for col in df.columns)),
+        'columns': columns,
+        'groups': groups,
+        'groups_truncated': distinct_groups > len(groups),
+        'months': _month_states(df, layout)
+    }
+
+
+# ============================================================================
+# Merging
+# ============================================================================
+
+def _merge_sketch(a, b, cls):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return cls.from_dict(a).merge(cls.from_dict(b)).to_dict()
+
+
+def _merge_extreme(a, b, fn):
+    values = [v for v in (a, b) if v is not None]
+    return fn(values) if values else None
+
+
+def _merge_column(a, b):
+    merged = dict(a)
+    merged['nulls'] = a['nulls'] + b['nulls']
+    merged['count'] = a['count'] + b['count']
+    merged['distinct'] = _merge_sketch(a.get('distinct'), b.get('distinct'), HyperLogLog)
+    if a['kind'] == 'numeric':
+        merged['sum'] = a['sum'] + b['sum']
+        merged['sum_sq'] = a['sum_sq'] + b['sum_sq']
+        merged['min'] = _merge_extreme(a['min'], b['min'], min)
+        merged['max'] = _merge_extreme(a['max'], b['max'], max)
+        merged['quantiles'] = _merge_sketch(a.get('quantiles'), b.get('quantiles'), QuantileSketch)
+    elif a['kind'] == 'categorical':
+        merged['top_k'] = _merge_sketch(a.get('top_k'), b.get('top_k'), TopKSketch)
+    return merged
+
+
+def _merge_group(a, b):
+    merged = {
+        'count': a['count'] + b['count'],
+        'sums': {col: a['sums'].get(col, 0.0) + b['sums'].get(col, 0.0) for col in set(a['sums']) | set(b['sums'])},
+        'counts': {col: a['counts'].get(col, 0) + b['counts'].get(col, 0) for col in set(a['counts']) | set(b['counts'])}
+    }
+    if 'salary_quantiles' in a or 'salary_quantiles' in b:
+        merged['salary_min'] = _merge_extreme(a.get('salary_min'), b.get('salary_min'), min)
+        merged['salary_max'] = _merge_extreme(a.get('salary_max'), b.get('salary_max'), max)
+        merged['salary_quantiles'] = _merge_sketch(a.get('salary_quantiles'), b.get('salary_quantiles'), QuantileSketch)
+    return merged
+
+
+def merge_stats_state(state, batch_state):
+    """Fold a batch state into the stored state (returns a new dict)"""
+    merged = dict(state)
+    merged['row_count'] = state['row_count'] + batch_state['row_count']
+    merged['memory_bytes'] = state['memory_bytes'] + batch_state['memory_bytes']
+    # Only duplicates inside the batch are visible here; cross-batch duplicates need the stored rows
+    merged['duplicate_rows'] = state['duplicate_rows'] + batch_state['duplicate_rows']
+
+    merged['columns'] = dict(state['columns'])
+    for col, col_state in batch_state['columns'].items():
+        existing = merged['columns'].get(col)
+        merged['columns'][col] = _merge_column(existing, col_state) if existing else col_state
+
+    merged['groups'] = dict(state['groups'])
+    merged['groups_truncated'] = state.get('groups_truncated', False) or batch_state.get('groups_truncated', False)
+    for key, group in batch_state['groups'].items():
+        if key in merged['groups']:
+            merged['groups'][key] = _merge_group(merged['groups'][key], group)
+        elif len(merged['groups']) < MAX_TRACKED_GROUPS:
+            merged['groups'][key] = group
+        else:
+            merged['groups_truncated'] = True
+
+    if all(c.get('distinct') for c in merged['columns'].values()):
+        merged['total_unique_values'] = sum(
+            HyperLogLog.from_dict(c['distinct']).estimate() for c in merged['columns'].values()
+        )
+
+    merged['months'] = dict(state['months'])
+    for key, month in batch_state['months'].items():
+        existing = merged['months'].get(key, {'count': 0, 'salary_sum': 0.0})
+        merged['months'][key] = {
+            'count': existing['count'] + month['count'],
+            'salary_sum': existing['salary_sum'] + month['salary_sum']
+        }
+
+    return merged
+
+
+# ============================================================================
+# KPIs and charts from a state
+# ============================================================================
+
+def _numeric_summary(col_state, row_count):
+    n = col_state['count']
+    mean = col_state['sum'] / n if n else 0.0
+    variance = (col_state['sum_sq'] - n * mean * mean) / (n - 1) if n > 1 else 0.0
+    median = QuantileSketch.from_dict(col_state['quantiles']).quantile(0.5) if col_state.get('quantiles') else None
+    return {
+        'total': float(col_state['sum']),
+        'average': float(mean),
+        'median': float(median) if median is not None else 0.0,
+        'min': float(col_state['min']) if col_state['min'] is not None else 0.0,
+        'max': float(col_state['max']) if col_state['max'] is not None else 0.0,
+        'std': float(np.sqrt(max(variance, 0.0))) if row_count > 1 else 0
+    }
+
+
+def stats_from_state(state):
+    """
+    Rebuild the generate_summary_stats KPI dict from a stats state
+
+    Medians come from quantile sketches and distinct counts from HyperLogLog
+    sketches once batches were merged; everything else is exact.
+    """
+    layout = state['layout']
+    col_types = layout['col_types']
+    dept_col = layout['chart_columns']['department']
+    sal_col = layout['chart_columns']['salary']
+    row_count = state['row_count']
+    column_count = len(layout['columns'])
+
+    stats = {
+        'total_rows': row_count,
+        'total_columns': column_count,
+        'numeric_columns': len(col_types['numeric']),
+        'categorical_columns': len(col_types['categorical']),
+        'date_columns': len(col_types['date']),
+        'total_records': row_count,
+        'total_columns_count': column_count,
+        'total_departments': len(state['groups']) if dept_col else 0
+    }
+
+    salary_state = state['columns'].get(sal_col) if sal_col else None
+    if salary_state and salary_state['kind'] == 'numeric' and salary_state['count']:
+        summary = _numeric_summary(salary_state, row_count)
+        stats['average_salary'] = round(summary['average'], 2)
+        stats['max_salary'] = round(summary['max'], 2)
+        stats['min_salary'] = round(summary['min'], 2)
+        stats['median_salary'] = round(summary['median'], 2)
+    else:
+        stats['average_salary'] = stats['max_salary'] = stats['min_salary'] = stats['median_salary'] = 0
+
+    stats['detected_columns'] = layout['detected_columns']
+
+    stats['memory_usage_mb'] = round(state['memory_bytes'] / (1024 * 1024), 2)
+    stats['missing_values'] = int(sum(c['nulls'] for c in state['columns'].values()))
+    stats['duplicate_rows'] = int(state['duplicate_rows'])
+    stats['missing_percentage'] = round((stats['missing_values'] / (row_count * column_count) * 100), 2) if row_count > 0 and column_count > 0 else 0
+    stats['total_unique_values'] = int(state['total_unique_values'])
+    stats['data_completeness'] = round(100 - stats['missing_percentage'], 2)
+
+    if stats['max_salary'] > 0 and stats['min_salary'] > 0:
+        stats['salary_range'] = round(stats['max_salary'] - stats['min_salary'], 2)
+    else:
+        stats['salary_range'] = 0
+
+    quality_score = 100
+    if stats['missing_values'] > 0:
+        quality_score -= min(stats['missing_percentage'] * 2, 40)
+    if stats['duplicate_rows'] > 0:
+        dup_percentage = (stats['duplicate_rows'] / row_count) * 100 if row_count > 0 else 0
+        quality_score -= min(dup_percentage * 1.5, 30)
+    stats['data_quality_score'] = max(0, round(quality_score, 1))
+
+    stats['numeric_stats'] = {
+        col: _numeric_summary(state['columns'][col], row_count)
+        for col in col_types['numeric'] if col in state['columns']
+    }
+
+    categorical_stats = {}
+    for col in col_types['categorical']:
+        top_k = state['columns'].get(col, {}).get('top_k')
+        if top_k:
+            sketch = TopKSketch.from_dict(top_k)
+            categorical_stats[col] = {
+                'unique_values': len(sketch.counts),
+                'top_values': dict(sketch.top(5))
+            }
+    stats['categorical_stats'] = categorical_stats
+
+    return stats
+
+
+def charts_from_state(state, point_budget=None):
+    """
+    Rebuild every chart that only needs aggregates (all but the scatter plot)
+
+    Returns:
+        list of Chart.js configs in create_auto_charts order
+    """
+    point_budget = point_budget or Config.CHART_POINT_BUDGET
+    layout = state['layout']
+    numeric = layout['col_types']['numeric']
+    dept_col = layout['chart_columns']['department']
+    sal_col = layout['chart_columns']['salary']
+    dt_col = layout['chart_columns']['date']
+    groups = state['groups']
+    charts = []
+
+    group_keys = sorted(groups)
+    value_counts = pd.Series({k: g['count'] for k, g in groups.items()}, dtype='int64').sort_values(ascending=False, kind='stable')
+
+    def group_means(cols, keys):
+        return pd.DataFrame(
+            {col: [groups[k]['sums'].get(col, 0.0) / groups[k]['counts'][col] if groups[k]['counts'].get(col) else np.nan
+                   for k in keys] for col in cols},
+            index=pd.Index(keys)
+        )
+
+    months = sorted(state['months'])
+
+    if dept_col and groups:
+        charts.append(build_count_chart(value_counts, dept_col))
+
+    if dept_col and sal_col and groups:
+        charts.append(build_average_chart(group_means([sal_col], group_keys)[sal_col].dropna(), dept_col, sal_col))
+
+    if dt_col and dept_col and months:
+        monthly_counts = pd.Series([state['months'][m]['count'] for m in months], index=months)
+        charts.append(build_trend_chart(monthly_counts, point_budget))
+
+    if sal_col and dept_col and groups:
+        rows = {}
+        for key in group_keys[:10]:
+            group = groups[key]
+            if group.get('salary_quantiles') and group.get('salary_min') is not None:
+                q1, median, q3 = QuantileSketch.from_dict(group['salary_quantiles']).quantiles([0.25, 0.5, 0.75])
+                mean = group['sums'][sal_col] / group['counts'][sal_col]
+                rows[key] = [group['salary_min'], q1, median, q3, group['salary_max'], mean]
+            else:
+                rows[key] = [0, 0, 0, 0, 0, 0]
+        box_stats = pd.DataFrame.from_dict(rows, orient='index', columns=['min', 'q1', 'median', 'q3', 'max', 'mean'])
+        box_chart = build_box_chart(box_stats, dept_col, sal_col)
+        if box_chart:
+            charts.append(box_chart)
+
+    if dept_col and groups:
+        share_chart = build_share_chart(value_counts, dept_col)
+        if share_chart:
+            charts.append(share_chart)
+        charts.append(build_top_chart(value_counts, dept_col))
+
+    if dt_col and sal_col and months:
+        monthly_sums = pd.Series([state['months'][m]['salary_sum'] for m in months], index=months)
+        charts.append(build_cumulative_chart(monthly_sums, sal_col, point_budget))
+
+    if dept_col and len(numeric) >= 2 and groups:
+        num_col1, num_col2 = numeric[0], numeric[1]
+        sums = pd.DataFrame(
+            {col: [groups[k]['sums'].get(col, 0.0) for k in group_keys] for col in (num_col1, num_col2)},
+            index=pd.Index(group_keys)
+        )
+        charts.append(build_stacked_chart(sums, dept_col, num_col1, num_col2))
+
+    if len(numeric) >= 3 and dept_col and groups:
+        charts.append(build_radar_chart(group_means(numeric[:3], value_counts.head(3).index.tolist()), dept_col))
+
+    return charts
+
+
+def merge_chart_lists(existing_charts, refreshed_charts, state):
+    """
+    Replace state-maintained charts in a saved chart list, keeping the rest
+
+    Charts the state can rebuild are swapped in place by title; ones that no
+    longer apply (e.g. the share doughnut once there are > 6 categories) are
+    dropped; charts the state cannot rebuild (scatter) are kept as saved.
+    Charts that were never on the saved dashboard are not added.
+    """
+    refreshed = {chart['title']: chart for chart in refreshed_charts}
+    maintained = set(refreshed)
+    dept_col = state['layout']['chart_columns']['department']
+    if dept_col:
+        maintained.add(f'{dept_col.replace("_", " ").title()} Share (%)')
+
+    result = []
+    for chart in existing_charts or []:
+        title = chart.get('title')
+        if title in refreshed:
+            result.append(refreshed[title])
+        elif title not in maintained:
+            result.append(chart)
+
+    return result
+
+
+# ============================================================================
+# Persistence
+# ============================================================================
+
+def save_stats_state(dataset_id, state):
+    return set_dataset_metadata(dataset_id, STATS_STATE_KEY, state)
+
+
+def load_stats_state(dataset_id):
+    state = get_dataset_metadata(dataset_id, STATS_STATE_KEY)
+    if state and state.get('version') == STATE_VERSION:
+        return state
+    return None
+
+
+def initialize_stats_state(dataset_id, df):
+    """Build and persist the stats state for a freshly ingested dataset"""
+    state = build_stats_state(df)
+    save_stats_state(dataset_id, state)
+    return state
+
+
+def refresh_dataset_dashboards(dataset_id, stats, charts, state):
+    """Write refreshed KPIs/charts/insights into every dashboard built on the dataset"""
+    dashboards = execute_query(
+        "SELECT id, charts_data FROM dashboards WHERE dataset_id = %s",
+        (dataset_id,),
+        fetch=True
+    )
+    insights = generate_insights_text(stats)
+
+    for dashboard in dashboards or []:
+        existing = decode_charts(json.loads(dashboard['charts_data'])) if dashboard.get('charts_data') else []
+        merged_charts = merge_chart_lists(existing, charts, state)
+        execute_query(
+            """
+            UPDATE dashboards
+            SET stats_data = %s, charts_data = %s, insights_data = %s,
+                total_charts = %s, total_kpis = %s, dataset_rows = %s, dataset_columns = %s
+            WHERE id = %s
+            """,
+            (
+                json.dumps(stats), json.dumps(encode_charts(merged_charts)), json.dumps(insights),
+                len(merged_charts), len(stats), stats['total_records'], stats['total_columns_count'],
+                dashboard['id']
+            )
+        )
+        bump_dashboard_version(dashboard['id'])
+
+    return len(dashboards or [])
+
+
+def apply_batch_to_stats(dataset_id, df_batch):
+    """
+    Fold appended rows into the dataset's stored stats and refresh its dashboards
+
+    Only the batch is scanned; the stored state supplies everything else.
+    The load-merge-save runs under a per-dataset lock so overlapping appends
+    (other requests or workers) never merge into the same old state.
+
+    Returns:
+        (success: bool, message: str, stats: dict)
+    """
+    try:
+        with named_lock(f'stats:{dataset_id}'):
+            state = load_stats_state(dataset_id)
+            if state is None:
+                return False, "No stored statistics for this dataset - run a full analysis first", None
+
+            batch_state = build_stats_state(df_batch, layout=state['layout'])
+            state = merge_stats_state(state, batch_state)
+            save_stats_state(dataset_id, state)
+            bump_dataset_version(dataset_id)
+
+            stats = stats_from_state(state)
+            charts = charts_from_state(state)
+            updated = refresh_dataset_dashboards(dataset_id, stats, charts, state)
+
+        return True, f"Statistics updated with {len(df_batch)} rows ({updated} dashboards refreshed)", stats
+
+    except Exception as e:
+        return False, f"Error updating statistics: {str(e)}", None
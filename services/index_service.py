@@ -0,0 +1,187 @@
+"""
+Index Service
+Plans and builds secondary indexes on dataset tables from the column profile
+
+create_table_schema only creates the `id` primary key. After ingest the
+planner picks low/medium-cardinality categorical columns and date columns,
+adds a (category, date) composite for filtered time series, and builds the
+indexes in a background thread. Build time and on-disk size per index are
+recorded under the 'indexes' metadata key.
+"""
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
+from config import Config
+from services.db_service import execute_query
+from services.metadata_service import get_dataset_metadata, set_dataset_metadata
+
+INDEX_METADATA_KEY = 'indexes'
+
+# Dates are stored as ISO strings by clean_dataframe (Step 7)
+ISO_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+# Key prefix used when indexing TEXT columns
+TEXT_PREFIX_LENGTH = 64
+
+
+def _is_numeric_profile(col):
+    return 'mean' in col
+
+
+def _is_date_profile(col):
+    if col['type'].startswith('datetime'):
+        return True
+    samples = [v for v in col.get('sample_values') or [] if v is not None]
+    return bool(samples) and all(isinstance(v, str) and ISO_DATE_PATTERN.match(v) for v in samples)
+
+
+def _index_name(columns):
+    name = 'idx_' + '_'.join(columns)
+    if len(name) <= 64:
+        return name
+    return f"{name[:55]}_{zlib.crc32(name.encode('utf-8')):08x}"
+
+
+def plan_indexes(profile):
+    """
+    Choose secondary indexes for a profiled dataset
+
+    Returns:
+        list of {'name', 'columns', 'kind'} (empty for small tables)
+    """
+    row_count = profile['row_count']
+    if row_count < Config.INDEX_MIN_ROWS:
+        return []
+
+    dates, categories = [], []
+    for col in profile['columns']:
+        if _is_date_profile(col):
+            dates.append(col)
+        elif not _is_numeric_profile(col):
+            cardinality = col['unique_values']
+            # Constant columns filter nothing; near-unique columns are not group-by keys
+            if 1 < cardinality <= Config.INDEX_MAX_CARDINALITY and cardinality * 2 <= row_count:
+                categories.append(col)
+
+    # Most selective categories first
+    categories.sort(key=lambda col: col['unique_values'], reverse=True)
+
+    plan = []
+    for col in dates:
+        plan.append({'columns': [col['name']], 'kind': 'date'})
+    for col in categories:
+        plan.append({'columns': [col['name']], 'kind': 'category'})
+    if categories and dates:
+        plan.append({'columns': [categories[0]['name'], dates[0]['name']], 'kind': 'composite'})
+
+    plan = plan[:Config.INDEX_MAX_PER_TABLE]
+    for index in plan:
+        index['name'] = _index_name(index['columns'])
+    return plan
+
+
+def _column_definitions(table_name):
+    described = execute_query(f"DESCRIBE `{table_name}`", fetch=True) or []
+    return {row['Field']: str(row['Type']).lower() for row in described}
+
+
+def _index_sizes(table_name):
+    """Index name -> size in bytes from InnoDB persistent statistics"""
+    execute_query(f"ANALYZE TABLE `{table_name}`", fetch=True)
+    rows = execute_query(
+        """
+        SELECT index_name, stat_value * @@innodb_page_size AS size_bytes
+        FROM mysql.innodb_index_stats
+        WHERE database_name = %s AND table_name = %s AND stat_name = 'size'
+        """,
+        (Config.MYSQL_DB, table_name),
+        fetch=True
+    ) or []
+    return {row['index_name']: int(row['size_bytes']) for row in rows}
+
+
+def build_dataset_indexes(dataset_id, table_name, profile):
+    """
+    Create the planned indexes on a dataset table and record the results
+
+    Existing indexes with the same name are kept. Returns the stored record.
+    """
+    plan = plan_indexes(profile)
+    record = {
+        'table_name': table_name,
+        'status': 'building',
+        'planned_at': datetime.now().isoformat(),
+        'indexes': plan
+    }
+    set_dataset_metadata(dataset_id, INDEX_METADATA_KEY, record)
+
+    existing = {row['Key_name'] for row in execute_query(f"SHOW INDEX FROM `{table_name}`", fetch=True) or []}
+    types = _column_definitions(table_name)
+
+    total_ms = 0.0
+    for index in plan:
+        if index['name'] in existing:
+            index['status'] = 'exists'
+            continue
+
+        keys = []
+        for col in index['columns']:
+            prefix = f"({TEXT_PREFIX_LENGTH})" if 'text' in types.get(col, '') or 'blob' in types.get(col, '') else ''
+            keys.append(f"`{col}`{prefix}")
+
+        started = time.perf_counter()
+        result = execute_query(
+            f"ALTER TABLE `{table_name}` ADD INDEX `{index['name']}` ({', '.join(keys)}), ALGORITHM=INPLACE, LOCK=NONE"
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        total_ms += elapsed_ms
+
+        index['build_ms'] = round(elapsed_ms, 1)
+        index['status'] = 'failed' if result is None else 'built'
+
+    sizes = _index_sizes(table_name) if plan else {}
+    for index in plan:
+        index['size_bytes'] = sizes.get(index['name'])
+
+    record.update({
+        'status': 'failed' if any(index['status'] == 'failed' for index in plan) else 'ready',
+        'built_at': datetime.now().isoformat(),
+        'total_build_ms': round(total_ms, 1),
+        'total_size_bytes': sum(index['size_bytes'] or 0 for index in plan)
+    })
+    set_dataset_metadata(dataset_id, INDEX_METADATA_KEY, record)
+    return record
+
+
+def _build_in_background(dataset_id, table_name, profile):
+    try:
+        build_dataset_indexes(dataset_id, table_name, profile)
+    except Exception as e:
+        print(f"Error building indexes for dataset {dataset_id}: {str(e)}")
+        set_dataset_metadata(dataset_id, INDEX_METADATA_KEY, {
+            'table_name': table_name, 'status': 'failed', 'error': str(e)
+        })
+
+
+def schedule_index_build(dataset_id, table_name, profile):
+    """Build indexes after ingest without holding up the upload request"""
+    if not profile:
+        return None
+    if not Config.INDEX_BUILD_ASYNC:
+        _build_in_background(dataset_id, table_name, profile)
+        return None
+
+    worker = threading.Thread(
+        target=_build_in_background,
+        args=(dataset_id, table_name, profile),
+        name=f'index-build-{dataset_id}',
+        daemon=True
+    )
+    worker.start()
+    return worker
+
+
+def get_dataset_indexes(dataset_id):
+    return get_dataset_metadata(dataset_id, INDEX_METADATA_KEY)
@@ -0,0 +1,51 @@
+"""
+Metadata Service
+Per-dataset key/value documents stored in the file_metadata table
+"""
+import json
+from services.db_service import execute_query
+
+
+def set_dataset_metadata(dataset_id, key, value):
+    """
+    Store a JSON-serializable value under (dataset_id, key), replacing any previous value
+
+    Returns:
+        True if the write succeeded, False otherwise
+    """
+    try:
+        query = """
+            INSERT INTO file_metadata (dataset_id, metadata_key, metadata_value)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE metadata_value = VALUES(metadata_value)
+        """
+        result = execute_query(query, (dataset_id, key, json.dumps(value)))
+        return result is not None
+    except Exception as e:
+        print(f"Error saving metadata '{key}' for dataset {dataset_id}: {str(e)}")
+        return False
+
+
+def get_dataset_metadata(dataset_id, key, default=None):
+    """Load the value stored under (dataset_id, key), or default if missing"""
+    try:
+        query = "SELECT metadata_value FROM file_metadata WHERE dataset_id = %s AND metadata_key = %s"
+        result = execute_query(query, (dataset_id, key), fetch=True)
+        if result and result[0]['metadata_value'] is not None:
+            return json.loads(result[0]['metadata_value'])
+        return default
+    except Exception as e:
+        print(f"Error loading metadata '{key}' for dataset {dataset_id}: {str(e)}")
+        return default
+
+
+def delete_dataset_metadata(dataset_id, key=None):
+    """Delete one key (or every key if key is None) for a dataset"""
+    if key is None:
+        execute_query("DELETE FROM file_metadata WHERE dataset_id = %s", (dataset_id,))
+    else:
+        execute_query(
+            "DELETE FROM file_metadata WHERE dataset_id = %s AND metadata_key = %s",
+            (dataset_id, key)
+        )
+    return True
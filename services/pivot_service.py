@@ -0,0 +1,214 @@
+"""
+Pivot Service
+Pivot tables (row dimensions x column dimensions x measures) over a dataset
+
+Only the columns a pivot touches are read from the dataset backend, with its
+filters pushed down. Each dimension is factorized to integer codes, the row
+and column code tuples are combined into one cell number, and every measure
+is a single bincount/ufunc.at pass over the cells (a hash aggregate over
+categorical codes). Results are cached per dataset version and pivot spec.
+"""
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from config import Config
+from services.db_service import get_dataset_by_id
+from services.profile_service import get_dataset_profile
+from services.grid_service import get_grid_columns, frame_value
+from services.dataset_backend import get_dataset_backend, AGGREGATES
+from services.tiering_service import ensure_dataset_hot
+from utils.cache_utils import get_version
+
+# Date grains accepted as 'column:grain' dimensions
+DATE_GRAINS = ('year', 'quarter', 'month', 'day')
+
+# (dataset_id, dataset version, spec) -> result, least recently used first
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def parse_pivot_spec(spec, columns):
+    """
+    Validate a pivot request
+
+    Args:
+        spec: {'rows': [dim, ...], 'columns': [dim, ...],
+               'values': {column: [sum|mean|min|max|count, ...]}, 'filters': {...}}
+            where a dim is a column name or 'column:year|quarter|month|day'
+        columns: data columns of the dataset
+
+    Returns:
+        normalized spec dict - raises ValueError on invalid input
+    """
+    rows = list(spec.get('rows') or [])
+    cols = list(spec.get('columns') or [])
+    if not rows and not cols:
+        raise ValueError("A pivot needs at least one row or column dimension")
+
+    for dim in rows + cols:
+        col, _, grain = str(dim).partition(':')
+        if col not in columns:
+            raise ValueError(f"Unknown column '{col}'")
+        if grain and grain not in DATE_GRAINS:
+            raise ValueError(f"Unknown date grain '{grain}' (use {', '.join(DATE_GRAINS)})")
+    if len(set(rows + cols)) != len(rows + cols):
+        raise ValueError("A dimension can only be used once")
+
+    values = spec.get('values') or {}
+    if not isinstance(values, dict):
+        raise ValueError("values must be an object of {column: [aggregations]}")
+    measures = []
+    for col, aggs in values.items():
+        if col not in columns:
+            raise ValueError(f"Unknown column '{col}'")
+        for agg in ([aggs] if isinstance(aggs, str) else aggs):
+            if agg not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate '{agg}'")
+            measures.append((col, agg))
+    if not measures:
+        measures = [(None, 'count')]
+
+    return {'rows': rows, 'columns': cols, 'measures': measures, 'filters': spec.get('filters') or {}}
+
+
+def _dimension_keys(df, dim):
+    """Values of a dimension, with dates bucketed to the requested grain"""
+    col, _, grain = dim.partition(':')
+    if not grain:
+        return df[col]
+    dates = pd.to_datetime(df[col], errors='coerce')
+    if grain == 'quarter':
+        keys = dates.dt.year.astype('Int64').astype(str) + '-Q' + dates.dt.quarter.astype('Int64').astype(str)
+    else:
+        keys = dates.dt.strftime({'year': '%Y', 'month': '%Y-%m', 'day': '%Y-%m-%d'}[grain])
+    return keys.where(dates.notna())
+
+
+def _combined_codes(df, dims):
+    """
+    (header number per row, distinct code tuples in sorted order, labels per dimension)
+
+    Rows where any dimension is null get -1 and are left out of the pivot.
+    """
+    if not dims:
+        return np.zeros(len(df), dtype=np.int64), np.zeros((1, 0), dtype=np.int64), []
+
+    codes, labels = [], []
+    for dim in dims:
+        dim_codes, uniques = pd.factorize(_dimension_keys(df, dim), sort=True)
+        codes.append(dim_codes)
+        labels.append([frame_value(value) for value in uniques])
+
+    codes = np.column_stack(codes)
+    valid = (codes >= 0).all(axis=1)
+    tuples, inverse = np.unique(codes[valid], axis=0, return_inverse=True)
+    keys = np.full(len(df), -1, dtype=np.int64)
+    keys[valid] = inverse.reshape(-1)
+    return keys, tuples, labels
+
+
+def _headers(tuples, labels):
+    return [[labels[d][code] for d, code in enumerate(row)] for row in tuples.tolist()]
+
+
+def compute_pivot(df, spec):
+    """
+    Pivot a DataFrame according to a normalized spec
+
+    Returns:
+        dict with row_headers, column_headers (one list of dimension values
+        per row/column), measures (<column>_<agg> names) and values
+        {measure: [[cell, ...] per row]} - empty cells are None
+    """
+    row_keys, row_tuples, row_labels = _combined_codes(df, spec['rows'])
+    col_keys, col_tuples, col_labels = _combined_codes(df, spec['columns'])
+
+    n_rows, n_cols = len(row_tuples), len(col_tuples)
+    cells = n_rows * n_cols * len(spec['measures'])
+    if cells > Config.PIVOT_MAX_CELLS:
+        raise ValueError(f"Pivot would have {cells} cells (limit {Config.PIVOT_MAX_CELLS}) - add filters or fewer dimensions")
+
+    valid = (row_keys >= 0) & (col_keys >= 0)
+    cell = row_keys[valid] * n_cols + col_keys[valid]
+    size = n_rows * n_cols
+    rows_per_cell = np.bincount(cell, minlength=size)
+    occupied = rows_per_cell > 0
+
+    values, names = {}, []
+    for col, agg in spec['measures']:
+        name = f"{col}_{agg}" if col else 'row_count'
+        names.append(name)
+        if col is None:
+            result = rows_per_cell.astype(float)
+        else:
+            series = df[col][valid]
+            if agg == 'count':
+                result = np.bincount(cell, weights=series.notna().to_numpy(dtype=float), minlength=size)
+            else:
+                numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                if series.notna().any() and np.isnan(numbers).all():
+                    raise ValueError(f"'{col}' is not numeric - only count is available")
+                present = ~np.isnan(numbers)
+                counts = np.bincount(cell[present], minlength=size)
+                if agg in ('sum', 'mean'):
+                    result = np.bincount(cell[present], weights=numbers[present], minlength=size)
+                    if agg == 'mean':
+                        result = result / np.where(counts > 0, counts, 1)
+                else:
+                    result = np.full(size, np.inf if agg == 'min' else -np.inf)
+                    (np.minimum if agg == 'min' else np.maximum).at(result, cell[present], numbers[present])
+                result = np.where(counts > 0, result, np.nan)
+        result = np.where(occupied, result, np.nan).reshape(n_rows, n_cols)
+        values[name] = [[None if np.isnan(v) else round(float(v), 4) for v in row] for row in result]
+
+    return {
+        'row_dimensions': spec['rows'],
+        'column_dimensions': spec['columns'],
+        'row_headers': _headers(row_tuples, row_labels),
+        'column_headers': _headers(col_tuples, col_labels),
+        'measures': names,
+        'values': values,
+        'matched_rows': int(valid.sum())
+    }
+
+
+def pivot_dataset(dataset_id, spec):
+    """
+    Pivot a stored dataset (cached per dataset version and spec)
+
+    Returns:
+        compute_pivot result plus cached - raises ValueError on invalid
+        specs and RuntimeError when the dataset cannot be read
+    """
+    dataset = get_dataset_by_id(dataset_id)
+    if not dataset or not dataset.get('table_name'):
+        raise RuntimeError("Dataset not found or not processed")
+    columns = get_grid_columns(dataset['table_name'], get_dataset_profile(dataset_id))
+    spec = parse_pivot_spec(spec, columns)
+
+    key = (dataset_id, get_version('dataset', dataset_id), json.dumps(spec, sort_keys=True, default=str))
+    with _results_lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return dict(_results[key], cached=True)
+
+    needed = [str(dim).partition(':')[0] for dim in spec['rows'] + spec['columns']]
+    needed += [col for col, _ in spec['measures'] if col] + list(spec['filters'])
+    needed = [col for col in dict.fromkeys(needed) if col in columns]
+
+    dataset = ensure_dataset_hot(dataset)
+    if not dataset:
+        raise RuntimeError("Dataset could not be restored from cold storage")
+    df = get_dataset_backend().load(dataset['table_name'], needed, spec['filters'])
+    if df is None:
+        raise RuntimeError("Failed to read the dataset rows")
+
+    result = compute_pivot(df, spec)
+    with _results_lock:
+        _results[key] = result
+        _results.move_to_end(key)
+        while len(_results) > Config.PIVOT_CACHE_SIZE:
+            _results.popitem(last=False)
+    return dict(result, cached=False)
@@ -0,0 +1,146 @@
+"""
+Profile Service
+Per-column dataset profile computed once at ingest and served from file_metadata
+"""
+import pandas as pd
+from services.metadata_service import get_dataset_metadata, set_dataset_metadata
+from utils.sketch_utils import estimate_distinct, heavy_hitters
+
+PROFILE_KEY = 'profile'
+
+
+def _json_value(value):
+    """Convert numpy/pandas scalars to plain JSON values"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def profile_column(series):
+    """Compact profile for one column"""
+    non_null = series.dropna()
+    profile = {
+        'name': series.name,
+        'type': str(series.dtype),
+        'null_count': int(len(series) - len(non_null)),
+        'unique_values': estimate_distinct(series),
+        'sample_values': [_json_value(v) for v in non_null.head(3).tolist()]
+    }
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        profile['min'] = float(non_null.min()) if len(non_null) else None
+        profile['max'] = float(non_null.max()) if len(non_null) else None
+        profile['mean'] = float(non_null.mean()) if len(non_null) else None
+    else:
+        profile['top_values'] = [
+            {'value': value, 'count': int(count)} for value, count in heavy_hitters(series, n=5)
+        ]
+
+    return profile
+
+
+def build_dataset_profile(df, table_name=None):
+    """
+    Profile every column of a cleaned dataset
+
+    Returns:
+        dict with exact row_count, column_count and per-column profiles
+    """
+    return {
+        'table_name': table_name,
+        'row_count': int(len(df)),
+        'column_count': int(len(df.columns)),
+        'columns': [profile_column(df[col]) for col in df.columns]
+    }
+
+
+def save_dataset_profile(dataset_id, df, table_name=None):
+    """Compute and store the profile; returns it (None on failure)"""
+    try:
+        profile = build_dataset_profile(df, table_name)
+        set_dataset_metadata(dataset_id, PROFILE_KEY, profile)
+        return profile
+    except Exception as e:
+        print(f"Error profiling dataset {dataset_id}: {str(e)}")
+        return None
+
+
+def merge_profile(profile, df_batch, distinct=None):
+    """
+    Fold appended rows into a stored profile without rescanning the table
+
+    Args:
+        profile: stored profile
+        df_batch: the appended rows
+        distinct: optional {column: distinct estimate} for the whole dataset
+            (from the merged stats state); otherwise the larger of the two is kept
+
+    Returns:
+        new profile dict
+    """
+    merged = dict(profile)
+    merged['row_count'] = profile['row_count'] + int(len(df_batch))
+    merged['columns'] = []
+
+    for col in profile['columns']:
+        col = dict(col)
+        name = col['name']
+        if name not in df_batch.columns:
+            merged['columns'].append(col)
+            continue
+
+        series = df_batch[name]
+        non_null = series.dropna()
+        old_non_null = profile['row_count'] - col['null_count']
+        col['null_count'] += int(len(series) - len(non_null))
+        col['unique_values'] = int((distinct or {}).get(name) or max(col['unique_values'], estimate_distinct(series)))
+
+        if 'mean' in col:
+            values = pd.to_numeric(non_null, errors='coerce').dropna()
+            if len(values):
+                batch_min, batch_max = float(values.min()), float(values.max())
+                col['min'] = batch_min if col['min'] is None else min(col['min'], batch_min)
+                col['max'] = batch_max if col['max'] is None else max(col['max'], batch_max)
+                total = (col['mean'] or 0.0) * old_non_null + float(values.sum())
+                col['mean'] = total / (old_non_null + len(values))
+        elif 'top_values' in col:
+            counts = {item['value']: item['count'] for item in col['top_values']}
+            for value, count in heavy_hitters(series, n=5):
+                counts[value] = counts.get(value, 0) + int(count)
+            top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:5]
+            col['top_values'] = [{'value': value, 'count': count} for value, count in top]
+
+        merged['columns'].append(col)
+
+    return merged
+
+
+def get_dataset_profile(dataset_id):
+    return get_dataset_metadata(dataset_id, PROFILE_KEY)
+
+
+def profile_to_statistics(profile):
+    """Profile in the get_dataset_statistics response format"""
+    return {
+        'total_rows': profile['row_count'],
+        'columns': profile['columns'],
+        'column_count': profile['column_count']
+    }
+
+
+def profile_to_schema(profile):
+    """Profile in the ai_prompts_service.get_dataset_schema format"""
+    columns = []
+    for col in profile['columns']:
+        col_info = dict(col)
+        if 'top_values' in col_info:
+            col_info['top_values'] = [item['value'] for item in col_info['top_values']]
+        columns.append(col_info)
+
+    return {
+        'columns': columns,
+        'total_rows': profile['row_count'],
+        'total_columns': profile['column_count']
+    }
@@ -0,0 +1,194 @@
+"""
+Progressive Analytics Service
+Streams approximate KPIs/charts from a stratified sample first, then exact results
+"""
+import numpy as np
+import pandas as pd
+from config import Config
+from services.auto_analytics_service import (
+    detect_column_types,
+    find_column_by_keywords,
+    DEPARTMENT_KEYWORDS,
+    generate_summary_stats,
+    create_auto_charts,
+    generate_insights_text
+)
+
+# z-score for 95% confidence intervals
+Z_95 = 1.96
+
+
+def stratified_sample(df, strata_col, sample_size, random_state=42):
+    """
+    Draw a proportional stratified sample without replacement
+
+    Every stratum keeps at least one row so small categories still show up
+    in the preview charts. Selection is vectorized: rows are shuffled once and
+    the first n_h rows of each stratum (by shuffled rank) are kept.
+
+    Returns:
+        (sample DataFrame with the original index, weights Series of
+        N_h / n_h per sampled row for extrapolating counts and sums)
+    """
+    if sample_size >= len(df):
+        return df, pd.Series(1.0, index=df.index)
+
+    rng = np.random.default_rng(random_state)
+    shuffled = df.iloc[rng.permutation(len(df))]
+
+    if not strata_col or strata_col not in df.columns:
+        sample = shuffled.iloc[:sample_size]
+        return sample, pd.Series(len(df) / len(sample), index=sample.index)
+
+    codes, _ = pd.factorize(shuffled[strata_col], use_na_sentinel=False)
+    sizes = np.bincount(codes)
+    allocation = np.maximum(np.floor(sizes * (sample_size / len(df))), 1).astype(np.int64)
+
+    rank = pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy()
+    keep = rank < allocation[codes]
+    sample = shuffled[keep]
+    return sample, pd.Series((sizes / allocation)[codes[keep]], index=sample.index)
+
+
+def mean_confidence_interval(values, population_size, z=Z_95):
+    """
+    Confidence interval for a population mean estimated from a sample
+
+    Uses the normal approximation with finite population correction.
+
+    Returns:
+        dict with estimate, lower, upper, margin (None if not estimable)
+    """
+    values = pd.to_numeric(values, errors='coerce').dropna()
+    n = len(values)
+    if n < 2:
+        return None
+
+    mean = float(values.mean())
+    fpc = np.sqrt(max(population_size - n, 0) / (population_size - 1)) if population_size > 1 else 0.0
+    margin = z * float(values.std()) / np.sqrt(n) * fpc
+
+    return {
+        'estimate': round(mean, 2),
+        'lower': round(mean - margin, 2),
+        'upper': round(mean + margin, 2),
+        'margin': round(margin, 2)
+    }
+
+
+def total_confidence_interval(values, weights, strata, z=Z_95):
+    """
+    Confidence interval for a population total from a stratified sample
+
+    The estimate is sum(w_i * y_i) with w_i = N_h / n_h; its variance is
+    sum_h N_h^2 (1 - n_h/N_h) s_h^2 / n_h (stratum variances with finite
+    population correction).
+
+    Returns:
+        dict with estimate, lower, upper, margin
+    """
+    values = pd.Series(np.asarray(values, dtype=float), index=weights.index)
+    groups = pd.DataFrame({'y': values, 'w': weights}).groupby(np.asarray(strata), sort=False)
+    n_h = groups['y'].size()
+    N_h = groups['w'].first() * n_h
+    s2_h = groups['y'].var().fillna(0.0)
+
+    estimate = float((values * weights).sum())
+    margin = z * float(np.sqrt((N_h ** 2 * (1 - n_h / N_h) * s2_h / n_h).sum()))
+    return {
+        'estimate': int(round(estimate)),
+        'lower': int(max(round(estimate - margin), 0)),
+        'upper': int(round(estimate + margin)),
+        'margin': int(round(margin))
+    }
+
+
+def estimate_summary_stats(sample, weights, population_size, strata_col=None):
+    """
+    Generate summary stats on a sample and extrapolate them to the full dataset
+
+    Counts and sums are weighted per stratum (weights from stratified_sample).
+    Duplicates can only be counted within the sample, so duplicate_rows is
+    the sample's count and is listed in 'lower_bounds'.
+
+    Returns:
+        stats dict in the generate_summary_stats format, plus
+        'confidence_intervals' (95%) for average_salary and missing_values
+    """
+    stats = generate_summary_stats(sample)
+    n = len(sample)
+
+    stats['total_rows'] = population_size
+    stats['total_records'] = population_size
+
+    if strata_col and strata_col in sample.columns:
+        strata, _ = pd.factorize(sample[strata_col], use_na_sentinel=False)
+    else:
+        strata = np.zeros(n, dtype=np.int64)
+
+    # Missing cells per row, extrapolated as a stratified total
+    intervals = {'missing_values': total_confidence_interval(sample.isnull().sum(axis=1), weights, strata)}
+    stats['missing_values'] = intervals['missing_values']['estimate']
+    cells = population_size * len(sample.columns)
+    stats['missing_percentage'] = round(min(stats['missing_values'] / cells * 100, 100), 2) if cells else 0
+    stats['data_completeness'] = round(100 - stats['missing_percentage'], 2)
+    stats['lower_bounds'] = ['duplicate_rows']
+
+    for col, col_stats in stats.get('numeric_stats', {}).items():
+        col_stats['total'] = round(float((pd.to_numeric(sample[col], errors='coerce') * weights).sum()), 2)
+
+    salary_col = stats['detected_columns'].get('salary')
+    if not salary_col:
+        numeric = detect_column_types(sample)['numeric']
+        salary_col = numeric[0] if numeric else None
+    if salary_col:
+        intervals['average_salary'] = mean_confidence_interval(sample[salary_col], population_size)
+
+    stats['confidence_intervals'] = {k: v for k, v in intervals.items() if v is not None}
+    stats['sample_rows'] = n
+    return stats
+
+
+def progressive_analytics(df, sample_size=None, threshold=None):
+    """
+    Generate auto-mode analytics progressively
+
+    Yields one payload per phase. Datasets above `threshold` rows first get
+    an 'approximate' phase computed on a stratified sample (stratified by the
+    detected department/category column), followed by the 'exact' phase over
+    all rows. Smaller datasets only yield the exact phase.
+
+    Each payload has the same shape as /upload/api/analyze-auto
+    (stats, charts, insights) plus 'phase' and 'final'.
+    """
+    sample_size = sample_size or Config.PROGRESSIVE_SAMPLE_ROWS
+    threshold = threshold or Config.PROGRESSIVE_THRESHOLD_ROWS
+    population_size = len(df)
+
+    if population_size > threshold and sample_size < population_size:
+        strata_col = find_column_by_keywords(df, DEPARTMENT_KEYWORDS)
+        sample, weights = stratified_sample(df, strata_col, sample_size)
+
+        stats = estimate_summary_stats(sample, weights, population_size, strata_col)
+        charts = create_auto_charts(sample.copy(), scale=weights)
+        for chart in charts:
+            chart['approximate'] = True
+
+        yield {
+            'success': True,
+            'phase': 'approximate',
+            'final': False,
+            'stats': stats,
+            'charts': charts,
+            'insights': generate_insights_text(stats)
+        }
+
+    stats = generate_summary_stats(df)
+    yield {
+        'success': True,
+        'phase': 'exact',
+        'final': True,
+        'stats': stats,
+        'charts': create_auto_charts(df),
+        'insights': generate_insights_text(stats)
+    }
@@ -33,32 +33,75 @@ def get_user_projects(user_id, status=None):
     """
     Get all projects for a user
     Optionally filter by status
+    
+    Each project carries dataset_count, dashboard_count and last_activity_at,
+    aggregated in the same query (no per-project COUNT round trips).
     """
     try:
-        query = "SELECT * FROM projects WHERE user_id = %s"
-        params = [user_id]
+        query = """
+            SELECT p.*,
+                   COALESCE(ds.dataset_count, 0) AS dataset_count,
+                   COALESCE(db.dashboard_count, 0) AS dashboard_count,
+                   GREATEST(p.updated_at,
+                            COALESCE(ds.last_dataset_at, p.updated_at),
+                            COALESCE(db.last_dashboard_at, p.updated_at)) AS last_activity_at
+            FROM projects p
+            LEFT JOIN (
+                SELECT d.project_id, COUNT(*) AS dataset_count, MAX(d.updated_at) AS last_dataset_at
+                FROM datasets d
+                JOIN projects dp ON dp.id = d.project_id
+                WHERE dp.user_id = %s
+                GROUP BY d.project_id
+            ) ds ON ds.project_id = p.id
+            LEFT JOIN (
+                SELECT b.project_id, COUNT(*) AS dashboard_count, MAX(b.updated_at) AS last_dashboard_at
+                FROM dashboards b
+                JOIN projects bp ON bp.id = b.project_id
+                WHERE bp.user_id = %s
+                GROUP BY b.project_id
+            ) db ON db.project_id = p.id
+            WHERE p.user_id = %s
+        """
+        params = [user_id, user_id, user_id]
         
         if status:
-            query += " AND status = %s"
+            query += " AND p.status = %s"
             params.append(status)
         
-        query += " ORDER BY created_at DESC"
+        query += " ORDER BY p.created_at DESC"
         
         projects = execute_query(query, tuple(params), fetch=True)
-        
-        # Add dataset count for each project
-        if projects:
-            for project in projects:
-                count_query = "SELECT COUNT(*) as count FROM datasets WHERE project_id = %s"
-                result = execute_query(count_query, (project['id'],), fetch=True)
-                project['dataset_count'] = result[0]['count'] if result else 0
-        
         return projects or []
         
     except Exception as e:
         print(f"Error getting user projects: {str(e)}")
         return []
 
+def get_user_dataset_count(user_id):
+    """Count a user's datasets without fetching them"""
+    try:
+        result = execute_query("SELECT COUNT(*) AS count FROM datasets WHERE user_id = %s", (user_id,), fetch=True)
+        return result[0]['count'] if result else 0
+    except Exception as e:
+        print(f"Error counting datasets: {str(e)}")
+        return 0
+
+def get_project_summary(user_id, status=None):
+    """
+    Projects with their counts plus user-level totals
+    Returns dict with 'projects' and 'totals'
+    """
+    projects = get_user_projects(user_id, status)
+    return {
+        'projects': projects,
+        'totals': {
+            'projects': len(projects),
+            'active_projects': sum(1 for p in projects if p.get('status') == 'active'),
+            'datasets': get_user_dataset_count(user_id),
+            'dashboards': sum(int(p['dashboard_count']) for p in projects)
+        }
+    }
+
 def get_project_by_id(project_id):
     """
     Get a single project by ID
@@ -1,12 +1,13 @@
 import time
 from services.db_service import update_prompt_response
+from services.query_planner_service import answer_dataset_question
 
 def process_prompt(prompt_id, prompt_text, dataset_id=None):
     """
     Process user prompt and generate response
     
-    This is a placeholder for future LLM integration.
-    Currently returns a mock response.
+    Questions about a dataset are answered by the offline query planner;
+    anything else gets a mock response until an LLM is integrated.
     """
     start_time = time.time()
     
@@ -40,7 +41,14 @@ def process_prompt(prompt_id, prompt_text, dataset_id=None):
         return False, str(e)
 
 def generate_mock_response(prompt_text, dataset_id=None):
-    """Generate a mock response (placeholder for LLM)"""
+    """Answer from the dataset when the query planner understands the prompt, else a mock response"""
+    if dataset_id:
+        try:
+            result = answer_dataset_question(dataset_id, prompt_text)
+            if result['understood']:
+                return result['answer']
+        except RuntimeError as e:
+            print(f"Query planner error: {e}")
     
     responses = {
         'summary': f"Based on your query '{prompt_text}', here's a summary of the dataset. [This is a mock response - LLM integration pending]",
@@ -0,0 +1,489 @@
+"""
+Query Planner Service
+Offline natural-language questions -> aggregation plans -> vectorized answers
+
+Common question shapes are recognised with regular expressions and their
+column phrases are resolved against the dataset schema (get_dataset_schema
+or a stored profile):
+
+    "average salary by department"       aggregate (mean/sum/min/max/median/count) by a column
+    "top 5 departments by salary"        top/bottom N groups of a measure
+    "trend of salary over time"          measure or row count per month/quarter/year
+    "count where department = sales"     filtered row count
+    "... where gender is F and ..."      filters on any shape
+
+Plans are cached per (normalized question, schema fingerprint), so a repeated
+question skips parsing and schema matching and only runs the pandas groupby.
+A plan keeps condition values as typed; they are matched to the spelling of
+the data being queried when the plan runs, since datasets sharing a schema
+can spell the same value differently ('Sales' / 'SALES').
+"""
+import difflib
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+import pandas as pd
+from config import Config
+from services.db_service import get_dataset_by_id
+from services.profile_service import get_dataset_profile, profile_to_schema
+from services.ai_prompts_service import get_dataset_schema
+from services.grid_service import filter_mask, frame_value, is_numeric_column
+from services.dataset_backend import get_dataset_backend
+from services.tiering_service import ensure_dataset_hot
+
+# Words that select an aggregation - longer forms first so the regex prefers "sum of" over "sum"
+AGGREGATE_WORDS = OrderedDict([
+    ('number of', 'count'), ('count of', 'count'), ('sum of', 'sum'), ('average', 'mean'),
+    ('avg', 'mean'), ('mean', 'mean'), ('total', 'sum'), ('sum', 'sum'), ('maximum', 'max'),
+    ('max', 'max'), ('highest', 'max'), ('minimum', 'min'), ('min', 'min'), ('lowest', 'min'),
+    ('median', 'median'), ('count', 'count')
+])
+
+DATE_GRAINS = {'day': 'D', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+
+MEASURE_LABELS = {'mean': 'Average', 'sum': 'Total', 'max': 'Max', 'min': 'Min', 'median': 'Median', 'count': 'Count of'}
+
+ISO_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+_AGG = '|'.join(re.escape(word) for word in AGGREGATE_WORDS)
+_GRAIN = r'(?P<grain>day|month|quarter|year)s?'
+
+FILLER_PATTERN = re.compile(r"^(?:(?:please|what is|what's|what are|show me|show|give me|list|find|tell me|plot|compute|calculate)\s+)+(?:the\s+)?")
+WHERE_PATTERN = re.compile(r'^(?P<body>.+?)\s+(?:where|with|for which|when|for)\s+(?P<conditions>.+?\s*(?:=|==|!=|>=|<=|>|<|\bis\b|\bequals\b).+)$')
+CONDITION_PATTERN = re.compile(r'^(?P<column>.+?)\s*(?P<op>==|!=|>=|<=|=|>|<|\bis not\b|\bis\b|\bequals\b)\s*(?P<value>.+)$')
+
+TOP_PATTERN = re.compile(rf'^(?P<direction>top|bottom)\s+(?P<n>\d+)\s+(?P<group>.+?)\s+by\s+(?:(?P<agg>{_AGG})\s+(?:of\s+)?)?(?P<measure>.+)$')
+TREND_PATTERN = re.compile(rf'^(?:trend|evolution|growth|change)\s+(?:of|in)\s+(?P<measure>.+?)(?:\s+(?:over|by|per)\s+(?:time|{_GRAIN}))?$')
+OVER_TIME_PATTERN = re.compile(rf'^(?:(?P<agg>{_AGG})\s+(?:of\s+)?)?(?P<measure>.+?)\s+(?:over|by|per)\s+(?:time|{_GRAIN})$')
+COUNT_PATTERN = re.compile(r'^(?:count|how many|number of)(?:\s+(?:of\s+)?(?P<what>.+?))?(?:\s+(?:are there|are|is|there are))?$')
+AGGREGATE_PATTERN = re.compile(rf'^(?P<agg>{_AGG})\s+(?:of\s+)?(?P<measure>.+?)(?:\s+(?:by|per|for each|across|grouped by|in each)\s+(?P<group>.+))?$')
+COUNT_BY_PATTERN = re.compile(r'^(?:count|how many|number of)(?:\s+(?:of\s+)?(?P<what>.+?))?\s+(?:by|per|for each|in each|across)\s+(?P<group>.+)$')
+
+SUPPORTED_SHAPES = [
+    'average <measure> by <column>',
+    'top <N> <column> by <measure>',
+    'trend of <measure> over time',
+    'count where <column> = <value>'
+]
+
+# (normalized question, schema fingerprint) -> plan, least recently used first
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+# ============================================================================
+# Schema matching
+# ============================================================================
+
+def normalize_question(question):
+    text = re.sub(r'\s+', ' ', str(question or '').lower()).strip()
+    return text.rstrip('?.! ')
+
+
+def schema_fingerprint(schema):
+    """Hash of the column names and types a plan was resolved against"""
+    columns = [[col['name'], str(col.get('type'))] for col in schema['columns']]
+    return hashlib.sha1(json.dumps(columns).encode('utf-8')).hexdigest()
+
+
+def frame_schema_fingerprint(df):
+    """schema_fingerprint of get_dataset_schema(df) without computing the schema"""
+    return schema_fingerprint({'columns': [{'name': col, 'type': str(df[col].dtype)} for col in df.columns]})
+
+
+def _column_kind(col):
+    if 'mean' in col:
+        return 'numeric'
+    samples = [v for v in col.get('sample_values') or [] if v is not None]
+    if str(col.get('type', '')).startswith('datetime') or (
+            samples and all(isinstance(v, str) and ISO_DATE_PATTERN.match(v) for v in samples)):
+        return 'date'
+    return 'categorical'
+
+
+def _words(text):
+    words = re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).split()
+    singular = []
+    for word in words:
+        if word.endswith('ies') and len(word) > 4:
+            word = word[:-3] + 'y'
+        elif word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+            word = word[:-1]
+        singular.append(word)
+    return ' '.join(singular)
+
+
+def match_column(phrase, schema, kinds=None):
+    """Schema column named by a phrase ('departments' -> 'department'), or None"""
+    phrase = re.sub(r'^(?:the|each|all|every)\s+', '', phrase.strip())
+    candidates = [col for col in schema['columns'] if kinds is None or _column_kind(col) in kinds]
+    if not phrase or not candidates:
+        return None
+
+    key = _words(phrase)
+    names = {_words(col['name']): col for col in candidates}
+    if key in names:
+        return names[key]['name']
+
+    # Every word of the phrase in the column name (or the reverse)
+    key_words = set(key.split())
+    for name, col in names.items():
+        if key_words and (key_words <= set(name.split()) or set(name.split()) <= key_words):
+            return col['name']
+
+    # Abbreviations - the phrase's letters in order within one word ('dept' -> 'department')
+    if len(key) >= 3 and ' ' not in key:
+        for name, col in names.items():
+            for word in name.split():
+                letters = iter(word)
+                if word[0] == key[0] and all(char in letters for char in key):
+                    return col['name']
+
+    close = difflib.get_close_matches(key, list(names), n=1, cutoff=0.75)
+    return names[close[0]]['name'] if close else None
+
+
+CONDITION_OPERATORS = {'=': 'eq', '==': 'eq', 'is': 'eq', 'equals': 'eq', '!=': 'ne', 'is not': 'ne',
+                       '>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte'}
+
+
+def _parse_conditions(text, schema):
+    """[[column, op, value as typed], ...] from 'a = x and b > 3', or None if a column is unknown"""
+    conditions = []
+    for part in re.split(r'\s+and\s+', text):
+        match = CONDITION_PATTERN.match(part.strip())
+        if not match:
+            return None
+        name = match_column(match.group('column'), schema)
+        if not name:
+            return None
+        op = CONDITION_OPERATORS[match.group('op')]
+        # The filter format holds one exclusion per column
+        if op == 'ne' and any(c[0] == name and c[1] == 'ne' for c in conditions):
+            return None
+        conditions.append([name, op, match.group('value').strip().strip('\'"')])
+    return conditions
+
+
+def _typed_value(raw, numeric, spellings):
+    """
+    A condition value as the data stores it
+
+    Args:
+        numeric: the column is numeric (the value is parsed as a number)
+        spellings: callable returning the column's values equal to raw ignoring case
+    """
+    if numeric:
+        try:
+            return float(raw) if '.' in raw else int(raw)
+        except ValueError:
+            return raw
+    matches = spellings(raw)
+    return frame_value(matches[0]) if len(matches) else raw
+
+
+def resolve_filters(conditions, numeric_columns, spellings):
+    """
+    Plan conditions as grid_service filters ({column: {op: value}}), ANDed
+
+    Returns:
+        filters dict, or None when the conditions contradict each other
+        (e.g. 'department = HR and department = IT') and no row can match
+    """
+    filters = {}
+    for column, op, raw in conditions:
+        value = _typed_value(raw, column in numeric_columns, lambda text: spellings(column, text))
+        condition = filters.setdefault(column, {})
+        if op not in condition:
+            condition[op] = value
+        elif op in ('gt', 'gte'):
+            condition[op] = max(condition[op], value)
+        elif op in ('lt', 'lte'):
+            condition[op] = min(condition[op], value)
+        elif condition[op] != value:
+            # Two different values for one column's eq - nothing can match
+            return None
+    return filters
+
+
+def _date_column(schema):
+    return next((col['name'] for col in schema['columns'] if _column_kind(col) == 'date'), None)
+
+
+# ============================================================================
+# Planning
+# ============================================================================
+
+def _measure(phrase, agg, schema):
+    """(measure column or None for row counts, agg) - None if the phrase names nothing"""
+    column = match_column(phrase, schema, kinds=('numeric',))
+    if column:
+        return column, agg or 'mean'
+    if agg in (None, 'count'):
+        # "number of employees", "count of orders" - count rows
+        return None, 'count'
+    return False, agg
+
+
+def plan_question(question, schema):
+    """
+    Parse a question into an executable plan
+
+    Returns:
+        plan dict ({'op': 'aggregate'|'top'|'trend'|'count', ...}) or None
+        when the question matches no supported shape
+    """
+    text = FILLER_PATTERN.sub('', normalize_question(question))
+    conditions = []
+    where = WHERE_PATTERN.match(text)
+    if where:
+        conditions = _parse_conditions(where.group('conditions'), schema)
+        if conditions is None:
+            return None
+        text = where.group('body')
+
+    match = TOP_PATTERN.match(text)
+    if match:
+        group = match_column(match.group('group'), schema, kinds=('categorical', 'date'))
+        agg = AGGREGATE_WORDS.get(match.group('agg'))
+        measure, agg = _measure(match.group('measure'), agg, schema)
+        if group and measure is not False:
+            return {'op': 'top', 'group_by': group, 'measure': measure, 'agg': agg,
+                    'n': int(match.group('n')), 'ascending': match.group('direction') == 'bottom',
+                    'conditions': conditions}
+
+    match = TREND_PATTERN.match(text) or OVER_TIME_PATTERN.match(text)
+    date_col = _date_column(schema)
+    if match and date_col:
+        agg = AGGREGATE_WORDS.get(match.groupdict().get('agg'))
+        measure, agg = _measure(match.group('measure'), agg or ('mean' if TREND_PATTERN.match(text) else None), schema)
+        if measure is not False:
+            return {'op': 'trend', 'date_column': date_col, 'grain': match.group('grain') or 'month',
+                    'measure': measure, 'agg': agg, 'conditions': conditions}
+
+    match = COUNT_BY_PATTERN.match(text)
+    if match:
+        group = match_column(match.group('group'), schema, kinds=('categorical', 'date'))
+        if group:
+            return {'op': 'aggregate', 'group_by': group, 'measure': None, 'agg': 'count', 'conditions': conditions}
+
+    match = COUNT_PATTERN.match(text)
+    if match:
+        return {'op': 'count', 'measure': None, 'agg': 'count', 'conditions': conditions}
+
+    match = AGGREGATE_PATTERN.match(text)
+    if match:
+        measure, agg = _measure(match.group('measure'), AGGREGATE_WORDS[match.group('agg')], schema)
+        if measure is False:
+            return None
+        group_phrase = match.group('group')
+        if group_phrase is None:
+            return {'op': 'aggregate', 'group_by': None, 'measure': measure, 'agg': agg, 'conditions': conditions}
+        grain = re.sub(r's$', '', group_phrase.strip())
+        if grain in DATE_GRAINS and date_col:
+            return {'op': 'trend', 'date_column': date_col, 'grain': grain,
+                    'measure': measure, 'agg': agg, 'conditions': conditions}
+        group = match_column(group_phrase, schema, kinds=('categorical', 'date'))
+        if group:
+            return {'op': 'aggregate', 'group_by': group, 'measure': measure, 'agg': agg, 'conditions': conditions}
+
+    return None
+
+
+def get_query_plan(question, fingerprint, schema_source):
+    """
+    Cached plan_question
+
+    Args:
+        fingerprint: schema_fingerprint of the schema
+        schema_source: the schema, or a callable returning it (only called on a cache miss)
+
+    Returns:
+        (plan or None, cached: bool)
+    """
+    key = (normalize_question(question), fingerprint)
+    with _plans_lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key], True
+
+    schema = schema_source() if callable(schema_source) else schema_source
+    plan = plan_question(question, schema)
+    with _plans_lock:
+        _plans[key] = plan
+        _plans.move_to_end(key)
+        while len(_plans) > Config.QUERY_PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan, False
+
+
+def plan_columns(plan):
+    """Dataset columns a plan reads (for loading only what it needs)"""
+    columns = [plan.get('group_by'), plan.get('date_column'), plan.get('measure')]
+    columns += [column for column, _, _ in plan['conditions']]
+    return [col for col in dict.fromkeys(columns) if col]
+
+
+# ============================================================================
+# Execution
+# ============================================================================
+
+def _label(text):
+    return str(text).replace('_', ' ').title()
+
+
+def _measure_label(plan):
+    if plan['measure'] is None:
+        return 'Count'
+    return f"{MEASURE_LABELS[plan['agg']]} {_label(plan['measure'])}"
+
+
+def _grouped(df, keys, plan):
+    if plan['measure'] is None:
+        return df.groupby(keys, sort=True).size()
+    values = df[plan['measure']] if plan['agg'] == 'count' else pd.to_numeric(df[plan['measure']], errors='coerce')
+    return values.groupby(keys, sort=True).agg(plan['agg'])
+
+
+def execute_plan(plan, df, filters):
+    """
+    Run a plan against a DataFrame with vectorized pandas operations
+
+    Args:
+        filters: resolve_filters result for the plan's conditions (None
+            when they contradict each other - no row matches)
+
+    Returns:
+        dict with columns, rows, answer (one sentence) and chart (Chart.js
+        config or None)
+    """
+    rows_df = df.iloc[:0] if filters is None else df[filter_mask(df, filters, df.columns)]
+    label = _measure_label(plan)
+
+    if plan['op'] == 'count':
+        count = len(rows_df)
+        return {'columns': ['count'], 'rows': [[count]], 'answer': f"{count:,} rows match.", 'chart': None}
+
+    if plan['op'] == 'aggregate' and plan['group_by'] is None:
+        if plan['measure'] is None:
+            value = len(rows_df)
+        elif plan['agg'] == 'count':
+            value = int(rows_df[plan['measure']].notna().sum())
+        else:
+            value = frame_value(pd.to_numeric(rows_df[plan['measure']], errors='coerce').agg(plan['agg']))
+            value = round(value, 2) if isinstance(value, float) else value
+        return {'columns': [label], 'rows': [[value]], 'answer': f"{label}: {value}", 'chart': None}
+
+    if plan['op'] == 'trend':
+        dates = pd.to_datetime(rows_df[plan['date_column']], errors='coerce')
+        periods = dates.dt.to_period(DATE_GRAINS[plan['grain']]).astype(str).where(dates.notna())
+        series = _grouped(rows_df, periods, plan)
+        chart_type, title = 'line', f"{label} by {_label(plan['grain'])}"
+    else:
+        series = _grouped(rows_df, rows_df[plan['group_by']], plan).dropna()
+        series = series.sort_values(ascending=plan.get('ascending', False), kind='stable')
+        series = series.head(plan['n'] if plan['op'] == 'top' else Config.QUERY_MAX_GROUPS)
+        chart_type, title = 'bar', f"{label} by {_label(plan['group_by'])}"
+
+    labels = [str(frame_value(key)) for key in series.index]
+    values = [None if pd.isna(v) else int(v) if float(v).is_integer() else round(float(v), 2)
+              for v in series.to_numpy(dtype=float)]
+    if series.empty:
+        answer = "No rows match the question."
+    elif plan['op'] == 'trend':
+        answer = f"{title}: from {values[0]} in {labels[0]} to {values[-1]} in {labels[-1]}."
+    else:
+        answer = f"{title}: {labels[0]} is {'lowest' if plan.get('ascending') else 'highest'} at {values[0]}."
+
+    return {
+        'columns': [plan.get('group_by') or plan['grain'], label],
+        'rows': [[key, value] for key, value in zip(labels, values)],
+        'answer': answer,
+        'chart': {
+            'type': chart_type,
+            'title': title,
+            'data': {
+                'labels': labels,
+                'datasets': [{
+                    'label': label,
+                    'data': values,
+                    'backgroundColor': 'rgba(99, 102, 241, 0.6)',
+                    'borderColor': 'rgba(99, 102, 241, 1)',
+                    'borderWidth': 2
+                }]
+            }
+        }
+    }
+
+
+def _not_understood(cached):
+    return {
+        'understood': False,
+        'plan': None,
+        'plan_cached': cached,
+        'answer': "I couldn't map that question onto the dataset. Try: " + '; '.join(SUPPORTED_SHAPES)
+    }
+
+
+def answer_question(question, df):
+    """
+    Plan (cached) and answer a question about an in-memory DataFrame
+
+    Returns:
+        dict with understood, plan, plan_cached and the execute_plan result
+        (or a message listing the supported question shapes)
+    """
+    plan, cached = get_query_plan(question, frame_schema_fingerprint(df), lambda: get_dataset_schema(df))
+    if plan is None:
+        return _not_understood(cached)
+
+    def spellings(column, text):
+        values = df[column].dropna()
+        return values[values.astype(str).str.lower() == text.lower()].unique()[:1]
+
+    numeric = {col for col in df.columns if is_numeric_column(df[col])}
+    filters = resolve_filters(plan['conditions'], numeric, spellings)
+    return {'understood': True, 'plan': plan, 'plan_cached': cached, 'filters': filters,
+            **execute_plan(plan, df, filters)}
+
+
+def answer_dataset_question(dataset_id, question):
+    """
+    answer_question for a stored dataset
+
+    The plan is resolved against the stored profile, then only the columns
+    it reads are loaded from the dataset backend with its filters pushed down.
+    Condition values take the spelling of this dataset's profiled values.
+    Raises RuntimeError when the dataset cannot be read.
+    """
+    profile = get_dataset_profile(dataset_id)
+    if not profile:
+        raise RuntimeError("Dataset has no profile")
+    schema = profile_to_schema(profile)
+    plan, cached = get_query_plan(question, schema_fingerprint(schema), schema)
+    if plan is None:
+        return _not_understood(cached)
+
+    profiled = {col['name']: col for col in schema['columns']}
+
+    def spellings(column, text):
+        known = list(profiled[column].get('top_values') or []) + list(profiled[column].get('sample_values') or [])
+        return [value for value in known if str(value).lower() == text.lower()][:1]
+
+    numeric = {name for name, col in profiled.items() if _column_kind(col) == 'numeric'}
+    filters = resolve_filters(plan['conditions'], numeric, spellings)
+    # A plain row count reads no column of its own - load the narrowest one
+    columns = plan_columns(plan) or [schema['columns'][0]['name']]
+    if filters is None:
+        df = pd.DataFrame(columns=columns)
+    else:
+        dataset = ensure_dataset_hot(get_dataset_by_id(dataset_id))
+        if not dataset or not dataset.get('table_name'):
+            raise RuntimeError("Dataset not found or not processed")
+        df = get_dataset_backend().load(dataset['table_name'], columns, filters)
+        if df is None:
+            raise RuntimeError("Failed to read the dataset rows")
+    return {'understood': True, 'plan': plan, 'plan_cached': cached, 'filters': filters,
+            **execute_plan(plan, df, filters)}
@@ -0,0 +1,366 @@
+"""
+Rollup Service
+Materializes a compact aggregate cube (category x month x low-cardinality columns)
+next to each dataset table so charts, filters and drill-downs skip the base table
+"""
+import numpy as np
+import pandas as pd
+from config import Config
+from services.db_service import get_db_connection, execute_query, staging_table_name, swap_in_table
+from services.metadata_service import get_dataset_metadata, set_dataset_metadata
+from utils.sketch_utils import nunique_below
+from services.auto_analytics_service import (
+    detect_column_types,
+    resolve_chart_columns,
+    build_count_chart,
+    build_average_chart,
+    build_trend_chart,
+    build_share_chart,
+    build_top_chart,
+    build_cumulative_chart,
+    build_stacked_chart,
+    build_radar_chart
+)
+
+ROLLUP_METADATA_KEY = 'rollup'
+
+# Name of the derived month dimension (YYYY-MM) in the cube
+MONTH_DIMENSION = 'rollup_month'
+
+# Extra dimensions must have at most this many distinct values
+ROLLUP_MAX_CARDINALITY = 12
+
+# Stop adding dimensions once the estimated cube size passes this many cells
+ROLLUP_MAX_CELLS = 200000
+
+# Numeric columns aggregated in the cube
+ROLLUP_MAX_MEASURES = 6
+
+AGGREGATES = ['count', 'sum', 'sumsq', 'min', 'max']
+
+
+def get_rollup_table_name(table_name):
+    """Rollup table name for a dataset table (kept within MySQL's 64 chars)"""
+    return f"{table_name[:57]}_rollup"
+
+
+def plan_rollup(df):
+    """
+    Choose cube dimensions and measures from the dataset
+
+    Dimensions: the chart category column, the month of the chart date column,
+    then other low-cardinality columns while the cube stays small.
+    Measures: the chart measure column plus the first numeric columns.
+
+    Returns:
+        dict spec with 'dimensions', 'measures' and 'date_column'
+    """
+    col_types = detect_column_types(df)
+    dept_col, sal_col, dt_col = resolve_chart_columns(df, col_types)
+
+    dimensions = []
+    cells = 1
+    if dept_col:
+        dimensions.append(dept_col)
+        cells *= max(int(df[dept_col].nunique()), 1)
+
+    date_column = None
+    if dt_col:
+        months = pd.to_datetime(df[dt_col], errors='coerce').dt.to_period('M')
+        if months.notna().any():
+            date_column = dt_col
+            dimensions.append(MONTH_DIMENSION)
+            cells *= max(int(months.nunique()), 1)
+
+    for col in col_types['categorical']:
+        if col in dimensions or col == dt_col:
+            continue
+        if not nunique_below(df[col], ROLLUP_MAX_CARDINALITY + 1):
+            continue
+        cardinality = int(df[col].nunique())
+        # Near-unique columns (names, ids) would not compress anything
+        if cardinality * 2 > len(df):
+            continue
+        if cells * cardinality > ROLLUP_MAX_CELLS:
+            continue
+        dimensions.append(col)
+        cells *= max(cardinality, 1)
+
+    measures = list(dict.fromkeys(([sal_col] if sal_col else []) + col_types['numeric']))[:ROLLUP_MAX_MEASURES]
+
+    measure_columns = {}
+    for i, col in enumerate(measures):
+        prefix = col if len(col) <= 56 else f"m{i}"
+        measure_columns[col] = {agg: f"{prefix}_{agg}" for agg in AGGREGATES}
+
+    return {
+        'dimensions': dimensions,
+        'date_column': date_column,
+        'measures': measures,
+        'measure_columns': measure_columns,
+        'chart_columns': {'department': dept_col, 'salary': sal_col, 'date': dt_col},
+        'numeric_columns': col_types['numeric']
+    }
+
+
+def build_rollup_frame(df, spec):
+    """Aggregate the dataset into one row per dimension combination"""
+    frame = pd.DataFrame(index=df.index)
+    for dim in spec['dimensions']:
+        if dim == MONTH_DIMENSION:
+            frame[dim] = pd.to_datetime(df[spec['date_column']], errors='coerce').dt.strftime('%Y-%m')
+        else:
+            frame[dim] = df[dim].astype(str).where(df[dim].notna())
+
+    value_columns = []
+    for col in spec['measures']:
+        values = pd.to_numeric(df[col], errors='coerce').astype(float)
+        names = spec['measure_columns'][col]
+        frame[names['count']] = values.notna().astype(np.int64)
+        frame[names['sum']] = values.fillna(0.0)
+        frame[names['sumsq']] = np.square(values).fillna(0.0)
+        frame[names['min']] = values
+        frame[names['max']] = values
+        value_columns.append(names)
+
+    frame['row_count'] = 1
+
+    agg = {'row_count': 'sum'}
+    for names in value_columns:
+        agg.update({names['count']: 'sum', names['sum']: 'sum', names['sumsq']: 'sum',
+                    names['min']: 'min', names['max']: 'max'})
+
+    if not spec['dimensions']:
+        return frame.agg(agg).to_frame().T
+
+    return frame.groupby(spec['dimensions'], dropna=False, sort=False).agg(agg).reset_index()
+
+
+def store_rollup(rollup_df, rollup_table, spec):
+    """Load the cube rows into a staging table and swap it in place of the rollup table"""
+    connection = get_db_connection()
+    if not connection:
+        return 0
+
+    staging_table = staging_table_name(rollup_table)
+    try:
+        cursor = connection.cursor()
+
+        column_defs = [f"`{dim}` VARCHAR(255) NULL" for dim in spec['dimensions']]
+        column_defs.append("row_count BIGINT NOT NULL")
+        for col in spec['measures']:
+            names = spec['measure_columns'][col]
+            column_defs.append(f"`{names['count']}` BIGINT NOT NULL")
+            column_defs.extend(f"`{names[agg]}` DOUBLE NULL" for agg in ('sum', 'sumsq', 'min', 'max'))
+        if spec['dimensions']:
+            index_cols = ', '.join(f"`{dim}`" for dim in spec['dimensions'][:3])
+            column_defs.append(f"INDEX idx_rollup_dims ({index_cols})")
+
+        cursor.execute(
+            f"CREATE TABLE `{staging_table}` ({', '.join(column_defs)}) "
+            f"ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+        )
+
+        columns = list(rollup_df.columns)
+        insert_sql = (
+            f"INSERT INTO `{staging_table}` ({', '.join(f'`{c}`' for c in columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+        rows = rollup_df.astype(object).where(rollup_df.notna(), None).values.tolist()
+        cursor.executemany(insert_sql, rows)
+        connection.commit()
+
+        cursor.close()
+        connection.close()
+
+        if not swap_in_table(staging_table, rollup_table):
+            execute_query(f"DROP TABLE IF EXISTS `{staging_table}`")
+            return 0
+        return len(rows)
+
+    except Exception as e:
+        print(f"Error storing rollup {rollup_table}: {str(e)}")
+        connection.close()
+        execute_query(f"DROP TABLE IF EXISTS `{staging_table}`")
+        return 0
+
+
+def materialize_rollup(df, table_name, dataset_id):
+    """
+    Build and store the rollup cube for a freshly ingested dataset
+
+    Returns:
+        spec dict (also saved in file_metadata) or None on failure
+    """
+    try:
+        spec = plan_rollup(df)
+        rollup_df = build_rollup_frame(df, spec)
+        rollup_table = get_rollup_table_name(table_name)
+
+        cells = store_rollup(rollup_df, rollup_table, spec)
+        spec.update({'table': rollup_table, 'cells': cells, 'source_rows': int(len(df))})
+        set_dataset_metadata(dataset_id, ROLLUP_METADATA_KEY, spec)
+        return spec
+
+    except Exception as e:
+        print(f"Error materializing rollup for {table_name}: {str(e)}")
+        return None
+
+
+def append_to_rollup(dataset_id, df_batch):
+    """
+    Add the cube rows of an appended batch to the rollup table
+
+    Cells for dimension values that already exist are simply added as extra
+    rows; query_rollup re-aggregates them (SUM/MIN/MAX) at read time.
+
+    Returns:
+        updated spec or None if the dataset has no rollup
+    """
+    spec = get_rollup_spec(dataset_id)
+    if not spec or len(df_batch) == 0:
+        return spec
+
+    rollup_df = build_rollup_frame(df_batch, spec)
+    columns = list(rollup_df.columns)
+    insert_sql = (
+        f"INSERT INTO `{spec['table']}` ({', '.join(f'`{c}`' for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    rows = rollup_df.astype(object).where(rollup_df.notna(), None).values.tolist()
+
+    connection = get_db_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor()
+        cursor.executemany(insert_sql, rows)
+        connection.commit()
+        cursor.close()
+    except Exception as e:
+        print(f"Error appending to rollup {spec['table']}: {str(e)}")
+        return None
+    finally:
+        connection.close()
+
+    spec['cells'] = spec.get('cells', 0) + len(rows)
+    spec['source_rows'] = spec.get('source_rows', 0) + int(len(df_batch))
+    set_dataset_metadata(dataset_id, ROLLUP_METADATA_KEY, spec)
+    return spec
+
+
+def get_rollup_spec(dataset_id):
+    return get_dataset_metadata(dataset_id, ROLLUP_METADATA_KEY)
+
+
+def drop_rollup(table_name):
+    execute_query(f"DROP TABLE IF EXISTS `{get_rollup_table_name(table_name)}`")
+
+
+def _build_where(spec, filters):
+    """WHERE clause over cube dimensions; filter values may be scalars or lists"""
+    clauses, params = [], []
+    for col, value in (filters or {}).items():
+        if col not in spec['dimensions']:
+            raise ValueError(f"Cannot filter rollup on '{col}'")
+        values = value if isinstance(value, (list, tuple)) else [value]
+        clauses.append(f"`{col}` IN ({', '.join(['%s'] * len(values))})")
+        params.extend(str(v) for v in values)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query_rollup(spec, group_by, filters=None):
+    """
+    Re-aggregate the cube to the requested dimensions
+
+    Args:
+        spec: rollup spec from get_rollup_spec
+        group_by: list of cube dimensions (may be empty for grand totals)
+        filters: {dimension: value or [values]}
+
+    Returns:
+        DataFrame with group_by columns, row_count, and per measure
+        count/sum/sumsq/min/max plus derived mean and std columns
+    """
+    for col in group_by:
+        if col not in spec['dimensions']:
+            raise ValueError(f"Cannot group rollup by '{col}'")
+
+    selects = [f"`{col}`" for col in group_by] + ["SUM(row_count) AS row_count"]
+    for col in spec['measures']:
+        names = spec['measure_columns'][col]
+        selects += [
+            f"SUM(`{names['count']}`) AS `{names['count']}`",
+            f"SUM(`{names['sum']}`) AS `{names['sum']}`",
+            f"SUM(`{names['sumsq']}`) AS `{names['sumsq']}`",
+            f"MIN(`{names['min']}`) AS `{names['min']}`",
+            f"MAX(`{names['max']}`) AS `{names['max']}`"
+        ]
+
+    where, params = _build_where(spec, filters)
+    query = f"SELECT {', '.join(selects)} FROM `{spec['table']}`{where}"
+    if group_by:
+        query += f" GROUP BY {', '.join(f'`{c}`' for c in group_by)}"
+
+    rows = execute_query(query, tuple(params), fetch=True) or []
+    result = pd.DataFrame(rows, columns=group_by + [s.rsplit(' AS ', 1)[-1].strip('`') for s in selects[len(group_by):]])
+
+    for col in spec['measures']:
+        names = spec['measure_columns'][col]
+        count = pd.to_numeric(result[names['count']]).astype(float)
+        total = pd.to_numeric(result[names['sum']]).astype(float)
+        sumsq = pd.to_numeric(result[names['sumsq']]).astype(float)
+        mean = total / count.where(count > 0)
+        variance = (sumsq - count * mean * mean) / (count - 1).where(count > 1)
+        result[f"{col}_mean"] = mean
+        result[f"{col}_std"] = np.sqrt(variance.clip(lower=0))
+
+    result['row_count'] = pd.to_numeric(result['row_count']).astype(np.int64)
+    return result
+
+
+def charts_from_rollup(spec, filters=None, point_budget=None):
+    """
+    Build the aggregate auto charts from the cube (no base-table scan)
+
+    Quantile charts (box plot) and the scatter plot need row-level data and
+    are not produced here.
+    """
+    point_budget = point_budget or Config.CHART_POINT_BUDGET
+    dept_col = spec['chart_columns']['department']
+    sal_col = spec['chart_columns']['salary']
+    numeric = spec['numeric_columns']
+    has_month = MONTH_DIMENSION in spec['dimensions']
+    charts = []
+
+    if dept_col and dept_col in spec['dimensions']:
+        by_dept = query_rollup(spec, [dept_col], filters).dropna(subset=[dept_col]).set_index(dept_col).sort_index()
+        value_counts = by_dept['row_count'].sort_values(ascending=False, kind='stable')
+
+        charts.append(build_count_chart(value_counts, dept_col))
+        if sal_col in spec['measures']:
+            charts.append(build_average_chart(by_dept[f"{sal_col}_mean"].dropna(), dept_col, sal_col))
+
+        if has_month:
+            by_month = query_rollup(spec, [MONTH_DIMENSION], filters).dropna(subset=[MONTH_DIMENSION])
+            by_month = by_month.set_index(MONTH_DIMENSION).sort_index()
+            charts.append(build_trend_chart(by_month['row_count'], point_budget))
+
+        share_chart = build_share_chart(value_counts, dept_col)
+        if share_chart:
+            charts.append(share_chart)
+        charts.append(build_top_chart(value_counts, dept_col))
+
+        if has_month and sal_col in spec['measures']:
+            charts.append(build_cumulative_chart(by_month[spec['measure_columns'][sal_col]['sum']], sal_col, point_budget))
+
+        if len(numeric) >= 2 and all(col in spec['measures'] for col in numeric[:2]):
+            sums = pd.DataFrame({col: by_dept[spec['measure_columns'][col]['sum']] for col in numeric[:2]})
+            charts.append(build_stacked_chart(sums, dept_col, numeric[0], numeric[1]))
+
+        if len(numeric) >= 3 and all(col in spec['measures'] for col in numeric[:3]):
+            top = value_counts.head(3).index
+            means = pd.DataFrame({col: by_dept.loc[top, f"{col}_mean"] for col in numeric[:3]})
+            charts.append(build_radar_chart(means, dept_col))
+
+    return charts
@@ -0,0 +1,248 @@
+"""
+Tiering Service
+Moves datasets nobody has opened recently out of MySQL into compressed
+columnar files, and brings them back when they are accessed again
+
+A cold dataset keeps its datasets row, file_metadata (profile, stats state,
+rollup spec) and rollup table; only the row table is dropped. The file lives
+in the project's datasets/user_X/project_Y/cleaned folder and the original
+CREATE TABLE statement is kept in metadata so rehydration restores the exact
+schema, indexes and row ids.
+"""
+import os
+from datetime import datetime
+from config import Config
+from services.db_service import (
+    execute_query, get_dataset_by_id, named_lock, staging_table_name, swap_in_table, table_exists,
+    table_used_by_other_dataset
+)
+from services.data_cleaning_service import load_dataset_frame, insert_dataframe_to_mysql
+from services.dataset_backend import get_dataset_backend
+from services.metadata_service import get_dataset_metadata, set_dataset_metadata, delete_dataset_metadata
+from services.project_service import create_project_folders
+from utils.cache_utils import bump_dataset_version
+from utils.columnar_utils import write_columnar, read_columnar
+
+COLD_METADATA_KEY = 'cold_storage'
+
+# Primary key column added by create_table_schema
+ROW_ID_COLUMN = 'id'
+
+
+def mark_dataset_accessed(dataset_id):
+    """Record a read; written at most once per TIER_ACCESS_RESOLUTION_MINUTES per dataset"""
+    execute_query(
+        """
+        UPDATE datasets
+        SET last_accessed_at = NOW(), updated_at = updated_at
+        WHERE id = %s
+          AND (last_accessed_at IS NULL OR last_accessed_at < NOW() - INTERVAL %s MINUTE)
+        """,
+        (dataset_id, Config.TIER_ACCESS_RESOLUTION_MINUTES)
+    )
+
+
+def find_cold_datasets(days=None, limit=None):
+    """Hot datasets whose last access (or creation) is older than `days`"""
+    days = Config.TIER_COLD_AFTER_DAYS if days is None else days
+    query = """
+        SELECT * FROM datasets
+        WHERE storage_tier = 'hot' AND table_name IS NOT NULL
+          AND COALESCE(last_accessed_at, created_at) < NOW() - INTERVAL %s DAY
+        ORDER BY COALESCE(last_accessed_at, created_at)
+    """
+    params = [days]
+    if limit:
+        query += " LIMIT %s"
+        params.append(int(limit))
+    return execute_query(query, tuple(params), fetch=True) or []
+
+
+def _cold_path_base(dataset):
+    """datasets/user_X/project_Y/cleaned/<table> (project_none when unassigned)"""
+    user_id = dataset.get('user_id') or 0
+    project_id = dataset.get('project_id')
+    if project_id:
+        create_project_folders(user_id, project_id)
+    project_dir = f"project_{project_id}" if project_id else 'project_none'
+    return os.path.join(Config.BASE_DIR, 'datasets', f'user_{user_id}', project_dir, 'cleaned', dataset['table_name'])
+
+
+def _tier_lock(dataset_id):
+    """MySQL lock held while a dataset moves between tiers, shared by every worker"""
+    return named_lock(f'tier:{dataset_id}')
+
+
+def tier_out_dataset(dataset):
+    """
+    Write a dataset table to a columnar file and drop the MySQL table
+
+    Returns:
+        (success: bool, message: str)
+    """
+    with _tier_lock(dataset['id']):
+        # Re-read under the lock: another worker may have moved it already
+        dataset = get_dataset_by_id(dataset['id'])
+        if not dataset or dataset.get('storage_tier') != 'hot':
+            return False, "Dataset is not in MySQL"
+        return _tier_out(dataset)
+
+
+def _tier_out(dataset):
+    table_name = dataset['table_name']
+    if not table_exists(table_name):
+        return False, f"Table {table_name} does not exist"
+    if table_used_by_other_dataset(table_name, dataset['id']):
+        return False, f"Table {table_name} is shared with another dataset"
+
+    created = execute_query(f"SHOW CREATE TABLE `{table_name}`", fetch=True)
+    if not created:
+        return False, f"Could not read the schema of {table_name}"
+    create_sql = created[0]['Create Table']
+
+    described = execute_query(f"DESCRIBE `{table_name}`", fetch=True) or []
+    columns = [row['Field'] for row in described]
+    df = load_dataset_frame(table_name, columns)
+    if df is None:
+        return False, f"Could not read {table_name}"
+
+    path = write_columnar(df, _cold_path_base(dataset))
+    if len(read_columnar(path, [ROW_ID_COLUMN])) != len(df):
+        os.remove(path)
+        return False, f"Verification of {path} failed"
+
+    set_dataset_metadata(dataset['id'], COLD_METADATA_KEY, {
+        'path': path,
+        'create_sql': create_sql,
+        'rows': int(len(df)),
+        'file_bytes': os.path.getsize(path),
+        'tiered_at': datetime.now().isoformat()
+    })
+    execute_query(
+        "UPDATE datasets SET storage_tier = 'cold', cold_path = %s, updated_at = updated_at WHERE id = %s",
+        (path, dataset['id'])
+    )
+    execute_query(f"DROP TABLE IF EXISTS `{table_name}`")
+    bump_dataset_version(dataset['id'])
+    return True, f"Moved {len(df)} rows of {table_name} to {path}"
+
+
+def run_tiering(days=None, limit=None):
+    """
+    Tier out every dataset that has been cold for `days`
+
+    Returns:
+        list of {'dataset_id', 'success', 'message'}
+    """
+    # The columnar backend already keeps datasets out of MySQL
+    if get_dataset_backend().name != 'mysql':
+        return []
+
+    results = []
+    for dataset in find_cold_datasets(days, limit or Config.TIER_BATCH_LIMIT):
+        try:
+            success, message = tier_out_dataset(dataset)
+        except Exception as e:
+            success, message = False, f"Error tiering dataset: {str(e)}"
+        results.append({'dataset_id': dataset['id'], 'success': success, 'message': message})
+    return results
+
+
+def rehydrate_dataset(dataset_id):
+    """
+    Restore a cold dataset's MySQL table from its columnar file
+
+    Returns:
+        (success: bool, message: str)
+    """
+    try:
+        with _tier_lock(dataset_id):
+            return _rehydrate(dataset_id)
+    except RuntimeError as e:
+        return False, str(e)
+
+
+def _rehydrate(dataset_id):
+    """rehydrate_dataset body; storage_tier is re-checked since a waiting worker may find it done"""
+    dataset = get_dataset_by_id(dataset_id)
+    if not dataset:
+        return False, "Dataset not found"
+    if dataset.get('storage_tier') != 'cold':
+        return True, "Dataset is already in MySQL"
+
+    cold = get_dataset_metadata(dataset_id, COLD_METADATA_KEY)
+    if not cold or not os.path.exists(cold['path']):
+        return False, "Cold storage file is missing"
+
+    table_name = dataset['table_name']
+    # Never swap over a live table another dataset reads from
+    if table_exists(table_name) and table_used_by_other_dataset(table_name, dataset_id):
+        return False, f"Table {table_name} now belongs to another dataset"
+
+    staging_table = staging_table_name(table_name)
+    create_sql = cold['create_sql'].replace(f"CREATE TABLE `{table_name}`", f"CREATE TABLE `{staging_table}`", 1)
+
+    if execute_query(create_sql) is None:
+        return False, "Failed to recreate the dataset table"
+
+    df = read_columnar(cold['path'])
+    inserted = insert_dataframe_to_mysql(df, staging_table, bulk_load=True)
+    if inserted != len(df) or not swap_in_table(staging_table, table_name):
+        execute_query(f"DROP TABLE IF EXISTS `{staging_table}`")
+        return False, f"Failed to reload the dataset table ({inserted} of {len(df)} rows)"
+
+    execute_query(
+        """
+        UPDATE datasets
+        SET storage_tier = 'hot', cold_path = NULL, last_accessed_at = NOW(), updated_at = updated_at
+        WHERE id = %s
+        """,
+        (dataset_id,)
+    )
+    os.remove(cold['path'])
+    delete_dataset_metadata(dataset_id, COLD_METADATA_KEY)
+    bump_dataset_version(dataset_id)
+    return True, f"Restored {len(df)} rows into {table_name}"
+
+
+def ensure_dataset_hot(dataset):
+    """
+    Make sure a dataset's table is in MySQL before it is queried
+
+    Rehydrates cold datasets and records the access. Returns the dataset
+    dict (updated tier) or None if a cold dataset could not be restored.
+    """
+    if not dataset:
+        return dataset
+    if dataset.get('storage_tier') == 'cold':
+        success, message = rehydrate_dataset(dataset['id'])
+        if not success:
+            print(f"Error rehydrating dataset {dataset['id']}: {message}")
+            return None
+        dataset = dict(dataset, storage_tier='hot', cold_path=None)
+    else:
+        mark_dataset_accessed(dataset['id'])
+    return dataset
+
+
+def read_cold_preview(dataset, limit=10):
+    """First rows straight from the columnar file, without rehydrating"""
+    cold = get_dataset_metadata(dataset['id'], COLD_METADATA_KEY)
+    if not cold or not os.path.exists(cold['path']):
+        return []
+    df = read_columnar(cold['path']).head(limit)
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+def get_dataset_rows_preview(dataset, limit=10):
+    """Preview rows for any tier - cold datasets are read from their file, not rehydrated"""
+    if dataset.get('storage_tier') == 'cold':
+        return read_cold_preview(dataset, limit)
+    mark_dataset_accessed(dataset['id'])
+    return get_dataset_backend().preview(dataset['table_name'], limit=limit)
+
+
+def discard_cold_file(dataset):
+    """Remove the columnar file of a cold dataset that is being deleted"""
+    if dataset.get('storage_tier') == 'cold' and dataset.get('cold_path') and os.path.exists(dataset['cold_path']):
+        os.remove(dataset['cold_path'])
@@ -0,0 +1,104 @@
+"""
+View Tracking Service
+Write-behind buffer for dashboard views - page reads stay read-only and
+view counts / last_viewed_at are flushed in one batched UPDATE
+"""
+import atexit
+import threading
+from datetime import datetime
+from config import Config
+from services.db_service import execute_query
+
+# dashboard_id -> {'views': int, 'last_viewed_at': datetime}
+_pending = {}
+_lock = threading.Lock()
+_flusher = None
+
+
+def record_dashboard_view(dashboard_id):
+    """Buffer one view of a dashboard (coalesced per dashboard until the next flush)"""
+    now = datetime.now()
+    with _lock:
+        entry = _pending.setdefault(dashboard_id, {'views': 0, 'last_viewed_at': now})
+        entry['views'] += 1
+        entry['last_viewed_at'] = max(entry['last_viewed_at'], now)
+        pending_count = len(_pending)
+
+    _ensure_flusher()
+    if pending_count >= Config.VIEW_FLUSH_MAX_PENDING:
+        flush_dashboard_views()
+
+
+def get_pending_views(dashboard_id):
+    """Views recorded for a dashboard that are not in the database yet"""
+    with _lock:
+        entry = _pending.get(dashboard_id)
+        return dict(entry) if entry else None
+
+
+def flush_dashboard_views():
+    """
+    Write every buffered view in a single UPDATE
+
+    Returns:
+        number of dashboards updated (buffered views are kept on failure)
+    """
+    global _pending
+    with _lock:
+        batch, _pending = _pending, {}
+
+    if not batch:
+        return 0
+
+    ids = list(batch)
+    count_cases = ' '.join(['WHEN %s THEN %s'] * len(ids))
+    time_cases = ' '.join(['WHEN %s THEN %s'] * len(ids))
+    placeholders = ', '.join(['%s'] * len(ids))
+    query = f"""
+        UPDATE dashboards
+        SET view_count = COALESCE(view_count, 0) + CASE id {count_cases} ELSE 0 END,
+            last_viewed_at = GREATEST(COALESCE(last_viewed_at, '1970-01-02'), CASE id {time_cases} END)
+        WHERE id IN ({placeholders})
+    """
+
+    params = []
+    for dashboard_id in ids:
+        params.extend([dashboard_id, batch[dashboard_id]['views']])
+    for dashboard_id in ids:
+        params.extend([dashboard_id, batch[dashboard_id]['last_viewed_at']])
+    params.extend(ids)
+
+    if execute_query(query, tuple(params)) is None:
+        # Put the views back so the next flush retries them
+        with _lock:
+            for dashboard_id, entry in batch.items():
+                current = _pending.setdefault(dashboard_id, {'views': 0, 'last_viewed_at': entry['last_viewed_at']})
+                current['views'] += entry['views']
+                current['last_viewed_at'] = max(current['last_viewed_at'], entry['last_viewed_at'])
+        return 0
+
+    return len(ids)
+
+
+def _flush_loop():
+    stop = threading.Event()
+    while not stop.wait(Config.VIEW_FLUSH_INTERVAL):
+        try:
+            flush_dashboard_views()
+        except Exception as e:
+            print(f"Error flushing dashboard views: {str(e)}")
+
+
+def _ensure_flusher():
+    """Start the periodic flush thread on first use"""
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, name='dashboard-view-flusher', daemon=True)
+            _flusher.start()
+
+
+# Write out whatever is still buffered when the process exits
+atexit.register(flush_dashboard_views)
@@ -0,0 +1,74 @@
+"""
+Test Script for Bitmap Cross-Filtering
+Checks packed bitmaps, codes-only selections and per-chart selection
+exclusion against plain pandas masks (no database needed)
+"""
+import numpy as np
+import pandas as pd
+from utils.bitmap_utils import BitmapIndex, _packed_bitmaps, bitmap_count, bitmap_to_mask, intersect
+from services.crossfilter_service import build_crossfilter_index, crossfilter_charts
+
+rng = np.random.default_rng(9)
+ROWS = 1003
+df = pd.DataFrame({
+    'department': rng.choice(['HR', 'IT', 'Sales', 'Ops'], size=ROWS),
+    'gender': pd.Series(rng.choice(['F', 'M', None], size=ROWS), dtype=object),
+    'salary': rng.integers(30, 90, size=ROWS) * 1000.0,
+    'age': rng.integers(20, 60, size=ROWS)
+})
+
+codes = rng.integers(-1, 5, size=ROWS)
+packed = _packed_bitmaps(codes, 5, ROWS)
+expected_packed = np.stack([np.packbits(codes == label) for label in range(5)])
+
+bitmaps = BitmapIndex(df['department'])
+codes_only = BitmapIndex(df['department'], max_bitmaps=2)
+gender = BitmapIndex(df['gender'])
+selected = ['IT', 'Ops', 'Unknown']
+pandas_mask = df['department'].isin(selected).to_numpy()
+
+index = build_crossfilter_index(df)
+women = df[df['gender'] == 'F']
+charts, matched = crossfilter_charts(index, {'gender': 'F'})
+both_charts, both_matched = crossfilter_charts(index, {'department': 'IT', 'gender': 'F'})
+
+def chart_values(chart):
+    return dict(zip(chart['data']['labels'], chart['data']['datasets'][0]['data']))
+
+CASES = [
+    ('bincount packing matches packbits', bool(np.array_equal(packed, expected_packed)), True),
+    ('bitmap select matches pandas', bool(np.array_equal(bitmap_to_mask(bitmaps.select(selected), ROWS), pandas_mask)), True),
+    ('codes-only index keeps no bitmaps', codes_only.bitmaps is None, True),
+    ('codes-only select matches bitmaps', bool(np.array_equal(codes_only.select(selected), bitmaps.select(selected))), True),
+    ('unknown values select nothing', bitmap_count(bitmaps.select('Unknown')), 0),
+    ('nulls are not indexed', bitmap_count(gender.select(['F', 'M'])), int(df['gender'].notna().sum())),
+    ('intersection count', bitmap_count(intersect([bitmaps.select('IT'), gender.select('F')], ROWS)),
+     int(((df['department'] == 'IT') & (df['gender'] == 'F')).sum())),
+    ('selection row count', matched, len(women)),
+    ('count chart follows other selections', chart_values(charts[0]), women['department'].value_counts().to_dict()),
+    ('count chart ignores its own selection', chart_values(both_charts[0]), chart_values(charts[0])),
+    ('average chart follows other selections', chart_values(charts[1]),
+     women.groupby('department')['salary'].mean().round(2).to_dict()),
+    ('both selections row count', both_matched, int(((df['department'] == 'IT') & (df['gender'] == 'F')).sum())),
+]
+
+def test_bitmap_crossfilter():
+    """Compare bitmap selections and charts with pandas results"""
+    print("=" * 60)
+    print("BITMAP CROSS-FILTER TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}: {actual}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_bitmap_crossfilter()
@@ -0,0 +1,51 @@
+"""
+Test Script for Cardinality Sketches
+Checks HyperLogLog, Count-Min and the early-exit scans against exact pandas
+counts (no database needed)
+"""
+import numpy as np
+import pandas as pd
+from utils.sketch_utils import HyperLogLog, CountMinSketch, nunique_below, heavy_hitters
+
+rng = np.random.default_rng(5)
+ids = pd.Series(rng.integers(0, 50000, size=200000))
+exact_distinct = ids.nunique()
+hll = HyperLogLog().update(ids[:100000]).merge(HyperLogLog().update(ids[100000:]))
+
+skewed = pd.Series(np.concatenate([np.full(5000, 'a'), np.full(3000, 'b'), np.full(2000, 'c'), np.arange(20000).astype(str)]))
+exact_counts = skewed.value_counts()
+count_min = CountMinSketch().update(skewed)
+estimated = count_min.estimate(['a', 'b', 'c', '17'])
+
+CASES = [
+    ('merged HyperLogLog within 5%', abs(hll.estimate() - exact_distinct) / exact_distinct < 0.05, True),
+    ('HyperLogLog survives to_dict', HyperLogLog.from_dict(hll.to_dict()).estimate(), hll.estimate()),
+    ('HyperLogLog small counts', HyperLogLog().update(['x', 'y', 'z', 'x', None]).estimate(), 3),
+    ('Count-Min never undercounts', bool(np.all(estimated >= exact_counts[['a', 'b', 'c', '17']].to_numpy())), True),
+    ('Count-Min heavy counts within 2N/width', bool(np.all(estimated[:3] - [5000, 3000, 2000] <= 2 * len(skewed) / 2048)), True),
+    ('nunique_below on high cardinality', nunique_below(ids, 100, chunk_size=1000), False),
+    ('nunique_below on low cardinality', nunique_below(pd.Series(['a', 'b', None] * 1000), 3), True),
+    ('heavy hitters past the tracked capacity', [item for item, _ in heavy_hitters(skewed, n=3)], ['a', 'b', 'c']),
+    ('heavy hitters exact below capacity', heavy_hitters(pd.Series(['x', 'y', 'x']), n=2), [('x', 2), ('y', 1)]),
+]
+
+def test_cardinality_sketches():
+    """Compare sketch estimates with exact counts"""
+    print("=" * 60)
+    print("CARDINALITY SKETCH TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}: {actual}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_cardinality_sketches()
@@ -0,0 +1,70 @@
+"""
+Test Script for the Chart Codec
+Checks that encoded chart lists decode back to the original Chart.js configs
+(no database needed)
+"""
+import json
+from utils.chart_codec import encode_array, decode_array, encode_charts, decode_charts
+
+CHARTS = [
+    {
+        'type': 'bar',
+        'title': 'Average salary by department',
+        'data': {
+            'labels': ['HR', 'IT', 'Sales', 'IT'],
+            'datasets': [{'label': 'Salary', 'data': [52000.5, 61000.25, -150.75, 0], 'backgroundColor': '#4e79a7'}]
+        }
+    },
+    {
+        'type': 'line',
+        'data': {
+            'labels': ['2024-01', '2024-02'],
+            'datasets': [
+                {'label': 'Hires', 'data': [3, 12], 'backgroundColor': '#4e79a7'},
+                {'label': 'Ratio', 'data': [0.1 / 3, 2 ** 60], 'borderColor': '#f28e2b'}
+            ]
+        }
+    },
+    {
+        'type': 'scatter',
+        'data': {'datasets': [{'label': 'Age vs salary', 'data': [{'x': 25, 'y': 40000.5}, {'x': 51, 'y': 98000}]}]}
+    },
+    {'type': 'pie', 'data': {'labels': [1, 2], 'datasets': [{'data': ['a', None]}]}},
+]
+
+envelope = encode_charts(CHARTS)
+
+CASES = [
+    ('charts round-trip', decode_charts(envelope), CHARTS),
+    ('envelope round-trips through JSON', decode_charts(json.loads(json.dumps(envelope))), CHARTS),
+    ('labels stored once', envelope['labels'], ['HR', 'IT', 'Sales', '2024-01', '2024-02']),
+    ('shared styles stored once', len(envelope['styles']), 2),
+    ('fixed-point decimals', decode_array(encode_array([19.99, -0.01, 1234.5])), [19.99, -0.01, 1234.5]),
+    ('fixed-point type', encode_array([19.99, -0.01]).get('e'), 2),
+    ('float64 fallback', encode_array([1 / 3])['t'], 'f8'),
+    ('large integers stay exact', decode_array(encode_array([2 ** 40, -(2 ** 40), 7])), [2 ** 40, -(2 ** 40), 7]),
+    ('non-numeric data not encoded', encode_array([1, 'a']), None),
+    ('booleans not encoded', encode_array([True, False]), None),
+    ('plain chart lists pass through', decode_charts(CHARTS), CHARTS),
+]
+
+def test_chart_codec():
+    """Compare decoded charts with the originals"""
+    print("=" * 60)
+    print("CHART CODEC TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_chart_codec()
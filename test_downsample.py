@@ -0,0 +1,49 @@
+"""
+Test Script for Chart Downsampling
+Checks LTTB and grid density sampling on synthetic series (no database needed)
+"""
+import numpy as np
+from utils.downsample_utils import lttb_indices, grid_density_sample
+
+x = np.arange(1000, dtype=float)
+wave = np.sin(x / 50)
+spike = np.zeros(1000)
+spike[500] = 100
+kept = lttb_indices(x, wave, 50)
+
+rng = np.random.default_rng(7)
+cloud_x, cloud_y = rng.normal(size=20000), rng.normal(size=20000)
+xs, ys, counts = grid_density_sample(cloud_x, cloud_y, 400)
+
+CASES = [
+    ('lttb keeps the point budget', len(kept), 50),
+    ('lttb keeps first and last points', (int(kept[0]), int(kept[-1])), (0, 999)),
+    ('lttb indices ascend', bool(np.all(np.diff(kept) > 0)), True),
+    ('lttb keeps a lone spike', 500 in lttb_indices(x, spike, 50), True),
+    ('lttb below the budget keeps every point', len(lttb_indices(x[:40], wave[:40], 50)), 40),
+    ('grid sample stays within max points', len(xs) <= 400, True),
+    ('grid sample counts every point', int(counts.sum()), 20000),
+    ('grid centroids keep the mean', bool(np.isclose((xs * counts).sum() / counts.sum(), cloud_x.mean())), True),
+    ('grid sample drops NaN points', len(grid_density_sample([1.0, np.nan, 3.0], [1.0, 2.0, np.nan], 10)[0]), 1),
+]
+
+def test_downsample():
+    """Compare downsampling results with the expected ones"""
+    print("=" * 60)
+    print("CHART DOWNSAMPLING TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}: {actual}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_downsample()
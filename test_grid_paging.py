@@ -0,0 +1,75 @@
+"""
+Test Script for Grid Keyset Paging
+Pages through a table with duplicate and NULL sort values and checks that the
+concatenated pages equal one full sort. The SQL pager runs against an
+in-memory SQLite table, which orders NULLs like MySQL (no MySQL needed).
+"""
+import sqlite3
+import numpy as np
+import pandas as pd
+import services.grid_service as grid_service
+from services.grid_service import get_grid_page, get_frame_page
+
+rng = np.random.default_rng(3)
+ROWS = 237
+frame = pd.DataFrame({
+    'id': np.arange(1, ROWS + 1),
+    'dept': pd.Series(rng.choice(['hr', 'it', 'ops', None], size=ROWS), dtype=object),
+    'salary': np.where(rng.random(ROWS) < 0.1, np.nan, rng.integers(1, 20, size=ROWS) * 1000.0)
+})
+
+connection = sqlite3.connect(':memory:')
+connection.row_factory = sqlite3.Row
+frame.to_sql('grid_rows', connection, index=False)
+
+def sqlite_query(query, params=None, fetch=False):
+    rows = connection.execute(query.replace('%s', '?'), params or ()).fetchall()
+    return [dict(row) for row in rows]
+
+grid_service.execute_query = sqlite_query
+
+def all_pages(pager, source, sort, order, limit=20):
+    ids, cursor = [], None
+    while True:
+        page = pager(source, ['dept', 'salary'], limit=limit, cursor=cursor, sort=sort, order=order)
+        ids.extend(page['values'][0])
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+def full_sort(sort, order):
+    ascending = order == 'asc'
+    if sort == 'id':
+        return frame.sort_values('id', ascending=ascending)['id'].tolist()
+    ordered = frame.sort_values([sort, 'id'], ascending=ascending, na_position='first' if ascending else 'last')
+    return ordered['id'].tolist()
+
+CASES = []
+for sort in ('id', 'dept', 'salary'):
+    for order in ('asc', 'desc'):
+        CASES.append((f'sql pages by {sort} {order}', all_pages(get_grid_page, 'grid_rows', sort, order), full_sort(sort, order)))
+        CASES.append((f'frame pages by {sort} {order}', all_pages(get_frame_page, frame, sort, order), full_sort(sort, order)))
+
+filtered = get_frame_page(frame, ['dept', 'salary'], limit=ROWS, filters={'salary': {'gte': 10000}})
+CASES.append(('frame filter matches pandas', filtered['values'][0], frame[frame['salary'] >= 10000]['id'].tolist()))
+
+def test_grid_paging():
+    """Compare concatenated pages with a full sort"""
+    print("=" * 60)
+    print("GRID KEYSET PAGING TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}: {len(actual)} rows")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_grid_paging()
@@ -0,0 +1,89 @@
+"""
+Test Script for Pivot Tables
+Checks compute_pivot against pandas.pivot_table on the same data
+(no database needed)
+"""
+import numpy as np
+import pandas as pd
+from services.pivot_service import parse_pivot_spec, compute_pivot
+
+rng = np.random.default_rng(4)
+ROWS = 2000
+df = pd.DataFrame({
+    'department': pd.Series(rng.choice(['HR', 'IT', 'Sales', None], size=ROWS, p=[0.3, 0.3, 0.3, 0.1]), dtype=object),
+    'gender': rng.choice(['F', 'M'], size=ROWS),
+    'region': rng.choice(['north', 'south'], size=ROWS),
+    'hired': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 700, size=ROWS), unit='D'),
+    'salary': np.where(rng.random(ROWS) < 0.05, np.nan, rng.integers(30, 90, size=ROWS) * 1000.0)
+})
+COLUMNS = list(df.columns)
+
+def pivot_cells(spec):
+    """compute_pivot values as {measure: {(row header, column header): value}}"""
+    result = compute_pivot(df, parse_pivot_spec(spec, COLUMNS))
+    cells = {}
+    for name, grid in result['values'].items():
+        cells[name] = {
+            (tuple(row), tuple(col)): value
+            for row, values in zip(result['row_headers'], grid)
+            for col, value in zip(result['column_headers'], values) if value is not None
+        }
+    return cells
+
+def pandas_cells(frame, rows, cols, column, agg):
+    table = pd.pivot_table(frame, index=rows, columns=cols, values=column, aggfunc=agg)
+    cells = {}
+    for row_key, values in table.iterrows():
+        for col_key, value in values.items():
+            if not pd.isna(value):
+                row_key = row_key if isinstance(row_key, tuple) else (row_key,)
+                col_key = col_key if isinstance(col_key, tuple) else (col_key,)
+                cells[(row_key, col_key)] = round(float(value), 4)
+    return cells
+
+pivot = pivot_cells({
+    'rows': ['department', 'region'], 'columns': ['gender'],
+    'values': {'salary': ['sum', 'mean', 'min', 'max', 'count']}
+})
+monthly = pivot_cells({'rows': ['hired:month'], 'columns': ['department'], 'values': {'salary': 'sum'}})
+by_month = df.assign(month=df['hired'].dt.strftime('%Y-%m'))
+
+def spec_error(spec):
+    try:
+        parse_pivot_spec(spec, COLUMNS)
+    except ValueError as e:
+        return str(e)
+    return None
+
+CASES = [
+    (f'salary {agg} matches pivot_table', pivot[f'salary_{agg}'],
+     pandas_cells(df, ['department', 'region'], ['gender'], 'salary', agg))
+    for agg in ('sum', 'mean', 'min', 'max', 'count')
+] + [
+    ('month grain matches pivot_table', monthly['salary_sum'], pandas_cells(by_month, ['month'], ['department'], 'salary', 'sum')),
+    ('row count without measures', sum(pivot_cells({'rows': ['gender']})['row_count'].values()), ROWS),
+    ('unknown column rejected', spec_error({'rows': ['nope']}), "Unknown column 'nope'"),
+    ('repeated dimension rejected', spec_error({'rows': ['gender'], 'columns': ['gender']}), "A dimension can only be used once"),
+    ('unknown grain rejected', spec_error({'rows': ['hired:week']}) is not None, True),
+]
+
+def test_pivot():
+    """Compare pivot cells with pandas.pivot_table"""
+    print("=" * 60)
+    print("PIVOT TABLE TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_pivot()
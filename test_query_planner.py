@@ -0,0 +1,70 @@
+"""
+Test Script for the Offline Query Planner
+Checks question plans, plan caching and answers against pandas
+(no database needed)
+"""
+import numpy as np
+import pandas as pd
+from services.query_planner_service import answer_question
+
+rng = np.random.default_rng(8)
+ROWS = 3000
+df = pd.DataFrame({
+    'department': rng.choice(['Sales', 'HR', 'IT', 'Ops'], size=ROWS),
+    'gender': rng.choice(['M', 'F'], size=ROWS),
+    'salary': rng.integers(30000, 90000, size=ROWS).astype(float),
+    'hire_date': (pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 1500, size=ROWS), unit='D')).strftime('%Y-%m-%d')
+})
+
+def ask(question, frame=df):
+    return answer_question(question, frame)
+
+def plan_shape(question):
+    plan = ask(question)['plan']
+    return plan and {key: plan[key] for key in ('op', 'group_by', 'measure', 'agg') if key in plan}
+
+top3 = df.groupby('department')['salary'].mean().sort_values(ascending=False).head(3)
+hr_women = int(((df['department'] == 'HR') & (df['gender'] == 'F')).sum())
+first = ask('What is the average salary by department?')
+second = ask('what is the AVERAGE salary by department')
+upper = pd.DataFrame({'department': ['SALES'] * 10 + ['HR'] * 5, 'salary': [1.0] * 15})
+mixed = pd.DataFrame({'department': ['Sales'] * 10 + ['HR'] * 5, 'salary': [1.0] * 15})
+
+CASES = [
+    ('aggregate plan', plan_shape('average salary by department'),
+     {'op': 'aggregate', 'group_by': 'department', 'measure': 'salary', 'agg': 'mean'}),
+    ('top plan', plan_shape('top 3 departments by salary'),
+     {'op': 'top', 'group_by': 'department', 'measure': 'salary', 'agg': 'mean'}),
+    ('trend plan', plan_shape('trend of salary over time'), {'op': 'trend', 'measure': 'salary', 'agg': 'mean'}),
+    ('count plan', plan_shape('how many where department = hr'), {'op': 'count', 'measure': None, 'agg': 'count'}),
+    ('rephrased question hits the plan cache', (first['plan_cached'], second['plan_cached']), (False, True)),
+    ('top 3 matches pandas', [row[0] for row in ask('top 3 departments by salary')['rows']], top3.index.tolist()),
+    ('top 3 values match pandas', [row[1] for row in ask('top 3 departments by salary')['rows']], top3.round(2).tolist()),
+    ('conditions are ANDed', ask('count where department is HR and gender = f')['rows'], [[hr_women]]),
+    ('contradicting conditions match nothing', ask('count where department = HR and department = IT')['rows'], [[0]]),
+    ('cached plan uses each dataset\'s spelling', (ask('count where department = sales', mixed)['rows'],
+     ask('count where department = sales', upper)['rows']), ([[10]], [[10]])),
+    ('total matches pandas', ask('total salary')['rows'], [[round(df['salary'].sum(), 2)]]),
+    ('unknown question not understood', ask("what's the weather")['understood'], False),
+]
+
+def test_query_planner():
+    """Compare planner answers with pandas"""
+    print("=" * 60)
+    print("QUERY PLANNER TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}: {actual}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_query_planner()
@@ -0,0 +1,41 @@
+"""
+Test Script for Column Type Detection
+Checks the MySQL types create_table_schema picks (no database needed)
+"""
+import pandas as pd
+from services.file_service import decimal_type, detect_data_type
+
+CASES = [
+    ('decimals beyond the max scale', decimal_type([1.00000001, 2.5]), 'DOUBLE'),
+    ('two decimal places', decimal_type([1.5, 2.25, 3.12]), 'DECIMAL(3,2)'),
+    ('money values', decimal_type([19.99, 0.01, 1234.5]), 'DECIMAL(6,2)'),
+    ('tenths', decimal_type([0.1, 0.2, 0.3]), 'DECIMAL(2,1)'),
+    ('float sum residue', decimal_type([0.1 + 0.2]), 'DOUBLE'),
+    ('integers stored as floats', detect_data_type(pd.Series([1.0, 2.0, None])), 'TINYINT UNSIGNED'),
+    ('negative integers', detect_data_type(pd.Series([-5, 300])), 'SMALLINT'),
+    ('enum in collation order', detect_data_type(pd.Series(['Sales', 'HR', 'engineering', 'IT'] * 4)),
+     "ENUM('engineering', 'HR', 'IT', 'Sales')"),
+    ('accent variants are not enum members', detect_data_type(pd.Series(['Cafe', 'Café'] * 4)), 'VARCHAR(4)'),
+    ('case variants are not enum members', detect_data_type(pd.Series(['sales', 'Sales'] * 4)), 'VARCHAR(5)'),
+]
+
+def test_schema_types():
+    """Compare detected types with the expected ones"""
+    print("=" * 60)
+    print("COLUMN TYPE DETECTION TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}: {actual}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_schema_types()
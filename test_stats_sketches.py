@@ -0,0 +1,63 @@
+"""
+Test Script for Incremental Stats State
+Checks quantile/top-k sketches and batch merging against exact pandas results
+(no database needed)
+"""
+import numpy as np
+import pandas as pd
+from utils.sketch_utils import QuantileSketch, TopKSketch
+from services.incremental_stats_service import build_stats_state, merge_stats_state
+
+rng = np.random.default_rng(11)
+values = rng.normal(50000, 12000, size=100000)
+quantiles = QuantileSketch(seed=1).update(values[:60000]).merge(QuantileSketch(seed=2).update(values[60000:]))
+median_rank = float(np.mean(values <= quantiles.quantile(0.5)))
+
+categories = pd.Series(rng.choice(['HR', 'IT', 'Sales', 'Ops'], size=5000, p=[0.1, 0.2, 0.6, 0.1]))
+top_k = TopKSketch(capacity=8).update(categories[:2000]).merge(TopKSketch(capacity=8).update(categories[2000:]))
+
+df = pd.DataFrame({
+    'department': categories[:2000].to_numpy(),
+    'salary': values[:2000].round(2),
+    'age': rng.integers(20, 65, size=2000)
+})
+layout_state = build_stats_state(df.iloc[:1500])
+merged = merge_stats_state(layout_state, build_stats_state(df.iloc[1500:], layout_state['layout']))
+full = build_stats_state(df, layout_state['layout'])
+
+CASES = [
+    ('merged quantile sketch counts every value', quantiles.count, 100000),
+    ('merged median within 1% rank', abs(median_rank - 0.5) < 0.01, True),
+    ('quantile sketch survives to_dict', QuantileSketch.from_dict(quantiles.to_dict()).quantiles([0.1, 0.9]),
+     quantiles.quantiles([0.1, 0.9])),
+    ('empty quantile sketch', QuantileSketch().quantile(0.5), None),
+    ('top-k exact below capacity', dict(top_k.top(4)), categories.value_counts().to_dict()),
+    ('top-k heaviest first', top_k.top(1)[0][0], 'Sales'),
+    ('merged state row count', merged['row_count'], full['row_count']),
+    ('merged state salary sum', bool(np.isclose(merged['columns']['salary']['sum'], full['columns']['salary']['sum'])), True),
+    ('merged state salary extremes', (merged['columns']['salary']['min'], merged['columns']['salary']['max']),
+     (full['columns']['salary']['min'], full['columns']['salary']['max'])),
+    ('merged state null counts', {col: c['nulls'] for col, c in merged['columns'].items()},
+     {col: c['nulls'] for col, c in full['columns'].items()}),
+]
+
+def test_stats_sketches():
+    """Compare sketch and merged-state results with exact ones"""
+    print("=" * 60)
+    print("INCREMENTAL STATS STATE TEST")
+    print("=" * 60)
+    
+    failures = 0
+    for name, actual, expected in CASES:
+        if actual == expected:
+            print(f"✅ {name}: {actual}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {actual}, expected {expected}")
+    
+    print("-" * 60)
+    print("All checks passed" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+if __name__ == '__main__':
+    test_stats_sketches()
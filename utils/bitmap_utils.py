@@ -0,0 +1,71 @@
+"""
+Bitmap Utilities
+Packed row bitmaps for fast set intersection over a column's values
+
+A BitmapIndex keeps one bitmap per distinct value of a column (np.packbits
+of its row mask, one bit per row). Selecting several values ORs their
+bitmaps and selections on different columns are ANDed, 8 rows per byte.
+Bitmaps take rows/8 bytes per value, so columns with more values than
+max_bitmaps keep only their codes and build a selection's bitmap on demand.
+"""
+import numpy as np
+import pandas as pd
+
+# Set bits per byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def full_bitmap(size):
+    """Bitmap with every one of `size` rows set"""
+    return np.packbits(np.ones(size, dtype=bool))
+
+
+def intersect(bitmaps, size):
+    """AND of the given bitmaps (all rows when there are none)"""
+    bitmaps = list(bitmaps)
+    if not bitmaps:
+        return full_bitmap(size)
+    return np.bitwise_and.reduce(bitmaps)
+
+
+def bitmap_count(bitmap):
+    return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+
+def bitmap_to_mask(bitmap, size):
+    return np.unpackbits(bitmap, count=size).astype(bool)
+
+
+def _packed_bitmaps(codes, n_labels, size):
+    """(n_labels, bytes) array of packbits-ordered bitmaps, built in one pass over the rows"""
+    rows = np.flatnonzero(codes >= 0)
+    n_bytes = (size + 7) // 8
+    # Each row sets a distinct bit of its byte, so summing bit values is an OR
+    cells = codes[rows] * n_bytes + (rows >> 3)
+    bits = np.bincount(cells, weights=128 >> (rows & 7), minlength=n_labels * n_bytes)
+    return bits.astype(np.uint8).reshape(n_labels, n_bytes)
+
+
+class BitmapIndex:
+    """One packed bitmap per distinct (string) value of a column; nulls are not indexed"""
+
+    def __init__(self, values, max_bitmaps=None):
+        series = pd.Series(values, dtype=object)
+        codes, uniques = pd.factorize(series.astype(str).where(series.notna()), sort=True)
+        self.size = len(codes)
+        self.codes = codes.astype(np.int64)
+        self.labels = [str(label) for label in uniques]
+        self._positions = {label: i for i, label in enumerate(self.labels)}
+        self.bitmaps = None
+        if max_bitmaps is None or len(self.labels) <= max_bitmaps:
+            self.bitmaps = _packed_bitmaps(self.codes, len(self.labels), self.size)
+
+    def select(self, values):
+        """Rows whose value is any of `values` (unknown values match nothing)"""
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        positions = [self._positions[str(value)] for value in values if str(value) in self._positions]
+        if not positions:
+            return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        if self.bitmaps is None:
+            return np.packbits(np.isin(self.codes, positions))
+        return np.bitwise_or.reduce(self.bitmaps[positions], axis=0)
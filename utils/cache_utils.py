@@ -0,0 +1,103 @@
+"""
+Cache Utilities
+Version counters and conditional GET (ETag / 304) support for dataset and
+dashboard endpoints
+
+Versions live as marker files under Config.CACHE_VERSION_DIR so every worker
+process sees the same counter; reading one is a single stat() call and never
+touches MySQL. Writes to a dataset or dashboard bump its version, which
+changes the ETag and makes clients refetch.
+"""
+import glob
+import os
+import time
+from functools import wraps
+from flask import request, session, make_response
+from config import Config
+
+
+def _version_path(kind, obj_id):
+    return os.path.join(Config.CACHE_VERSION_DIR, f"{kind}-{obj_id}")
+
+
+def get_version(kind, obj_id):
+    """Current version of an object (0 if it was never bumped)"""
+    try:
+        return os.stat(_version_path(kind, obj_id)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def bump_version(kind, obj_id):
+    """Mark an object as changed so cached responses for it are revalidated"""
+    try:
+        os.makedirs(Config.CACHE_VERSION_DIR, exist_ok=True)
+        path = _version_path(kind, obj_id)
+        previous = get_version(kind, obj_id)
+        # Versions must strictly increase even on coarse-mtime filesystems
+        now = max(time.time_ns(), previous + 1)
+        with open(path, 'a'):
+            pass
+        os.utime(path, ns=(now, now))
+    except OSError as e:
+        print(f"Error bumping cache version for {kind} {obj_id}: {str(e)}")
+
+
+def bump_dataset_version(dataset_id):
+    bump_version('dataset', dataset_id)
+
+
+def bump_dashboard_version(dashboard_id):
+    bump_version('dashboard', dashboard_id)
+
+
+def _build_token():
+    """Changes when templates or code are redeployed, so old ETags stop matching"""
+    if Config.CACHE_ETAG_SALT:
+        return Config.CACHE_ETAG_SALT
+    patterns = ['templates/*.html', 'routes/*.py', 'services/*.py', 'utils/*.py']
+    mtimes = [os.stat(path).st_mtime_ns for pattern in patterns
+              for path in glob.glob(os.path.join(Config.BASE_DIR, pattern))]
+    return format(max(mtimes, default=0) // 1_000_000_000, 'x')
+
+
+BUILD_TOKEN = _build_token()
+
+
+def conditional_get(kind, id_arg, cache_control='private, no-cache', per_user=False, on_not_modified=None):
+    """
+    Route decorator answering If-None-Match from the object's version
+
+    When the client's ETag matches the current version the view is skipped
+    entirely (no MySQL access) and a 304 is returned. Successful responses
+    get a weak ETag and the route's Cache-Control policy.
+
+    Args:
+        kind: 'dataset' or 'dashboard'
+        id_arg: name of the view argument holding the object id
+        cache_control: Cache-Control header value for this route
+        per_user: include the session user in the ETag (user-scoped views)
+        on_not_modified: callback(obj_id) run when a 304 is served
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            obj_id = kwargs[id_arg]
+            etag = f"{kind}-{obj_id}-{get_version(kind, obj_id)}-{BUILD_TOKEN}"
+            if per_user:
+                etag += f"-u{session.get('user_id')}"
+
+            if request.if_none_match.contains_weak(etag):
+                if on_not_modified:
+                    on_not_modified(obj_id)
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapped
+    return decorator
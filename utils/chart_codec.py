@@ -0,0 +1,263 @@
+"""
+Chart Codec
+Compact storage/transport format for chart lists
+
+A chart list is encoded into one envelope:
+    {
+        'codec': 'chart-v1',
+        'labels': [...],    # every distinct label string, referenced by index
+        'styles': [...],    # every distinct dataset style dict, referenced by index
+        'charts': [...]     # charts whose label lists and numeric series are typed arrays
+    }
+
+Typed arrays are {'t': type, 'b': base64 bytes}: 'v' is delta + zigzag varint
+integers with an optional 'e' decimal exponent (value = int / 10**e), 'f8' is
+little-endian float64. Envelopes are expanded back to Chart.js configs by
+decode_charts (server) and expandCharts (dashboard_view.html).
+"""
+import base64
+import json
+import numpy as np
+
+CODEC_VERSION = 'chart-v1'
+
+# Fixed-point encoding is tried up to this many decimals (chart values are rounded to 2)
+MAX_FIXED_DECIMALS = 2
+
+# Largest integer a JavaScript number holds exactly
+MAX_SAFE_INTEGER = 2 ** 53
+
+
+# ============================================================================
+# Typed arrays
+# ============================================================================
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _varint_encode(ints):
+    """Delta + zigzag + LEB128 varint bytes for an int64 array"""
+    deltas = np.diff(ints, prepend=np.int64(0))
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+
+    # Bytes needed per value (7 payload bits per byte)
+    sizes = np.ones(len(zigzag), dtype=np.int64)
+    rest = zigzag >> np.uint64(7)
+    while rest.any():
+        sizes += rest > 0
+        rest >>= np.uint64(7)
+
+    out = np.zeros(int(sizes.sum()), dtype=np.uint8)
+    starts = np.cumsum(sizes) - sizes
+    rest = zigzag.copy()
+    for k in range(int(sizes.max())):
+        active = sizes > k
+        payload = (rest[active] & np.uint64(0x7F)).astype(np.uint8)
+        more = (sizes[active] > k + 1).astype(np.uint8) << 7
+        out[starts[active] + k] = payload | more
+        rest[active] = rest[active] >> np.uint64(7)
+    return out.tobytes()
+
+
+def _varint_decode(data):
+    values = []
+    current = shift = total = 0
+    for byte in data:
+        current |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        total += (current >> 1) ^ -(current & 1)
+        values.append(total)
+        current = shift = 0
+    return values
+
+
+def encode_ints(ints):
+    """Encode a sequence of integers (e.g. label indexes) as a varint typed array"""
+    return {'t': 'v', 'b': _b64(_varint_encode(np.asarray(ints, dtype=np.int64)))}
+
+
+def encode_array(values):
+    """
+    Encode a list of numbers as the smallest exact typed array
+
+    Values with at most MAX_FIXED_DECIMALS decimals become fixed-point
+    integers stored as delta varints ('v'); anything else is float64 ('f8').
+
+    Returns:
+        typed array dict, or None if the list is not purely numeric
+    """
+    if not values or any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values):
+        return None
+
+    array = np.asarray(values, dtype=np.float64)
+    if not np.all(np.isfinite(array)):
+        return None
+
+    for decimals in range(MAX_FIXED_DECIMALS + 1):
+        scaled = np.round(array * 10 ** decimals)
+        if np.abs(scaled).max() >= MAX_SAFE_INTEGER:
+            break
+        if np.allclose(scaled / 10 ** decimals, array, rtol=0, atol=1e-9):
+            encoded = encode_ints(scaled.astype(np.int64))
+            if decimals:
+                encoded['e'] = decimals
+            return encoded
+
+    return {'t': 'f8', 'b': _b64(array.astype('<f8').tobytes())}
+
+
+def decode_array(encoded):
+    """Inverse of encode_array / encode_ints (returns a list of Python numbers)"""
+    data = base64.b64decode(encoded['b'])
+    if encoded['t'] == 'f8':
+        return np.frombuffer(data, dtype='<f8').tolist()
+
+    ints = _varint_decode(data)
+    decimals = encoded.get('e', 0)
+    if decimals:
+        return [round(v / 10 ** decimals, decimals) for v in ints]
+    return ints
+
+
+# ============================================================================
+# Chart lists
+# ============================================================================
+
+class _Dictionary:
+    """Insertion-ordered value -> index table"""
+
+    def __init__(self, key=None):
+        self.values = []
+        self._index = {}
+        self._key = key or (lambda v: v)
+
+    def ref(self, value):
+        key = self._key(value)
+        if key not in self._index:
+            self._index[key] = len(self.values)
+            self.values.append(value)
+        return self._index[key]
+
+
+def _encode_labels(labels, dictionary):
+    if not all(isinstance(label, str) for label in labels):
+        return labels
+    return encode_ints([dictionary.ref(label) for label in labels])
+
+
+def _encode_points(points):
+    """Scatter data [{x, y, ...}, ...] -> {'x': typed, 'y': typed, ...}"""
+    if not points or not all(isinstance(p, dict) for p in points):
+        return None
+    keys = list(points[0].keys())
+    if any(list(p.keys()) != keys for p in points):
+        return None
+    columns = {key: encode_array([p[key] for p in points]) for key in keys}
+    if any(column is None for column in columns.values()):
+        return None
+    return columns
+
+
+def _encode_dataset(dataset, styles):
+    encoded = {}
+    style = {}
+    for key, value in dataset.items():
+        if key == 'label':
+            encoded['label'] = value
+        elif key == 'data':
+            values = encode_array(value) if isinstance(value, list) else None
+            if values is not None:
+                encoded['values'] = values
+            else:
+                points = _encode_points(value) if isinstance(value, list) else None
+                if points is not None:
+                    encoded['points'] = points
+                else:
+                    encoded['data'] = value
+        else:
+            style[key] = value
+    if style:
+        encoded['style'] = styles.ref(style)
+    return encoded
+
+
+def encode_charts(charts):
+    """Encode a list of Chart.js-style chart dicts into a compact envelope"""
+    labels = _Dictionary()
+    styles = _Dictionary(key=lambda style: json.dumps(style, sort_keys=True))
+
+    encoded_charts = []
+    for chart in charts or []:
+        encoded = {key: value for key, value in chart.items() if key != 'data'}
+        data = chart.get('data')
+        if isinstance(data, dict):
+            encoded_data = {key: value for key, value in data.items() if key not in ('labels', 'datasets')}
+            if isinstance(data.get('labels'), list):
+                encoded_data['labels'] = _encode_labels(data['labels'], labels)
+            if isinstance(data.get('datasets'), list):
+                encoded_data['datasets'] = [_encode_dataset(ds, styles) for ds in data['datasets']]
+            encoded['data'] = encoded_data
+        elif data is not None:
+            encoded['data'] = data
+        encoded_charts.append(encoded)
+
+    return {
+        'codec': CODEC_VERSION,
+        'labels': labels.values,
+        'styles': styles.values,
+        'charts': encoded_charts
+    }
+
+
+def is_encoded(charts_data):
+    return isinstance(charts_data, dict) and charts_data.get('codec') == CODEC_VERSION
+
+
+def _decode_dataset(dataset, styles):
+    decoded = {}
+    if 'label' in dataset:
+        decoded['label'] = dataset['label']
+    if 'values' in dataset:
+        decoded['data'] = decode_array(dataset['values'])
+    elif 'points' in dataset:
+        columns = {key: decode_array(column) for key, column in dataset['points'].items()}
+        decoded['data'] = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    elif 'data' in dataset:
+        decoded['data'] = dataset['data']
+    if 'style' in dataset:
+        decoded.update(styles[dataset['style']])
+    return decoded
+
+
+def decode_charts(charts_data):
+    """
+    Expand an envelope back into a list of chart dicts
+
+    Plain chart lists (dashboards saved before the codec) are returned as-is.
+    """
+    if not is_encoded(charts_data):
+        return charts_data or []
+
+    labels = charts_data['labels']
+    styles = charts_data['styles']
+    charts = []
+    for encoded in charts_data['charts']:
+        chart = {key: value for key, value in encoded.items() if key != 'data'}
+        data = encoded.get('data')
+        if isinstance(data, dict):
+            decoded_data = {key: value for key, value in data.items() if key not in ('labels', 'datasets')}
+            if 'labels' in data:
+                refs = data['labels']
+                decoded_data['labels'] = [labels[i] for i in decode_array(refs)] if isinstance(refs, dict) else refs
+            if 'datasets' in data:
+                decoded_data['datasets'] = [_decode_dataset(ds, styles) for ds in data['datasets']]
+            # Keep Chart.js key order: labels before datasets
+            chart['data'] = {key: decoded_data[key] for key in ('labels', 'datasets') if key in decoded_data}
+            chart['data'].update({k: v for k, v in decoded_data.items() if k not in chart['data']})
+        elif data is not None:
+            chart['data'] = data
+        charts.append(chart)
+    return charts
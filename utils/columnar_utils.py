@@ -0,0 +1,110 @@
+"""
+Columnar File Utilities
+Compressed column-oriented files for datasets that live outside MySQL
+
+Parquet (zstd) is used when pyarrow is installed. Otherwise each column is
+stored as a numpy array in a compressed .npz archive, with a null mask per
+column and a small JSON schema so dtypes round-trip exactly.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+from config import Config
+
+try:
+    import pyarrow  # noqa: F401 - enables DataFrame.to_parquet / read_parquet
+except ImportError:  # optional - npz archives only
+    pyarrow = None
+
+SCHEMA_ENTRY = '__schema__'
+
+
+def columnar_format():
+    """'parquet' or 'npz' according to Config.COLUMNAR_FORMAT and installed libraries"""
+    if Config.COLUMNAR_FORMAT == 'parquet' or (Config.COLUMNAR_FORMAT == 'auto' and pyarrow is not None):
+        if pyarrow is None:
+            raise RuntimeError("COLUMNAR_FORMAT=parquet needs pyarrow installed")
+        return 'parquet'
+    return 'npz'
+
+
+def _column_arrays(series):
+    """(kind, values array, null mask) for one column"""
+    mask = series.isna().to_numpy()
+    if pd.api.types.is_bool_dtype(series) and not mask.any():
+        return 'bool', series.to_numpy(dtype=bool), mask
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime', series.to_numpy(dtype='datetime64[ns]').astype(np.int64), mask
+    if pd.api.types.is_integer_dtype(series):
+        return 'int', series.fillna(0).to_numpy(dtype=np.int64), mask
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return 'float', series.to_numpy(dtype=np.float64, na_value=np.nan), mask
+    return 'str', series.astype(object).where(~mask, '').astype(str).to_numpy(dtype=str), mask
+
+
+def _write_npz(df, path):
+    arrays, schema = {}, []
+    for i, col in enumerate(df.columns):
+        kind, values, mask = _column_arrays(df[col])
+        arrays[f'c{i}'] = values
+        if mask.any():
+            arrays[f'm{i}'] = mask
+        schema.append({'name': col, 'kind': kind, 'dtype': str(df[col].dtype)})
+    arrays[SCHEMA_ENTRY] = np.frombuffer(json.dumps(schema).encode('utf-8'), dtype=np.uint8)
+    np.savez_compressed(path, **arrays)
+
+
+def _read_npz(path, columns=None):
+    with np.load(path, allow_pickle=False) as archive:
+        schema = json.loads(archive[SCHEMA_ENTRY].tobytes().decode('utf-8'))
+        data = {}
+        for i, col in enumerate(schema):
+            if columns is not None and col['name'] not in columns:
+                continue
+            values = archive[f'c{i}']
+            mask = archive[f'm{i}'] if f'm{i}' in archive.files else None
+
+            if col['kind'] == 'datetime':
+                series = pd.Series(values.astype('datetime64[ns]'))
+            elif col['kind'] == 'int':
+                series = pd.Series(values, dtype='Int64' if col['dtype'] == 'Int64' or mask is not None else 'int64')
+            elif col['kind'] == 'str':
+                series = pd.Series(values, dtype=object)
+            else:
+                series = pd.Series(values)
+
+            if mask is not None:
+                series = series.mask(mask)
+            data[col['name']] = series
+
+    names = [col['name'] for col in schema if columns is None or col['name'] in columns]
+    return pd.DataFrame(data, columns=names)
+
+
+def write_columnar(df, path_base):
+    """
+    Write df next to path_base with the format's extension
+
+    Returns:
+        path of the written file
+    """
+    fmt = columnar_format()
+    path = f"{path_base}.{fmt}"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if fmt == 'parquet':
+        df.to_parquet(tmp_path, compression='zstd', index=False)
+    else:
+        # np.savez appends .npz unless given a file object
+        with open(tmp_path, 'wb') as handle:
+            _write_npz(df, handle)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_columnar(path, columns=None):
+    """Load a file written by write_columnar (optionally only some columns)"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    return _read_npz(path, columns)
@@ -0,0 +1,88 @@
+"""
+Downsampling Utilities
+Shape-preserving point reduction for chart series payloads
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket. Work per bucket is vectorized.
+
+    Args:
+        x: numeric x positions (ascending)
+        y: numeric y values
+        threshold: maximum number of points to keep
+
+    Returns:
+        np.ndarray of selected indices (ascending)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return selected
+
+
+def grid_density_sample(x, y, max_points):
+    """
+    Reduce a scatter cloud to at most max_points cell centroids
+
+    Points are binned on a sqrt(max_points) x sqrt(max_points) grid over the
+    data range. Each occupied cell contributes the centroid of its points, so
+    dense regions and isolated outliers are both represented. Runs in O(n)
+    using bincount, no sorting.
+
+    Returns:
+        (xs: np.ndarray, ys: np.ndarray, counts: np.ndarray)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y = x[keep], y[keep]
+
+    if len(x) <= max_points:
+        return x, y, np.ones(len(x), dtype=np.int64)
+
+    side = max(int(np.sqrt(max_points)), 1)
+    x_min, x_max = x.min(), x.max()
+    y_min, y_max = y.min(), y.max()
+    x_span = (x_max - x_min) or 1.0
+    y_span = (y_max - y_min) or 1.0
+
+    cx = np.minimum(((x - x_min) / x_span * side).astype(np.int64), side - 1)
+    cy = np.minimum(((y - y_min) / y_span * side).astype(np.int64), side - 1)
+    cells = cx * side + cy
+
+    counts = np.bincount(cells, minlength=side * side)
+    sum_x = np.bincount(cells, weights=x, minlength=side * side)
+    sum_y = np.bincount(cells, weights=y, minlength=side * side)
+
+    occupied = counts > 0
+    return sum_x[occupied] / counts[occupied], sum_y[occupied] / counts[occupied], counts[occupied]
@@ -0,0 +1,166 @@
+"""
+HTTP Utilities
+App-level response layer: numpy-aware JSON encoding, negotiated gzip/brotli
+compression and Server-Timing headers
+"""
+import gzip
+import json
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # optional - falls back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional - gzip only
+    brotli = None
+
+# Responses of these types are worth compressing
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/css',
+    'text/csv', 'application/javascript', 'text/javascript'
+}
+
+
+def _default(obj):
+    """Fallback conversions shared by both encoders"""
+    if isinstance(obj, np.ndarray):
+        # tolist() converts in C, no per-element Python loop
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.to_numpy().tolist()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, date):
+        # Same format the stock Flask provider uses for dates
+        return http_date(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _record_timing(name, started):
+    try:
+        g.setdefault('server_timing', {})
+        g.server_timing[name] = g.server_timing.get(name, 0.0) + (time.perf_counter() - started) * 1000
+    except RuntimeError:
+        # Encoding outside an app/request context (scripts, tests)
+        pass
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that understands numpy/pandas values
+
+    Uses orjson (with native numpy array support) when it is installed and
+    the standard library encoder otherwise. Output keeps Flask's defaults:
+    sorted keys and HTTP-date formatted datetimes.
+    """
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            # jsonify passes indent (debug) or compact separators; anything else needs the stdlib
+            if orjson is not None and set(kwargs) <= {'indent', 'separators'}:
+                options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                if self.sort_keys:
+                    options |= orjson.OPT_SORT_KEYS
+                if kwargs.get('indent'):
+                    options |= orjson.OPT_INDENT_2
+                try:
+                    return orjson.dumps(obj, default=_default, option=options).decode('utf-8')
+                except TypeError:
+                    # e.g. dict keys orjson cannot handle - retry with the stdlib encoder
+                    pass
+
+            kwargs.setdefault('default', _default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        finally:
+            _record_timing('json', started)
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """Compress a finished response when the client accepts it and it is large enough"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < Config.COMPRESS_MIN_BYTES:
+        return response
+
+    started = time.perf_counter()
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=Config.BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=Config.GZIP_LEVEL)
+    _record_timing('compress', started)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = str(len(compressed))
+    return response
+
+
+def init_http_layer(app):
+    """Install the JSON provider and the compression/timing hooks on the app"""
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def finish_response(response):
+        response = compress_response(response)
+
+        timings = dict(g.get('server_timing', {}))
+        if 'request_started' in g:
+            timings['total'] = (time.perf_counter() - g.request_started) * 1000
+        if timings:
+            response.headers['Server-Timing'] = ', '.join(
+                f"{name};dur={duration:.2f}" for name, duration in timings.items()
+            )
+        return response
+
+    return app
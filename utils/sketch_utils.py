@@ -0,0 +1,315 @@
+"""
+Sketch Utilities
+Mergeable, JSON-serializable summaries for incremental statistics
+"""
+import base64
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """
+    KLL-style quantile sketch
+
+    Items live in levels; an item at level h stands for 2^h original values.
+    When a level exceeds its capacity it is sorted and every other item is
+    promoted to the next level. Capacities shrink geometrically toward the
+    bottom levels, so space stays O(k) while rank error is O(1/k).
+    Sketches with the same k can be merged, which is what makes appends cheap.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays at this level
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self._rng.integers(0, 2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+                # Capacities changed if a level was added - rescan from the bottom
+                level = 0
+                continue
+            level += 1
+
+    def update(self, values):
+        """Add a batch of values (NaN/inf ignored)"""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """Approximate quantiles for each q in qs (None if empty)"""
+        if self.count == 0:
+            return [None for _ in qs]
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lvl), 2 ** h, dtype=float) for h, lvl in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+
+        ranks = np.asarray(qs, dtype=float) * cumulative[-1]
+        idx = np.minimum(np.searchsorted(cumulative, ranks, side='left'), len(items) - 1)
+        return items[idx].tolist()
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def to_dict(self):
+        return {'k': self.k, 'count': int(self.count), 'levels': [lvl.tolist() for lvl in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data.get('k', 200))
+        sketch.count = data.get('count', 0)
+        sketch.levels = [np.asarray(lvl, dtype=float) for lvl in data.get('levels', [[]])] or [np.empty(0)]
+        return sketch
+
+
+class TopKSketch:
+    """
+    Space-Saving heavy-hitter summary
+
+    Tracks at most `capacity` items with over-estimated counts. While fewer
+    than `capacity` distinct items have been seen the counts are exact.
+    Merging two summaries adds counts, charging items missing from one side
+    that side's minimum tracked count when it is full.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+
+    def _floor(self):
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def _merge_counts(self, counts, other_floor):
+        own_floor = self._floor()
+        merged = {}
+        for item in set(self.counts) | set(counts):
+            merged[item] = self.counts.get(item, own_floor) + counts.get(item, other_floor)
+        if len(merged) > self.capacity:
+            merged = dict(sorted(merged.items(), key=lambda kv: kv[1], reverse=True)[:self.capacity])
+        self.counts = merged
+
+    def update(self, values):
+        """Add a batch of values (counted with one vectorized value_counts)"""
+        counts = pd.Series(values).dropna().astype(str).value_counts()
+        self.total += int(counts.sum())
+        if len(counts) > self.capacity:
+            # The batch itself overflows: keep its heaviest items, floor = max dropped count
+            floor = int(counts.iloc[self.capacity])
+            counts = counts.iloc[:self.capacity]
+        else:
+            floor = 0
+        self._merge_counts({k: int(v) for k, v in counts.items()}, floor)
+        return self
+
+    def merge(self, other):
+        self.total += other.total
+        self._merge_counts(dict(other.counts), other._floor())
+        return self
+
+    def top(self, n=5):
+        """[(item, count), ...] for the n heaviest items"""
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'total': int(self.total), 'counts': self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(capacity=data.get('capacity', 64))
+        sketch.total = data.get('total', 0)
+        sketch.counts = dict(data.get('counts', {}))
+        return sketch
+
+
+def _hash_values(values):
+    """64-bit hashes for a batch of values (NaN dropped)"""
+    series = pd.Series(values).dropna()
+    return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+
+
+def _leading_zeros(words):
+    """Count leading zero bits of each uint64 (64 for zero)"""
+    high = (words >> np.uint64(32)).astype(np.float64)
+    low = (words & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        zeros = np.where(high > 0, 31 - np.floor(np.log2(high)), 63 - np.floor(np.log2(low)))
+    return np.where((high == 0) & (low == 0), 64, zeros).astype(np.int64)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter
+
+    2^precision one-byte registers; relative error is about 1.04 / sqrt(2^precision)
+    (1.6% at the default precision of 12). Small cardinalities fall back to
+    linear counting. Merging takes the register-wise maximum.
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        hashes = _hash_values(values)
+        if len(hashes) == 0:
+            return self
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rank = np.minimum(_leading_zeros(hashes << p) + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        self.registers = np.maximum(self.registers, other.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return int(round(m * np.log(m / empty)))
+        return int(round(raw))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(precision=data.get('precision', 12))
+        sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return sketch
+
+
+class CountMinSketch:
+    """
+    Count-Min frequency sketch
+
+    `depth` rows of `width` counters; estimates never undercount and overcount
+    by at most 2N/width with probability 1 - 2^-depth.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes):
+        # Derive the row hashes from one 64-bit hash (Kirsch-Mitzenmacher)
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        h2 = (hashes >> np.uint64(32)).astype(np.int64)
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def update(self, values):
+        hashes = _hash_values(values)
+        for row, cols in enumerate(self._columns(hashes)):
+            np.add.at(self.table[row], cols, 1)
+        return self
+
+    def estimate(self, values):
+        """Estimated counts for each value"""
+        hashes = _hash_values(values)
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.min([self.table[row][cols] for row, cols in enumerate(self._columns(hashes))], axis=0)
+
+    def merge(self, other):
+        self.table += other.table
+        return self
+
+
+# ============================================================================
+# Helpers used by analytics and schema extraction
+# ============================================================================
+
+# Above this many rows distinct counts switch to HyperLogLog, keeping memory
+# at a few KB instead of a hash table with one entry per distinct value
+EXACT_DISTINCT_ROWS = 1000000
+
+# Rows per chunk when scanning a column incrementally
+SCAN_CHUNK_ROWS = 65536
+
+
+def nunique_below(series, limit, chunk_size=SCAN_CHUNK_ROWS):
+    """
+    True if the column has fewer than `limit` distinct non-null values
+
+    Scans in chunks and stops as soon as `limit` distinct values are seen,
+    so high-cardinality columns usually exit after the first chunk.
+    """
+    seen = set()
+    for start in range(0, len(series), chunk_size):
+        seen.update(pd.unique(series.iloc[start:start + chunk_size].dropna()))
+        if len(seen) >= limit:
+            return False
+    return True
+
+
+def estimate_distinct(series, exact_rows=EXACT_DISTINCT_ROWS):
+    """Distinct non-null count - exact for small columns, HyperLogLog above exact_rows"""
+    if len(series) <= exact_rows:
+        return int(series.nunique())
+    return HyperLogLog().update(series).estimate()
+
+
+def heavy_hitters(series, n=5, capacity=64, chunk_size=SCAN_CHUNK_ROWS):
+    """
+    Most frequent values of a column as [(value, count), ...]
+
+    Exact while the column has at most `capacity` distinct values. Otherwise
+    Space-Saving picks the candidates chunk by chunk (bounded memory) and a
+    Count-Min sketch over the same chunks tightens their over-estimated counts.
+    """
+    top = TopKSketch(capacity=capacity)
+    counter = CountMinSketch()
+    for start in range(0, len(series), chunk_size):
+        chunk = series.iloc[start:start + chunk_size].dropna().astype(str)
+        top.update(chunk)
+        counter.update(chunk)
+
+    candidates = top.top(n)
+    if len(top.counts) < capacity or not candidates:
+        return candidates
+
+    refined = counter.estimate([item for item, _ in candidates])
+    counts = [(item, int(min(count, cm))) for (item, count), cm in zip(candidates, refined)]
+    return sorted(counts, key=lambda kv: kv[1], reverse=True)
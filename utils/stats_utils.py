@@ -0,0 +1,161 @@
+"""
+Statistics Utilities
+Vectorized kernels for grouped descriptive statistics used by chart generation
+"""
+import numpy as np
+import pandas as pd
+
+# Above this many groups the box-plot kernel switches to per-group histogram sketches
+APPROX_GROUP_THRESHOLD = 5000
+
+# Number of equi-width bins per group used by the approximate sketch
+SKETCH_BINS = 64
+
+BOX_STAT_COLUMNS = ['count', 'min', 'q1', 'median', 'q3', 'max', 'mean']
+
+
+def factorize_groups(keys, max_groups=None):
+    """
+    Encode group keys as integer codes in sorted key order (like groupby)
+
+    Missing keys get code -1. If max_groups is given, only the first
+    max_groups keys (in sorted order) keep their code; the rest become -1.
+
+    Returns:
+        (codes: np.ndarray, uniques: pd.Index)
+    """
+    try:
+        codes, uniques = pd.factorize(keys, sort=True)
+    except TypeError:
+        # Mixed, non-comparable keys - fall back to appearance order
+        codes, uniques = pd.factorize(keys, sort=False)
+
+    uniques = pd.Index(uniques)
+    if max_groups is not None and len(uniques) > max_groups:
+        codes = np.where(codes < max_groups, codes, -1)
+        uniques = uniques[:max_groups]
+
+    return np.asarray(codes), uniques
+
+
+def _interpolated_quantile(sorted_values, starts, counts, q):
+    """Linear-interpolated quantile (pandas default) read from group offsets"""
+    pos = starts + (counts - 1) * q
+    lower = np.floor(pos).astype(np.int64)
+    upper = np.ceil(pos).astype(np.int64)
+    frac = pos - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * frac
+
+
+def _exact_box_stats(codes, values, n_groups):
+    """Sort once by (group, value) and read every statistic from offsets"""
+    order = np.lexsort((values, codes))
+    codes_sorted = codes[order]
+    values_sorted = values[order]
+
+    counts = np.bincount(codes_sorted, minlength=n_groups)
+    starts = np.zeros(n_groups, dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+    sums = np.bincount(codes_sorted, weights=values_sorted, minlength=n_groups)
+
+    present = counts > 0
+    out = {name: np.zeros(n_groups) for name in BOX_STAT_COLUMNS}
+    out['count'] = counts
+    if not present.any():
+        return out
+
+    s, c = starts[present], counts[present]
+    out['min'][present] = values_sorted[s]
+    out['max'][present] = values_sorted[s + c - 1]
+    out['q1'][present] = _interpolated_quantile(values_sorted, s, c, 0.25)
+    out['median'][present] = _interpolated_quantile(values_sorted, s, c, 0.5)
+    out['q3'][present] = _interpolated_quantile(values_sorted, s, c, 0.75)
+    out['mean'][present] = sums[present] / c
+    return out
+
+
+def _sketch_box_stats(codes, values, n_groups, bins=SKETCH_BINS):
+    """
+    Approximate box statistics from per-group equi-width histograms
+
+    Runs in O(n) without sorting. min/max/mean are exact; quantile error is
+    bounded by (group max - group min) / bins.
+    """
+    counts = np.bincount(codes, minlength=n_groups)
+    sums = np.bincount(codes, weights=values, minlength=n_groups)
+
+    mins = np.full(n_groups, np.inf)
+    maxs = np.full(n_groups, -np.inf)
+    np.minimum.at(mins, codes, values)
+    np.maximum.at(maxs, codes, values)
+    present = counts > 0
+    mins[~present] = 0.0
+    maxs[~present] = 0.0
+
+    width = np.where(maxs > mins, (maxs - mins) / bins, 1.0)
+    width = np.where(np.isfinite(width), width, 1.0)
+    bin_idx = ((values - mins[codes]) / width[codes]).astype(np.int64)
+    np.clip(bin_idx, 0, bins - 1, out=bin_idx)
+
+    hist = np.bincount(codes * bins + bin_idx, minlength=n_groups * bins).reshape(n_groups, bins)
+    cumulative = np.cumsum(hist, axis=1)
+
+    out = {name: np.zeros(n_groups) for name in BOX_STAT_COLUMNS}
+    out['count'] = counts
+    if not present.any():
+        return out
+
+    def quantile(q):
+        rank = (counts - 1) * q
+        b = np.minimum((cumulative <= rank[:, None]).sum(axis=1), bins - 1)
+        rows = np.arange(n_groups)
+        before = np.where(b > 0, cumulative[rows, np.maximum(b - 1, 0)], 0)
+        in_bin = np.maximum(hist[rows, b], 1)
+        frac = np.clip((rank - before + 0.5) / in_bin, 0.0, 1.0)
+        return np.clip(mins + (b + frac) * width, mins, maxs)
+
+    out['min'][present] = mins[present]
+    out['max'][present] = maxs[present]
+    out['q1'][present] = quantile(0.25)[present]
+    out['median'][present] = quantile(0.5)[present]
+    out['q3'][present] = quantile(0.75)[present]
+    out['mean'][present] = sums[present] / counts[present]
+    return out
+
+
+def grouped_box_stats(keys, values, max_groups=None, approximate=None):
+    """
+    Compute min/q1/median/q3/max/mean for every group in one vectorized pass
+
+    Args:
+        keys: group keys (Series or array-like)
+        values: numeric values aligned with keys
+        max_groups: only keep the first N groups in sorted key order
+        approximate: True to use histogram sketches, False for exact,
+                     None to decide from the number of groups
+
+    Returns:
+        DataFrame indexed by group key with BOX_STAT_COLUMNS. Groups whose
+        values are all missing report 0 for every statistic.
+    """
+    codes, uniques = factorize_groups(keys, max_groups=max_groups)
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes = codes[keep].astype(np.int64)
+    values = values[keep]
+    n_groups = len(uniques)
+
+    if approximate is None:
+        approximate = n_groups > APPROX_GROUP_THRESHOLD
+
+    if n_groups == 0:
+        stats = {name: np.zeros(0) for name in BOX_STAT_COLUMNS}
+    elif approximate:
+        stats = _sketch_box_stats(codes, values, n_groups)
+    else:
+        stats = _exact_box_stats(codes, values, n_groups)
+
+    result = pd.DataFrame(stats, index=uniques, columns=BOX_STAT_COLUMNS)
+    result['count'] = result['count'].astype(np.int64)
+    return result